@@ -1,26 +1,23 @@
 # get_contract_data_enhanced.py
-import requests
 import json
 import os
 from datetime import datetime
 from dotenv import load_dotenv
+from src.utils.scrip_master import get_scrip_master_instruments, segment_filter
+from src.utils.instrument_index import get_instrument_index
+from src.utils.expiry_calendar import ExpiryCalendar, parse_expiry
 
 load_dotenv('./env/.env.prod')
 
+# Skip contracts expiring within this many days
+MIN_EXPIRY_DAYS = 10
+
 def get_mcx_instruments():
     """Get MCX instruments from Angel One's public API"""
     try:
-        print("📥 Downloading MCX instruments from Angel One...")
-        
-        url = "https://margincalculator.angelbroking.com/OpenAPI_File/files/OpenAPIScripMaster.json"
-        response = requests.get(url, timeout=30)
-        response.raise_for_status()
-        all_instruments = response.json()
+        print("📥 Loading MCX instruments from Angel One scrip master...")
         
-        mcx_instruments = [
-            inst for inst in all_instruments 
-            if inst.get('exch_seg') == 'MCX'
-        ]
+        mcx_instruments = get_scrip_master_instruments(segment_filter('MCX'))
         
         print(f"✅ Loaded {len(mcx_instruments)} MCX instruments")
         return mcx_instruments
@@ -31,10 +28,8 @@ def get_mcx_instruments():
 
 def parse_expiry_date(expiry_str):
     """Parse expiry string to datetime object"""
-    try:
-        return datetime.strptime(expiry_str, '%d%b%Y')
-    except ValueError:
-        return None
+    expiry_date = parse_expiry(expiry_str)
+    return datetime.combine(expiry_date, datetime.min.time()) if expiry_date else None
 
 def filter_and_sort_contracts(contracts, symbol_name):
     """Filter and sort contracts by expiry date"""
@@ -54,7 +49,7 @@ def filter_and_sort_contracts(contracts, symbol_name):
             expiry_date = parse_expiry_date(expiry_str)
             if expiry_date:
                 contract['expiry_date'] = expiry_date
-                contract['expiry_days'] = (expiry_date - datetime.now()).days
+                contract['expiry_days'] = ExpiryCalendar.days_to_expiry(expiry_str)
                 valid_contracts.append(contract)
     
     # Sort by expiry date (ascending - nearest first)
@@ -65,27 +60,33 @@ def filter_and_sort_contracts(contracts, symbol_name):
 def smart_mcx_contracts():
     """Get MCX contracts data with enhanced filtering"""
     
-    instruments = get_mcx_instruments()
-    if not instruments:
+    try:
+        index = get_instrument_index()
+    except Exception as e:
+        print(f"❌ Error loading instrument index: {e}")
         return None, None
     
     goldm_data = None
     silverm_data = None
+    calendar = ExpiryCalendar()
     
     print("\n🎯 CONTRACT SELECTION (Ascending order, >10 days expiry):")
     print("=" * 70)
     
     # Process GOLDM
     print(f"\n🔍 GOLDM Contracts:")
-    goldm_contracts = [inst for inst in instruments if inst.get('symbol', '').startswith('GOLDM') and 'FUT' in inst.get('symbol', '')]
+    goldm_contracts = [inst for inst in index.lookup('MCX', 'GOLDM') if inst.get('symbol', '').startswith('GOLDM') and 'FUT' in inst.get('symbol', '')]
     goldm_valid = filter_and_sort_contracts(goldm_contracts, 'GOLDM')
+    for contract in goldm_valid:
+        calendar.add('GOLDM', contract.get('expiry', ''))
+    goldm_expiry = calendar.nearest_with_min_days('GOLDM', MIN_EXPIRY_DAYS)
     
     for contract in goldm_valid:
         symbol = contract.get('symbol', '')
         expiry_str = contract.get('expiry', '')
         expiry_days = contract['expiry_days']
         
-        if expiry_days >= 10 and not goldm_data:
+        if expiry_str == goldm_expiry and not goldm_data:
             goldm_data = contract
             print(f"✅ SELECTED: {symbol}")
             print(f"   Expiry: {expiry_str} ({expiry_days} days left)")
@@ -95,20 +96,23 @@ def smart_mcx_contracts():
             contract['trading_symbol'] = symbol
             contract['instrument_key'] = f"MCX_FUT_{contract.get('token')}"
         else:
-            status = "SKIPPED" if expiry_days < 10 else "available"
+            status = "SKIPPED" if expiry_days < MIN_EXPIRY_DAYS else "available"
             print(f"   {symbol} - {expiry_str} ({expiry_days}d) - {status}")
     
     # Process SILVERM
     print(f"\n🔍 SILVERM Contracts:")
-    silverm_contracts = [inst for inst in instruments if inst.get('symbol', '').startswith('SILVERM') and 'FUT' in inst.get('symbol', '') and 'IC' not in inst.get('symbol', '')]
+    silverm_contracts = [inst for inst in index.lookup('MCX', 'SILVERM') if inst.get('symbol', '').startswith('SILVERM') and 'FUT' in inst.get('symbol', '') and 'IC' not in inst.get('symbol', '')]
     silverm_valid = filter_and_sort_contracts(silverm_contracts, 'SILVERM')
+    for contract in silverm_valid:
+        calendar.add('SILVERM', contract.get('expiry', ''))
+    silverm_expiry = calendar.nearest_with_min_days('SILVERM', MIN_EXPIRY_DAYS)
     
     for contract in silverm_valid:
         symbol = contract.get('symbol', '')
         expiry_str = contract.get('expiry', '')
         expiry_days = contract['expiry_days']
         
-        if expiry_days >= 10 and not silverm_data:
+        if expiry_str == silverm_expiry and not silverm_data:
             silverm_data = contract
             print(f"✅ SELECTED: {symbol}")
             print(f"   Expiry: {expiry_str} ({expiry_days} days left)")
@@ -118,7 +122,7 @@ def smart_mcx_contracts():
             contract['trading_symbol'] = symbol
             contract['instrument_key'] = f"MCX_FUT_{contract.get('token')}"
         else:
-            status = "SKIPPED" if expiry_days < 10 else "available"
+            status = "SKIPPED" if expiry_days < MIN_EXPIRY_DAYS else "available"
             print(f"   {symbol} - {expiry_str} ({expiry_days}d) - {status}")
     
     return goldm_data, silverm_data
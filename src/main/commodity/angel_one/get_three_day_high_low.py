@@ -4,8 +4,10 @@ import pyotp
 import os
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
-import time
-from src.main.commodity.angel_one.get_contract_data import  smart_mcx_contracts,get_mcx_instruments
+from src.main.commodity.angel_one.get_contract_data import  smart_mcx_contracts
+from src.utils.instrument_index import get_instrument_index
+from src.utils.candle_store import CandleStore
+from src.utils.trading_levels import range_levels, levels_row
 
 load_dotenv('./env/.env.prod')
 
@@ -82,30 +84,20 @@ def get_historical_data_alternative(smartApi, token, symbol):
         end_date = datetime.now() - timedelta(days=1)  # Yesterday
         start_date = end_date - timedelta(days=7)      # Last 7 days
         
-        historicParam = {
-            "exchange": "MCX",
-            "symboltoken": token,
-            "interval": "ONE_DAY",
-            "fromdate": start_date.strftime('%Y-%m-%d 09:00'),
-            "todate": end_date.strftime('%Y-%m-%d 23:59')
-        }
-        
         print(f"  Fetching range: {start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}")
         
-        # Add delay to avoid rate limiting
-        time.sleep(2)
-        
-        historical_data = smartApi.getCandleData(historicParam)
+        # Served from the local candle store; only missing days hit the broker
+        candles = CandleStore.get_instance().get_daily_candles(smartApi, "MCX", token, start_date, end_date)
         
-        print(f"  Response received: {len(historical_data.get('data', []))} candles")
+        print(f"  Response received: {len(candles)} candles")
         
-        if historical_data['status'] and historical_data['data']:
+        if candles:
             highs = []
             lows = []
             message = f"📊 {symbol} - Historical Analysis\n\n"
             
             # Get last 3 trading days from the data
-            recent_candles = historical_data['data'][-3:] if len(historical_data['data']) >= 3 else historical_data['data']
+            recent_candles = candles[-3:]
             
             print(f"  Processing {len(recent_candles)} candles...")
             
@@ -136,7 +128,7 @@ def get_historical_data_alternative(smartApi, token, symbol):
             print(f"  ✅ SUCCESS: Processed {len(highs)} days of data")
             return highs, lows, message
         else:
-            print(f"  ❌ ALTERNATIVE FAILED: No data - {historical_data}")
+            print(f"  ❌ ALTERNATIVE FAILED: No data for {symbol}")
             return [], [], f"❌ No historical data available for {symbol}"
             
     except Exception as e:
@@ -153,15 +145,8 @@ def debug_historical_response(smartApi, token, symbol):
         end_date = datetime.now() - timedelta(days=1)
         start_date = end_date - timedelta(days=3)
         
-        historicParam = {
-            "exchange": "MCX",
-            "symboltoken": token,
-            "interval": "ONE_DAY",
-            "fromdate": start_date.strftime('%Y-%m-%d 09:00'),
-            "todate": end_date.strftime('%Y-%m-%d 23:59')
-        }
-        
-        response = smartApi.getCandleData(historicParam)
+        candles = CandleStore.get_instance().get_daily_candles(smartApi, "MCX", token, start_date, end_date)
+        response = {'status': bool(candles), 'data': candles}
         print(f"  Full response: {response}")
         
         if response['status'] and response['data']:
@@ -198,24 +183,19 @@ def get_spot_commodity_data(smartApi, symbol):
             return [], [], "❌ No spot symbol mapping found"
         
         # Get spot instruments
-        # from get_contract_data import get_mcx_instruments
-        instruments = get_mcx_instruments()
-        if not instruments:
-            return [], [], "❌ Could not fetch instruments"
+        index = get_instrument_index()
         
         # Find spot contract
-        spot_contracts = [
-            inst for inst in instruments 
-            if inst.get('symbol') == base_symbol and inst.get('exch_seg') == 'MCX'
-        ]
+        spot_contract = index.get_by_symbol('MCX', base_symbol)
+        spot_contracts = [spot_contract] if spot_contract else []
         
         if not spot_contracts:
             print(f"  ❌ No spot contract found for {base_symbol}")
             # Try GOLDPETAL for gold
             if base_symbol == 'GOLD':
-                spot_contracts = [inst for inst in instruments if 'GOLDPETAL' in inst.get('symbol', '')]
+                spot_contracts = index.lookup('MCX', 'GOLDPETAL')
             elif base_symbol == 'SILVER':
-                spot_contracts = [inst for inst in instruments if 'SILVERPETAL' in inst.get('symbol', '')]
+                spot_contracts = index.lookup('MCX', 'SILVERPETAL')
         
         if not spot_contracts:
             return [], [], f"❌ No spot contract found for {base_symbol}"
@@ -237,8 +217,9 @@ def calculate_trading_levels(highs, lows, symbol, token):
     if not highs or not lows:
         return None, "❌ Insufficient data to calculate trading levels"
     
-    three_day_high = max(highs)
-    three_day_low = min(lows)
+    levels = levels_row(range_levels(highs, lows), 0)
+    three_day_high = levels['three_day_high']
+    three_day_low = levels['three_day_low']
     price_range = three_day_high - three_day_low
     
     message = f"🎯 {symbol} - TRADING LEVELS\n"
@@ -247,14 +228,9 @@ def calculate_trading_levels(highs, lows, symbol, token):
     message += f"📉 3-Day Low: ₹{three_day_low:,.2f}\n"
     message += f"📊 Price Range: ₹{price_range:,.2f}\n\n"
     
-    # Calculate trading levels
-    buy_entry = three_day_low + (price_range * 0.1)
-    buy_target = buy_entry + (price_range * 0.15)
-    buy_sl = buy_entry - (price_range * 0.05)
-    
-    sell_entry = three_day_high - (price_range * 0.1)
-    sell_target = sell_entry - (price_range * 0.15)
-    sell_sl = sell_entry + (price_range * 0.05)
+    # Trading levels: entries 10% inside the range, targets 15% and SL 5% of the range
+    buy_entry, buy_target, buy_sl = levels['buy_entry'], levels['buy_target'], levels['buy_sl']
+    sell_entry, sell_target, sell_sl = levels['sell_entry'], levels['sell_target'], levels['sell_sl']
     
     message += "🟢 BUY STRATEGY\n"
     message += f"Entry: ₹{buy_entry:,.2f}\n"
@@ -287,12 +263,12 @@ def analyze_symbol(smartApi, symbol_data):
     
     print(f"\n🔍 Analyzing {symbol}...")
     
-    # First, debug the response format
-    debug_response = debug_historical_response(smartApi, token, symbol)
-    
     # Use alternative method (which now works with the timestamp format)
     highs, lows, historical_message = get_historical_data_alternative(smartApi, token, symbol)
     
+    # Debug the response format; its narrower range is already in the candle store
+    debug_response = debug_historical_response(smartApi, token, symbol)
+    
     # If still no data, try spot data
     if not highs or not lows:
         print(f"🔄 Futures data failed, trying spot data for {symbol}...")
@@ -329,14 +305,11 @@ def main_analysis():
     
     results = []
     
-    # Analyze GOLDM with delay between requests
+    # Analyze GOLDM
     if goldm_data:
         goldm_result, goldm_message = analyze_symbol(smartApi, goldm_data)
         if goldm_result:
             results.append(("GOLDM", goldm_message, goldm_result))
-        
-        # Add delay between symbol requests
-        time.sleep(3)
     
     # Analyze SILVERM
     if silverm_data:
@@ -1,8 +1,7 @@
 import requests
 import gzip
-import json
-import io
 from datetime import datetime
+from src.utils.json_stream import iter_json_array, CHUNK_SIZE
 
 def smart_mcx_contracts():
     """Simple version - paste and run"""
@@ -10,21 +9,28 @@ def smart_mcx_contracts():
     # Download MCX data
     url = "https://assets.upstox.com/market-quote/instruments/exchange/MCX.json.gz"
     
+    # Commodities to analyze
+    commodities = [
+        ('GOLDM FUT', 'GOLDM'),
+        ('SILVERM FUT', 'SILVERM')
+    ]
+    prefixes = tuple(symbol for symbol, _ in commodities)
+    
     try:
         print("📥 Downloading MCX data...")
-        response = requests.get(url, timeout=10)
-        instruments = json.load(gzip.GzipFile(fileobj=io.BytesIO(response.content)))
+        # Gunzip and parse while streaming, keeping only the contracts we analyze
+        with requests.get(url, timeout=10, stream=True) as response:
+            response.raise_for_status()
+            gz = gzip.GzipFile(fileobj=response.raw)
+            instruments = [
+                inst for inst in iter_json_array(iter(lambda: gz.read(CHUNK_SIZE), b''))
+                if inst.get('trading_symbol', '').startswith(prefixes)
+            ]
         print(f"✅ Loaded {len(instruments)} instruments")        
     except Exception as e:
         print(f"❌ Error: {e}")
         return
     
-    # Commodities to analyze
-    commodities = [
-        ('GOLDM FUT', 'GOLDM'),
-        ('SILVERM FUT', 'SILVERM')
-    ]
-    
     print("\n🎯 CONTRACT SELECTION (Skipping contracts expiring within 10 days):")
     print("=" * 70)
     
@@ -4,6 +4,7 @@ import os
 from dotenv import load_dotenv
 import os
 import upstox_client
+from src.utils.request_cache import memoized_call
 
 
 load_dotenv('./env/.env.prod')
@@ -15,7 +16,8 @@ def get_mcx_holidays():
     api_instance = upstox_client.MarketHolidaysAndTimingsApi(upstox_client.ApiClient(configuration))
     holidays = set()
     try:
-        api_response = api_instance.get_holidays()
+        # GOLDM and SILVERM both ask for the holiday list; fetch it once per run
+        api_response = memoized_call(('upstox', 'holidays'), api_instance.get_holidays)
         for holiday in api_response['data']:
             holidays.add(holiday['date'])
     except Exception as e:
@@ -50,7 +52,8 @@ def simple_trading_strategy(data):
     for day in weekdays:
         date_str = day.strftime('%Y-%m-%d')
         url = f"https://api.upstox.com/v2/historical-candle/{instrument_key}/day/{date_str}/{date_str}"
-        response = requests.get(url, headers=headers)
+        response = memoized_call(('upstox', url), requests.get, url, headers=headers,
+                                 should_cache=lambda r: r.status_code == 200)
         if response.status_code == 200:
             candle_data = response.json()
             if candle_data.get('data', {}).get('candles'):
@@ -7,7 +7,6 @@ from datetime import datetime, timedelta
 import os
 from dotenv import load_dotenv
 from SmartApi import SmartConnect
-from SmartApi.smartWebSocketV2 import SmartWebSocketV2
 import pyotp
 import threading
 from typing import Dict, List, Optional
@@ -16,9 +15,18 @@ import asyncio
 import concurrent.futures
 from queue import Queue, Empty
 import multiprocessing
-from collections import defaultdict
+from collections import deque
+import numpy as np
 from src.utils.angel_one_connect import AngelOneConnect
 from src.utils.send_message import send_telegram_message, send_telegram_message_admin
+from src.utils.analysis_artifact import artifact_path_for, is_artifact_current, read_analysis_artifact, LEVEL_FIELDS
+from src.utils.monitored_option import MonitoredOption
+from src.utils.metrics import MetricsRegistry
+from src.utils.websocket_shards import WebSocketShard, partition_tokens
+from src.utils.tick_state import (
+    TickState, POSITION_TARGET, POSITION_STOPLOSS,
+    OPEN_POSITION_STATES, CLOSED_POSITION_STATES, TRIGGERED_POSITION_STATES
+)
 
 # Set up logging
 logging.basicConfig(
@@ -37,59 +45,56 @@ class ParallelOptionMonitor:
         self.smart_api = None
         self.telegram_bot_token = os.getenv("TELEGRAM_BOT_TOKEN")
         self.telegram_chat_id = os.getenv("TELEGRAM_CHAT_ID")
-        self.monitored_options = []
+        self.monitored_options: List[MonitoredOption] = []
         
-        # Enhanced tracking sets with mutual exclusion
-        self.alerted_targets = set()  # Options that hit target
-        self.alerted_stoploss = set()  # Options that hit stoploss
-        self.alerted_entries = set()  # Options that triggered entry
-        self.entered_positions = set()  # Track positions that have been entered
-        self.completed_positions = set()  # Track positions that are completed (target or stoploss hit)
-        
-        self.last_ltp = {}  # Store last LTP for change detection
-        self.is_ws_connected = False
-        self.ws_thread = None
-        self.web_socket = None
-        self.token_map = {}  # Map tokens to option data
-        self.correlation_id = "option_monitor_001"
-        self.max_ws_tokens = 3000
+        # LTPs, alert times and position states by option id
+        self.tick_state = TickState([])
+        
+        self.is_ws_connected = False  # True while any shard is connected
+        self.ws_shards: List[WebSocketShard] = []
+        self.ws_status_lock = threading.Lock()
+        self.ws_start_reported = False  # Admin is told once, when every shard first connects
+        self.token_map: Dict[str, MonitoredOption] = {}  # Map tokens to monitored options
         
         # Parallel processing attributes
         self.alert_queue = Queue()
         self.alert_threads = []
         self.max_alert_workers = 5
-        self.data_queue = Queue()
+        self.data_queue = Queue()  # (row, ltp) ticks from several shards for the single tick dispatcher
+        self.tick_threads = []  # Tick dispatcher / batcher, joined on stop before the alert queue is drained
         self.is_running = True
         
         # Performance tracking
         self.message_count = 0
-        self.last_alert_time = defaultdict(float)
         self.alert_cooldown = 2  # seconds between same option alerts
+        
+        # Tick and alert metrics; writers only touch their own thread's cells
+        self.metrics = MetricsRegistry()
+        self.ticks_received = self.metrics.counter('ticks_received')
+        self.alerts_sent = {
+            alert_type: self.metrics.counter(f'alerts_sent.{alert_type}')
+            for alert_type in ('entry', 'target', 'stoploss')
+        }
+        self.alert_processing_time = self.metrics.histogram('alert_processing_seconds')
+        self.max_queue_size = self.metrics.gauge('max_alert_queue_size')
+        
+        # Optional micro-batching: ticks are buffered for this window and evaluated together (0 = per tick)
+        self.tick_batch_window = float(os.getenv('TICK_BATCH_WINDOW_MS', '0')) / 1000
+        self.tick_buffer = deque()
+        self.tick_batch_size = self.metrics.histogram('tick_batch_size', (1, 10, 100, 1000, 10000))
+        self.tick_batch_time = self.metrics.histogram('tick_batch_seconds', (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05))
 
         # Enhanced Memory Context
         self.monitoring_context = {
             'session_start_time': datetime.now().isoformat(),
-            'total_alerts_sent': 0,
-            'alerts_by_type': {'entry': 0, 'target': 0, 'stoploss': 0},
             'options_loaded': 0,
             'gap_up_skipped': 0,
             'webSocket_reconnects': 0,
             'last_health_report': None,
-            'performance_metrics': {
-                'avg_alert_processing_time': 0,
-                'max_queue_size': 0,
-                'total_data_points': 0
-            },
             'trading_session': {
                 'start_time': datetime.now().isoformat(),
                 'market_status': 'UNKNOWN',
                 'last_sync_time': None
-            },
-            'position_management': {
-                'active_positions': 0,
-                'completed_positions': 0,
-                'profitable_exits': 0,
-                'loss_exits': 0
             }
         }
 
@@ -108,50 +113,59 @@ class ParallelOptionMonitor:
         except Exception as e:
             logging.error(f"Error updating context: {e}")
 
+    def get_metrics(self) -> Dict:
+        """Consistent snapshot of tick and alert metrics"""
+        snapshot = self.metrics.snapshot()
+        alerts_by_type = {alert_type: snapshot['counters'][f'alerts_sent.{alert_type}'] for alert_type in self.alerts_sent}
+        snapshot['alerts_by_type'] = alerts_by_type
+        snapshot['total_alerts_sent'] = sum(alerts_by_type.values())
+        snapshot['current_queue_size'] = self.alert_queue.qsize()
+        snapshot['websocket_shards'] = [shard.health() for shard in self.ws_shards]
+        return snapshot
+
     def get_context_summary(self):
         """Get a summary of the current monitoring context"""
+        metrics = self.get_metrics()
         return {
             'session_duration': str(datetime.now() - datetime.fromisoformat(self.monitoring_context['session_start_time'])),
             'total_options_monitored': len(self.monitored_options),
-            'active_positions': len(self.entered_positions),
-            'completed_positions': len(self.completed_positions),
-            'alerts_sent': self.monitoring_context['total_alerts_sent'],
-            'alerts_breakdown': self.monitoring_context['alerts_by_type'],
+            'active_positions': self.tick_state.count(*OPEN_POSITION_STATES),
+            'completed_positions': self.tick_state.count(*CLOSED_POSITION_STATES),
+            'alerts_sent': metrics['total_alerts_sent'],
+            'alerts_breakdown': metrics['alerts_by_type'],
             'system_health': {
                 'webSocket_connected': self.is_ws_connected,
                 'alert_workers_active': len([t for t in self.alert_threads if t.is_alive()]),
                 'current_queue_size': self.alert_queue.qsize(),
-                'memory_usage': len(self.token_map)
+                'memory_usage': len(self.token_map),
+                'tick_state_bytes': self.tick_state.nbytes(),
+                'websocket_shards': [shard.health() for shard in self.ws_shards]
             }
         }
 
-    def is_position_active(self, unique_id: str) -> bool:
+    def is_position_active(self, option_id: int) -> bool:
         """Check if position is still active (not completed)"""
-        return unique_id in self.entered_positions and unique_id not in self.completed_positions
+        return self.tick_state.position_state[option_id] in OPEN_POSITION_STATES
 
-    def mark_position_completed(self, unique_id: str, exit_type: str):
-        """Mark a position as completed and update context"""
-        if unique_id in self.entered_positions:
-            self.completed_positions.add(unique_id)
-            
-            # Update context
-            self.update_context('completed_positions', len(self.completed_positions), 'position_management')
-            self.update_context('active_positions', len(self.entered_positions) - len(self.completed_positions), 'position_management')
-            
-            if exit_type == 'target':
-                self.update_context('profitable_exits', 
-                                  self.monitoring_context['position_management']['profitable_exits'] + 1, 
-                                  'position_management')
-                logging.info(f"✅ Position {unique_id} completed with TARGET (Profit)")
-            elif exit_type == 'stoploss':
-                self.update_context('loss_exits', 
-                                  self.monitoring_context['position_management']['loss_exits'] + 1, 
-                                  'position_management')
-                logging.info(f"🛑 Position {unique_id} completed with STOPLOSS (Loss)")
+    def get_position_summary(self) -> Dict:
+        """Position counts read from the tick state machine"""
+        return {
+            'active_positions': self.tick_state.count(*OPEN_POSITION_STATES),
+            'completed_positions': self.tick_state.count(*CLOSED_POSITION_STATES),
+            'profitable_exits': self.tick_state.count(POSITION_TARGET),
+            'loss_exits': self.tick_state.count(POSITION_STOPLOSS)
+        }
 
     def load_analysis_data(self, json_file_path: str):
-        """Load analysis data from JSON file"""
+        """Load analysis data, preferring the binary artifact written next to the JSON"""
         try:
+            artifact_path = artifact_path_for(json_file_path)
+            if is_artifact_current(artifact_path, json_file_path):
+                try:
+                    return self.load_analysis_artifact(artifact_path)
+                except Exception as e:
+                    logging.warning(f"⚠️ Could not load {artifact_path}, falling back to JSON: {e}")
+            
             with open(json_file_path, 'r') as f:
                 data = json.load(f)
             
@@ -167,83 +181,92 @@ class ParallelOptionMonitor:
             
             for result in data.get('results', []):
                 stock = result.get('stock', {})
-                options_data = result.get('options', {})
+                options_data = result.get('options') or {}
+                stock_day_high = result.get('historical', {}).get('high', 0)
                 
-                # Monitor CE options
-                if options_data.get('ce'):
-                    ce_option = options_data['ce']
-                    token = ce_option.get('token')
+                for option_type in ('CE', 'PE'):
+                    option_data = options_data.get(option_type.lower())
+                    if not option_data or not str(option_data.get('token', '')).strip():
+                        continue
                     
-                    if token and str(token).strip():
-                        # Check for gap up condition
-                        day_open = ce_option.get('option_ohlc', {}).get('day_open', 0)
-                        buy_entry = ce_option.get('trading_levels', {}).get('buy_entry', 0)
-                        
-                        if day_open > buy_entry:
-                            logging.info(f"⏩ Skipping {ce_option.get('symbol')} - Gap up detected (Open: {day_open} > Entry: {buy_entry})")
-                            skipped_gap_up += 1
-                            continue
-                        
-                        ce_option['stock_name'] = stock.get('name')
-                        ce_option['stock_symbol'] = stock.get('symbol')
-                        ce_option['stock_day_high'] = result.get('historical', {}).get('high', 0)
-                        ce_option['option_type'] = 'CE'
-                        ce_option['unique_id'] = f"{ce_option['symbol']}_{ce_option['option_type']}"
-                        ce_option['alert_key'] = f"{ce_option['symbol']}_{ce_option['option_type']}"
-                        ce_option['loaded_time'] = datetime.now().isoformat()
-                        self.monitored_options.append(ce_option)
-                        
-                        # Add to token map for WebSocket
-                        self.token_map[token] = ce_option
-                        valid_tokens += 1
-                
-                # Monitor PE options
-                if options_data.get('pe'):
-                    pe_option = options_data['pe']
-                    token = pe_option.get('token')
+                    option = MonitoredOption.from_analysis(
+                        len(self.monitored_options), option_data, option_type, stock, stock_day_high
+                    )
                     
-                    if token and str(token).strip():
-                        # Check for gap up condition
-                        day_open = pe_option.get('option_ohlc', {}).get('day_open', 0)
-                        buy_entry = pe_option.get('trading_levels', {}).get('buy_entry', 0)
-                        
-                        if day_open > buy_entry:
-                            logging.info(f"⏩ Skipping {pe_option.get('symbol')} - Gap up detected (Open: {day_open} > Entry: {buy_entry})")
-                            skipped_gap_up += 1
-                            continue
-                        
-                        pe_option['stock_name'] = stock.get('name')
-                        pe_option['stock_symbol'] = stock.get('symbol')
-                        pe_option['stock_day_high'] = result.get('historical', {}).get('high', 0)
-                        pe_option['option_type'] = 'PE'
-                        pe_option['unique_id'] = f"{pe_option['symbol']}_{pe_option['option_type']}"
-                        pe_option['alert_key'] = f"{pe_option['symbol']}_{pe_option['option_type']}"
-                        pe_option['loaded_time'] = datetime.now().isoformat()
-                        self.monitored_options.append(pe_option)
-                        
-                        # Add to token map for WebSocket
-                        self.token_map[token] = pe_option
-                        valid_tokens += 1
-            
-            # Update context with loading statistics
-            self.update_context('options_loaded', len(self.monitored_options))
-            self.update_context('gap_up_skipped', skipped_gap_up)
-            self.update_context('valid_tokens', valid_tokens)
-            
-            logging.info(f"Monitoring {len(self.monitored_options)} options")
-            logging.info(f"Skipped {skipped_gap_up} options due to gap up")
-            logging.info(f"Valid tokens: {valid_tokens}")
+                    # Check for gap up condition
+                    if option.day_open > option.buy_entry:
+                        logging.info(f"⏩ Skipping {option.symbol} - Gap up detected (Open: {option.day_open} > Entry: {option.buy_entry})")
+                        skipped_gap_up += 1
+                        continue
+                    
+                    self.monitored_options.append(option)
+                    
+                    # Add to token map for WebSocket
+                    self.token_map[option.token] = option
+                    valid_tokens += 1
             
-            # Initialize last LTP storage
-            for option in self.monitored_options:
-                self.last_ltp[option['unique_id']] = 0
-                
+            self.finish_loading(valid_tokens, skipped_gap_up)
             return True
             
         except Exception as e:
             logging.error(f"Error loading analysis data: {e}")
             return False
 
+    def load_analysis_artifact(self, artifact_path: str):
+        """Load monitored options from the columnar artifact written by the analysis"""
+        meta, columns = read_analysis_artifact(artifact_path)
+        
+        logging.info(f"Loaded analysis artifact from: {artifact_path}")
+        logging.info(f"Analysis Time: {meta.get('analysis_time', 'N/A')}")
+        logging.info(f"Stocks Analyzed: {meta.get('stocks_analyzed', 0)}")
+        
+        # Gap up check for every leg at once. A missing open or entry counts as 0, as in
+        # the JSON loader, so a leg with an open but no levels is skipped as gap up
+        day_open = np.where(columns['has_ohlc'], columns['day_open'], 0.0)
+        buy_entry = np.where(columns['has_levels'], columns['buy_entry'], 0.0)
+        gap_up = day_open > buy_entry
+        keep = np.flatnonzero(~gap_up)
+        
+        values = {column: array[keep].tolist() for column, array in columns.items()}
+        
+        self.monitored_options = []
+        self.token_map = {}
+        for i in range(len(keep)):
+            option = MonitoredOption(
+                id=i,
+                token=values['token'][i],
+                symbol=values['symbol'][i],
+                option_type=values['option_type'][i],
+                expiry=values['expiry'][i],
+                strike=values['strike'][i],
+                lotsize=values['lotsize'][i],
+                stock_name=values['stock_name'][i],
+                stock_symbol=values['stock_symbol'][i],
+                stock_day_high=values['stock_day_high'][i],
+                day_open=values['day_open'][i] if values['has_ohlc'][i] else 0.0,
+                levels={field: values[field][i] for field in LEVEL_FIELDS} if values['has_levels'][i] else None,
+            )
+            self.monitored_options.append(option)
+            self.token_map[option.token] = option
+        
+        self.finish_loading(len(keep), int(gap_up.sum()))
+        return True
+
+    def finish_loading(self, valid_tokens: int, skipped_gap_up: int):
+        """Record loading statistics and reset last LTPs"""
+        # Update context with loading statistics
+        self.update_context('options_loaded', len(self.monitored_options))
+        self.update_context('gap_up_skipped', skipped_gap_up)
+        self.update_context('valid_tokens', valid_tokens)
+        
+        logging.info(f"Monitoring {len(self.monitored_options)} options")
+        logging.info(f"Skipped {skipped_gap_up} options due to gap up")
+        logging.info(f"Valid tokens: {valid_tokens}")
+        
+        # Fresh LTPs, alert times and position states for the loaded options
+        self.tick_state = TickState(self.monitored_options)
+        logging.info(f"Tick state: {self.tick_state.nbytes() / 1024:.1f} KB for {len(self.tick_state)} options")
+
     def start_alert_workers(self):
         """Start parallel alert worker threads"""
         for i in range(self.max_alert_workers):
@@ -257,16 +280,16 @@ class ParallelOptionMonitor:
             logging.info(f"Started alert worker thread {i+1}")
 
     def alert_worker(self):
-        """Worker thread to process alerts in parallel"""
-        while self.is_running:
+        """Worker thread to process alerts in parallel, until it takes a None sentinel"""
+        while True:
+            alert_data = self.alert_queue.get()
+            
             try:
-                # Get alert from queue with timeout
-                alert_data = self.alert_queue.get(timeout=1)
                 if alert_data is None:
                     break
                     
                 alert_type = alert_data['type']
-                option_data = alert_data['option_data']
+                option = alert_data['option']
                 current_ltp = alert_data['current_ltp']
                 
                 # Track alert processing start time
@@ -274,41 +297,30 @@ class ParallelOptionMonitor:
                 
                 # Process alert based on type
                 if alert_type == 'entry':
-                    self.send_entry_alert(option_data, current_ltp)
+                    self.send_entry_alert(option, current_ltp)
                 elif alert_type == 'target':
-                    self.send_target_alert(option_data, current_ltp)
+                    self.send_target_alert(option, current_ltp)
                 elif alert_type == 'stoploss':
-                    self.send_stoploss_alert(option_data, current_ltp)
-                
-                # Update context with alert metrics
-                processing_time = time.time() - processing_start
-                self.update_context('total_alerts_sent', self.monitoring_context['total_alerts_sent'] + 1)
-                self.update_context('alerts_by_type', self.monitoring_context['alerts_by_type'][alert_type] + 1, alert_type)
-                
-                # Update performance metrics
-                current_avg = self.monitoring_context['performance_metrics']['avg_alert_processing_time']
-                total_alerts = self.monitoring_context['total_alerts_sent']
-                new_avg = ((current_avg * (total_alerts - 1)) + processing_time) / total_alerts
-                self.update_context('avg_alert_processing_time', new_avg, 'performance_metrics')
+                    self.send_stoploss_alert(option, current_ltp)
                 
-                self.alert_queue.task_done()
+                # Update alert metrics
+                self.alerts_sent[alert_type].inc()
+                self.alert_processing_time.observe(time.time() - processing_start)
                 
-            except Empty:
-                continue
             except Exception as e:
                 logging.error(f"Error in alert worker: {e}")
+            finally:
+                self.alert_queue.task_done()
 
-    def send_entry_alert(self, option_data: Dict, current_ltp: float):
+    def send_entry_alert(self, option: MonitoredOption, current_ltp: float):
         """Send entry alert in parallel"""
-        unique_id = option_data.get('unique_id')
-        option_symbol = option_data.get('symbol')
-        stock_name = option_data.get('stock_name')
-        option_type = option_data.get('option_type')
-        trading_levels = option_data.get('trading_levels', {})
+        option_symbol = option.symbol
+        stock_name = option.stock_name
+        option_type = option.option_type
         
-        buy_entry = trading_levels.get('buy_entry', 0)
-        target = trading_levels.get('target', 0)
-        stoploss = trading_levels.get('stoploss', 0)
+        buy_entry = option.buy_entry
+        target = option.target
+        stoploss = option.stoploss
         
         message = f"""
 *BUY ENTRY TRIGGERED*
@@ -323,37 +335,30 @@ class ParallelOptionMonitor:
 *Target:* ₹{target:,.2f}
 *Stop Loss:* ₹{stoploss:,.2f}
 
-*Upside:* +{trading_levels.get('upside_potential', 0)}%
-*Downside:* -{trading_levels.get('downside_risk', 0)}%
-*Risk-Reward:* {trading_levels.get('risk_reward_ratio', 0)}:1
+*Upside:* +{option.upside_potential}%
+*Downside:* -{option.downside_risk}%
+*Risk-Reward:* {option.risk_reward_ratio}:1
 
 *{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*
         """
         
+        # The position is already tracked as entered; a failed send only loses the message
+        self.update_context('trading_session', datetime.now().isoformat(), 'last_entry_time')
+        self.update_context('trading_session', self.tick_state.count(*OPEN_POSITION_STATES), 'active_positions_count')
+        
         if send_telegram_message(message):
-            self.alerted_entries.add(unique_id)
-            self.entered_positions.add(unique_id)
-            
-            # Update context with position entry
-            self.update_context('trading_session', {
-                **self.monitoring_context['trading_session'],
-                'last_entry_time': datetime.now().isoformat(),
-                'active_positions_count': len(self.entered_positions)
-            })
-            self.update_context('active_positions', len(self.entered_positions), 'position_management')
-            
             logging.info(f"PARALLEL Entry alert sent for {option_symbol}")
+        else:
+            logging.warning(f"⚠️ Entry alert for {option_symbol} could not be sent")
 
-    def send_target_alert(self, option_data: Dict, current_ltp: float):
+    def send_target_alert(self, option: MonitoredOption, current_ltp: float):
         """Send target alert in parallel"""
-        unique_id = option_data.get('unique_id')
-        option_symbol = option_data.get('symbol')
-        stock_name = option_data.get('stock_name')
-        option_type = option_data.get('option_type')
-        trading_levels = option_data.get('trading_levels', {})
-        
-        buy_entry = trading_levels.get('buy_entry', 0)
-        target = trading_levels.get('target', 0)
+        option_symbol = option.symbol
+        stock_name = option.stock_name
+        option_type = option.option_type
+        
+        buy_entry = option.buy_entry
+        target = option.target
         profit_percentage = ((current_ltp - buy_entry) / buy_entry) * 100 if buy_entry > 0 else 0
         
         message = f"""
@@ -373,22 +378,20 @@ class ParallelOptionMonitor:
 *{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*
         """
         
+        logging.info(f"✅ Position {option.unique_id} completed with TARGET (Profit)")
         if send_telegram_message(message):
-            self.alerted_targets.add(unique_id)
-            # Mark position as completed when target is hit
-            self.mark_position_completed(unique_id, 'target')
             logging.info(f"PARALLEL Target hit for {option_symbol}")
+        else:
+            logging.warning(f"⚠️ Target alert for {option_symbol} could not be sent")
 
-    def send_stoploss_alert(self, option_data: Dict, current_ltp: float):
+    def send_stoploss_alert(self, option: MonitoredOption, current_ltp: float):
         """Send stoploss alert in parallel"""
-        unique_id = option_data.get('unique_id')
-        option_symbol = option_data.get('symbol')
-        stock_name = option_data.get('stock_name')
-        option_type = option_data.get('option_type')
-        trading_levels = option_data.get('trading_levels', {})
-        
-        buy_entry = trading_levels.get('buy_entry', 0)
-        stoploss = trading_levels.get('stoploss', 0)
+        option_symbol = option.symbol
+        stock_name = option.stock_name
+        option_type = option.option_type
+        
+        buy_entry = option.buy_entry
+        stoploss = option.stoploss
         loss_percentage = ((buy_entry - current_ltp) / buy_entry) * 100 if buy_entry > 0 else 0
         
         message = f"""
@@ -408,19 +411,16 @@ class ParallelOptionMonitor:
 *{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*
         """
         
+        logging.info(f"🛑 Position {option.unique_id} completed with STOPLOSS (Loss)")
         if send_telegram_message(message):
-            self.alerted_stoploss.add(unique_id)
-            # Mark position as completed when stoploss is hit
-            self.mark_position_completed(unique_id, 'stoploss')
             logging.info(f"PARALLEL Stoploss hit for {option_symbol}")
+        else:
+            logging.warning(f"⚠️ Stoploss alert for {option_symbol} could not be sent")
 
     def on_data(self, wsapp, message):
         """Callback function for WebSocket data - PARALLEL PROCESSING"""
         try:
-            # Update data points counter
-            self.update_context('total_data_points', 
-                              self.monitoring_context['performance_metrics']['total_data_points'] + 1,
-                              'performance_metrics')
+            self.ticks_received.inc()
             
             if 'token' in message:
                 # Extract token from message
@@ -431,131 +431,163 @@ class ParallelOptionMonitor:
                 raw_ltp = float(message['last_traded_price'])
                 actual_ltp = raw_ltp / 100.0
                 
-                # Find the option using token map
-                option_data = self.token_map.get(token)
-                if option_data:
-                    unique_id = option_data['unique_id']
-                    previous_ltp = self.last_ltp.get(unique_id, 0)
-                    
-                    # Update last LTP
-                    self.last_ltp[unique_id] = actual_ltp
-                    
-                    # Check trading levels in parallel
-                    self.check_trading_levels_parallel(option_data, actual_ltp)
-                    
-                    # Log significant changes
-                    if abs(actual_ltp - previous_ltp) > 0.1:
-                        logging.debug(f"{option_data['stock_name']} {option_data['option_type']} | LTP: ₹{actual_ltp:,.2f}")
+                # Find the option's row in the tick state
+                i = self.tick_state.index.get(token)
+                if i is None:
+                    return
+                
+                # Hand the tick to the single thread that owns the position state
+                if self.tick_batch_window:
+                    self.tick_buffer.append((i, actual_ltp))
+                elif len(self.ws_shards) > 1:
+                    self.data_queue.put((i, actual_ltp))
+                else:
+                    self.process_tick(i, actual_ltp)
                     
         except Exception as e:
             logging.error(f"Error processing WebSocket data: {e}")
 
-    def check_trading_levels_parallel(self, option_data: Dict, current_ltp: float):
-        """Check trading levels and queue alerts for parallel processing"""
-        unique_id = option_data.get('unique_id')
-        trading_levels = option_data.get('trading_levels', {})
+    def process_tick(self, i: int, actual_ltp: float):
+        """Evaluate one tick for option i"""
+        previous_ltp = self.tick_state.ltp[i]
         
-        if not trading_levels:
+        # Update last LTP and check trading levels
+        self.check_trading_levels_parallel(i, actual_ltp)
+        
+        # Log significant changes
+        if abs(actual_ltp - previous_ltp) > 0.1:
+            option = self.tick_state.options[i]
+            logging.debug(f"{option.stock_name} {option.option_type} | LTP: ₹{actual_ltp:,.2f}")
+
+    def start_tick_dispatcher(self):
+        """Evaluate ticks from all shards in one thread, in arrival order"""
+        def tick_dispatcher():
+            while self.is_running:
+                try:
+                    i, actual_ltp = self.data_queue.get(timeout=1)
+                    self.process_tick(i, actual_ltp)
+                except Empty:
+                    continue
+                except Exception as e:
+                    logging.error(f"Tick dispatcher error: {e}")
+        
+        dispatch_thread = threading.Thread(target=tick_dispatcher, name="TickDispatcher", daemon=True)
+        dispatch_thread.start()
+        self.tick_threads.append(dispatch_thread)
+        logging.info("Tick dispatcher started")
+
+    def check_trading_levels_parallel(self, i: int, current_ltp: float):
+        """Advance option i's position state and queue the resulting alert for parallel processing"""
+        alert_type = self.tick_state.advance(i, current_ltp, time.time(), self.alert_cooldown)
+        if alert_type is None:
             return
         
-        buy_entry = trading_levels.get('buy_entry', 0)
-        target = trading_levels.get('target', 0)
-        stoploss = trading_levels.get('stoploss', 0)
-        alert_key = option_data.get('alert_key')
+        alert_data = {
+            'type': alert_type,
+            'option': self.tick_state.options[i],
+            'current_ltp': current_ltp,
+            'timestamp': datetime.now().isoformat()
+        }
+        self.alert_queue.put(alert_data)
         
-        # Check cooldown period
-        current_time = time.time()
-        if current_time - self.last_alert_time.get(alert_key, 0) < self.alert_cooldown:
+        # Update queue size metrics
+        self.max_queue_size.set_max(self.alert_queue.qsize())
+
+    def start_tick_batcher(self):
+        """Evaluate buffered ticks every batch window in a separate thread"""
+        def tick_batcher():
+            while self.is_running:
+                time.sleep(self.tick_batch_window)
+                try:
+                    self.process_tick_batch()
+                except Exception as e:
+                    logging.error(f"Tick batcher error: {e}")
+        
+        batch_thread = threading.Thread(target=tick_batcher, name="TickBatcher", daemon=True)
+        batch_thread.start()
+        self.tick_threads.append(batch_thread)
+        logging.info(f"Tick batcher started ({self.tick_batch_window * 1000:.0f} ms window)")
+
+    def process_tick_batch(self):
+        """Check every level crossing of the buffered ticks at once and queue the alerts"""
+        batch = [self.tick_buffer.popleft() for _ in range(len(self.tick_buffer))]
+        if not batch:
             return
         
-        # Check for BUY ENTRY trigger
-        if (current_ltp >= buy_entry and 
-            unique_id not in self.alerted_entries and
-            unique_id not in self.completed_positions):  # Don't trigger entry if already completed
-            
-            alert_data = {
-                'type': 'entry',
-                'option_data': option_data,
-                'current_ltp': current_ltp,
-                'timestamp': datetime.now().isoformat()
-            }
-            self.alert_queue.put(alert_data)
-            self.last_alert_time[alert_key] = current_time
-            
-            # Update queue size metrics
-            current_queue_size = self.alert_queue.qsize()
-            max_queue_size = self.monitoring_context['performance_metrics']['max_queue_size']
-            if current_queue_size > max_queue_size:
-                self.update_context('max_queue_size', current_queue_size, 'performance_metrics')
-        
-        # Only check target and stoploss if position was entered AND not completed
-        elif (unique_id in self.entered_positions and 
-              unique_id not in self.completed_positions):  # Check if position is still active
-            
-            # MUTUAL EXCLUSION LOGIC: Check if position is already completed
-            if unique_id in self.completed_positions:
-                return  # Position already completed, no further checks
-            
-            # Check for TARGET hit (only if position is active and not completed)
-            if (current_ltp >= target and 
-                unique_id not in self.alerted_targets and
-                unique_id not in self.alerted_stoploss):  # Don't trigger target if stoploss already hit
-                
-                alert_data = {
-                    'type': 'target',
-                    'option_data': option_data,
-                    'current_ltp': current_ltp,
-                    'timestamp': datetime.now().isoformat()
-                }
-                self.alert_queue.put(alert_data)
-                self.last_alert_time[alert_key] = current_time
+        batch_start = time.perf_counter()
+        rows = np.fromiter((row for row, _ in batch), dtype=np.intp, count=len(batch))
+        ltps = np.fromiter((ltp for _, ltp in batch), dtype=np.float64, count=len(batch))
+        crossings = self.tick_state.evaluate_batch(rows, ltps, time.time(), self.alert_cooldown)
+        
+        timestamp = datetime.now().isoformat()
+        for alert_type, (alert_rows, prices) in crossings.items():
+            for i, price in zip(alert_rows.tolist(), prices.tolist()):
+                self.alert_queue.put({
+                    'type': alert_type,
+                    'option': self.tick_state.options[i],
+                    'current_ltp': price,
+                    'timestamp': timestamp
+                })
+        
+        self.max_queue_size.set_max(self.alert_queue.qsize())
+        self.tick_batch_size.observe(len(batch))
+        self.tick_batch_time.observe(time.perf_counter() - batch_start)
+
+    def on_shard_status(self, shard: WebSocketShard):
+        """Callback from a WebSocket shard whenever it opens, errors or closes"""
+        # Shards report from their own threads; count and publish under one lock
+        with self.ws_status_lock:
+            connected = sum(1 for ws_shard in self.ws_shards if ws_shard.is_connected)
+            self.is_ws_connected = connected > 0
+            
+            if connected == len(self.ws_shards):
+                market_status = 'CONNECTED'
+            else:
+                market_status = 'PARTIAL' if connected else 'DISCONNECTED'
+            self.update_context('trading_session', market_status, 'market_status')
+            if shard.is_connected:
+                self.update_context('trading_session', datetime.now().isoformat(), 'last_sync_time')
             
-            # Check for STOPLOSS hit (only if position is active and not completed)
-            elif (current_ltp <= stoploss and 
-                  unique_id not in self.alerted_stoploss and
-                  unique_id not in self.alerted_targets):  # Don't trigger stoploss if target already hit
-                
-                alert_data = {
-                    'type': 'stoploss',
-                    'option_data': option_data,
-                    'current_ltp': current_ltp,
-                    'timestamp': datetime.now().isoformat()
-                }
-                self.alert_queue.put(alert_data)
-                self.last_alert_time[alert_key] = current_time
-
-    def on_open(self, wsapp):
-        """Callback function for WebSocket open"""
-        logging.info("WebSocket connection opened successfully")
-        self.is_ws_connected = True
+            report_start = market_status == 'CONNECTED' and not self.ws_start_reported
+            if report_start:
+                self.ws_start_reported = True
+        
+        if shard.is_connected:
+            self.on_open(shard, connected)
+        elif shard.status == 'FAILED':
+            send_telegram_message_admin(f"❌ *WebSocket shard {shard.shard_id + 1} failed:* {len(shard.tokens)} tokens "
+                                        f"no longer monitored ({connected}/{len(self.ws_shards)} connected)\n"
+                                        f"Last error: {shard.last_error or 'N/A'}")
+        
+        if report_start:
+            self.send_monitoring_started()
+
+    def on_open(self, shard: WebSocketShard, connected: int):
+        """A shard connected and subscribed"""
+        logging.info(f"WebSocket shard {shard.shard_id} opened ({connected}/{len(self.ws_shards)} connected)")
         
         # Update context with connection info
         self.update_context('webSocket_reconnects', 
                           self.monitoring_context['webSocket_reconnects'] + 1)
-        self.update_context('trading_session', {
-            **self.monitoring_context['trading_session'],
-            'last_sync_time': datetime.now().isoformat(),
-            'market_status': 'CONNECTED'
-        })
-        
-        # Start alert workers when WebSocket connects
-        self.start_alert_workers()
-        
+
+    def send_monitoring_started(self):
+        """Tell the admin that every WebSocket shard is connected"""
         connection_msg = f"""
 *PARALLEL MONITORING STARTED*
 
 *Monitoring Status:* ACTIVE
+*WebSocket Connections:* {len(self.ws_shards)} ({sum(len(shard.tokens) for shard in self.ws_shards)} tokens)
 *Options Tracked:* {len(self.monitored_options)}/{len(self.monitored_options)}
 *Alert Workers:* {self.max_alert_workers}
 *Queue Size:* {self.alert_queue.qsize()}
 *Messages Sent:* {self.message_count}
 
 *Alerts Triggered:*
-   • Entries: {len(self.alerted_entries)}
-   • Targets: {len(self.alerted_targets)}
-   • Stoploss: {len(self.alerted_stoploss)}
+   • Entries: {self.tick_state.count(*TRIGGERED_POSITION_STATES)}
+   • Targets: {self.tick_state.count(POSITION_TARGET)}
+   • Stoploss: {self.tick_state.count(POSITION_STOPLOSS)}
 
-*Active Positions:* {len(self.entered_positions)}
+*Active Positions:* {self.tick_state.count(*OPEN_POSITION_STATES)}
 
 *Report Time:* {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 
@@ -563,26 +595,8 @@ class ParallelOptionMonitor:
 """
         send_telegram_message_admin(connection_msg)
 
-    def on_error(self, wsapp, error):
-        """Callback function for WebSocket error"""
-        logging.error(f"WebSocket error: {error}")
-        self.is_ws_connected = False
-        self.update_context('trading_session', {
-            **self.monitoring_context['trading_session'],
-            'market_status': 'DISCONNECTED'
-        })
-
-    def on_close(self, wsapp):
-        """Callback function for WebSocket close"""
-        logging.warning("WebSocket connection closed")
-        self.is_ws_connected = False
-        self.update_context('trading_session', {
-            **self.monitoring_context['trading_session'],
-            'market_status': 'CLOSED'
-        })
-
     def start_websocket_monitoring(self):
-        """Start WebSocket V2 monitoring for real-time data"""
+        """Start sharded WebSocket V2 monitoring for real-time data"""
         try:
             # Get feed token and other required parameters
             feed_token = self.connect_object.smart_api.getfeedToken()
@@ -599,66 +613,37 @@ class ParallelOptionMonitor:
                 logging.error("Could not get JWT token")
                 return False
             
-            # Prepare token list in EXACT format expected by SmartAPI
-            nfo_tokens = []
-            for token in self.token_map.keys():
-                # Just collect the numeric tokens
-                nfo_tokens.append(str(token))
-                
-                if len(nfo_tokens) >= self.max_ws_tokens:
-                    logging.warning(f"Reached maximum token limit ({self.max_ws_tokens})")
-                    break
-            
-            # Format for SmartWebSocketV2
-            token_list = [
-                {
-                    "exchangeType": 2,  # 2 = NFO, 1 = NSE, 13 = BSE
-                    "tokens": nfo_tokens
-                }
+            # Split tokens across as many connections as the account allows
+            token_shards, dropped = partition_tokens([str(token) for token in self.token_map.keys()])
+            if dropped:
+                logging.error(f"⚠️ {len(dropped)} tokens exceed the WebSocket capacity and will not be monitored")
+                send_telegram_message_admin(f"⚠️ *{len(dropped)} option tokens not monitored* (WebSocket capacity reached)")
+            
+            self.ws_start_reported = False
+            self.ws_shards = [
+                WebSocketShard(
+                    shard_id=shard_id,
+                    tokens=tokens,
+                    auth_token=jwt_token,
+                    api_key=os.getenv("ANGEL_API_KEY"),
+                    client_code=client_code,
+                    feed_token=feed_token,
+                    on_tick=self.on_data,
+                    on_status=self.on_shard_status
+                )
+                for shard_id, tokens in enumerate(token_shards)
             ]
             
-            logging.info(f"Subscribing to {len(nfo_tokens)} NFO tokens via WebSocket")
-            
-            # WebSocket configuration
-            sws = SmartWebSocketV2(
-                auth_token=jwt_token,
-                api_key=os.getenv("ANGEL_API_KEY"),
-                client_code=client_code,
-                feed_token=feed_token
-            )
-            
-            self.web_socket = sws
-            
-            # Assign callbacks
-            sws.on_open = self.on_open
-            sws.on_data = self.on_data
-            sws.on_error = self.on_error
-            sws.on_close = self.on_close
-            
-            # Start WebSocket thread
-            self.ws_thread = threading.Thread(
-                target=sws.connect,
-                daemon=True
-            )
-            
-            self.ws_thread.start()
+            # Several receive threads need one dispatcher to keep a single state writer
+            if len(self.ws_shards) > 1 and not self.tick_batch_window:
+                self.start_tick_dispatcher()
             
-            # Wait for connection to establish
-            time.sleep(3)
+            # Each shard connects in its own thread and subscribes once open
+            for shard in self.ws_shards:
+                shard.start()
             
-            # Subscribe with proper parameters
-            if self.is_ws_connected:
-                try:
-                    # SmartWebSocketV2.subscribe(correlation_id, mode, token_list)
-                    # mode: 1 = LTP, 2 = Quote, 3 = Snap Quote
-                    result = sws.subscribe(self.correlation_id, 1, token_list)
-                    logging.info(f"Subscription successful: {result}")
-                    
-                except Exception as subscribe_error:
-                    logging.error(f"Subscription failed: {subscribe_error}")
-                    # Even if subscription fails, we might still get data
-                    # if the connection is established
-                    
+            logging.info(f"Subscribing to {sum(len(tokens) for tokens in token_shards)} NFO tokens "
+                         f"via {len(self.ws_shards)} WebSocket connection(s)")
             logging.info("WebSocket monitoring started")
             
             return True
@@ -692,10 +677,17 @@ class ParallelOptionMonitor:
 
     def send_health_report(self):
         """Send enhanced health report with context information"""
-        active_options = sum(1 for ltp in self.last_ltp.values() if ltp > 0)
+        active_options = int(np.count_nonzero(self.tick_state.ltp > 0))
         queue_size = self.alert_queue.qsize()
         
         context_summary = self.get_context_summary()
+        positions = self.get_position_summary()
+        metrics = self.get_metrics()
+        alert_time = metrics['histograms']['alert_processing_seconds']
+        shard_lines = "\n".join(
+            f"   • Shard {shard['shard'] + 1}: {shard['status']} ({shard['tokens']} tokens, {shard['ticks']} ticks, {shard['errors']} errors)"
+            for shard in metrics['websocket_shards']
+        )
         
         message = f"""
 *ENHANCED SYSTEM HEALTH REPORT*
@@ -708,24 +700,25 @@ class ParallelOptionMonitor:
 *Messages Sent:* {self.message_count}
 
 *Performance Metrics:*
-   • Avg Alert Time: {self.monitoring_context['performance_metrics']['avg_alert_processing_time']:.3f}s
-   • Max Queue Size: {self.monitoring_context['performance_metrics']['max_queue_size']}
-   • Data Points: {self.monitoring_context['performance_metrics']['total_data_points']}
+   • Avg Alert Time: {alert_time['mean']:.3f}s (p95 ≤ {alert_time['p95'] or '>10'}s)
+   • Max Queue Size: {metrics['gauges']['max_alert_queue_size']}
+   • Data Points: {metrics['counters']['ticks_received']}
 
 *Position Management:*
-   • Active Positions: {self.monitoring_context['position_management']['active_positions']}
-   • Completed Positions: {self.monitoring_context['position_management']['completed_positions']}
-   • Profitable Exits: {self.monitoring_context['position_management']['profitable_exits']}
-   • Loss Exits: {self.monitoring_context['position_management']['loss_exits']}
+   • Active Positions: {positions['active_positions']}
+   • Completed Positions: {positions['completed_positions']}
+   • Profitable Exits: {positions['profitable_exits']}
+   • Loss Exits: {positions['loss_exits']}
 
 *Trading Session:*
-   • WebSocket: {'CONNECTED' if self.is_ws_connected else 'DISCONNECTED'}
+   • WebSocket: {self.monitoring_context['trading_session']['market_status']}
+{shard_lines}
    • Last Sync: {self.monitoring_context['trading_session']['last_sync_time'] or 'N/A'}
 
 *Alerts Triggered:*
-   • Entries: {len(self.alerted_entries)}
-   • Targets: {len(self.alerted_targets)}
-   • Stoploss: {len(self.alerted_stoploss)}
+   • Entries: {self.tick_state.count(*TRIGGERED_POSITION_STATES)}
+   • Targets: {self.tick_state.count(POSITION_TARGET)}
+   • Stoploss: {self.tick_state.count(POSITION_STOPLOSS)}
 
 *Report Time:* {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
         """
@@ -739,11 +732,13 @@ class ParallelOptionMonitor:
             snapshot = {
                 'timestamp': datetime.now().isoformat(),
                 'context': self.monitoring_context,
-                'active_positions': list(self.entered_positions),
-                'completed_positions': list(self.completed_positions),
-                'alerted_entries': list(self.alerted_entries),
-                'alerted_targets': list(self.alerted_targets),
-                'alerted_stoploss': list(self.alerted_stoploss)
+                'metrics': self.get_metrics(),
+                'position_management': self.get_position_summary(),
+                'active_positions': self.tick_state.unique_ids(*OPEN_POSITION_STATES),
+                'completed_positions': self.tick_state.unique_ids(*CLOSED_POSITION_STATES),
+                'alerted_entries': self.tick_state.unique_ids(*TRIGGERED_POSITION_STATES),
+                'alerted_targets': self.tick_state.unique_ids(POSITION_TARGET),
+                'alerted_stoploss': self.tick_state.unique_ids(POSITION_STOPLOSS)
             }
             
             filename = f"context_snapshot_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
@@ -760,6 +755,11 @@ class ParallelOptionMonitor:
             logging.error("Failed to create session. Cannot start monitoring.")
             return
         
+        # Start alert workers and the batcher before ticks can arrive
+        self.start_alert_workers()
+        if self.tick_batch_window:
+            self.start_tick_batcher()
+        
         # Start WebSocket monitoring
         ws_success = self.start_websocket_monitoring()
         
@@ -772,7 +772,9 @@ class ParallelOptionMonitor:
         logging.info(f"Monitoring {len(self.monitored_options)} options")
         logging.info(f"Alert Workers: {self.max_alert_workers}")
         logging.info(f"WebSocket Tokens: {len(self.token_map)}")
+        logging.info(f"WebSocket Connections: {len(self.ws_shards)}")
         logging.info(f"Mode: REAL-TIME PARALLEL PROCESSING")
+        logging.info(f"Tick Evaluation: {f'MICRO-BATCH ({self.tick_batch_window * 1000:.0f} ms)' if self.tick_batch_window else 'PER TICK'}")
         logging.info("=" * 80)
         
         # Start health monitor
@@ -788,14 +790,30 @@ class ParallelOptionMonitor:
 
     def stop_monitoring(self):
         """Stop all monitoring activities"""
-        self.is_running = False
-        
-        # Stop WebSocket
-        if self.web_socket:
-            self.web_socket.close_connection()
+        # Stop WebSocket shards
+        for shard in self.ws_shards:
+            shard.close()
         
-        # Wait for alert queue to empty
-        self.alert_queue.join()
+        # Stop the tick threads, then evaluate the ticks they left behind on this thread,
+        # which is now the only writer of the position state
+        self.is_running = False
+        for thread in self.tick_threads:
+            thread.join()
+        self.tick_threads = []
+        while True:
+            try:
+                i, actual_ltp = self.data_queue.get_nowait()
+            except Empty:
+                break
+            self.process_tick(i, actual_ltp)
+        self.process_tick_batch()
+        
+        # No more alerts can be queued; one sentinel per worker behind them, then wait for them to be sent
+        for _ in self.alert_threads:
+            self.alert_queue.put(None)
+        for thread in self.alert_threads:
+            thread.join()
+        self.alert_threads = []
         
         # Save final context snapshot
         # self.save_context_snapshot()
@@ -821,12 +839,12 @@ class ParallelOptionMonitor:
         logging.info(f"Found latest analysis file: {latest_file}")
         return latest_file
 
-def main():
+def main(monitor: Optional[ParallelOptionMonitor] = None):
     """Main function to start parallel option monitoring"""
     logging.info("PARALLEL LIVE OPTION MONITORING SYSTEM")
     logging.info("=" * 80)
-    # Initialize monitor
-    monitor = ParallelOptionMonitor()
+    # Initialize monitor unless the caller owns one
+    monitor = monitor or ParallelOptionMonitor()
     # Find latest analysis file
     # latest_file = monitor.find_latest_analysis_file()
     # if not latest_file:
@@ -6,9 +6,20 @@ from dotenv import load_dotenv
 import json
 from datetime import datetime, timedelta
 import pandas as pd
-from src.utils.get_chartlink_data import fetch_chartink_data
+from src.utils.get_chartlink_data import ChartinkClient, load_scan_clauses
 from src.utils.search_your_stocks import get_stock_details
-import time,logging
+from src.utils.option_chain import OptionChainIndex
+from src.utils.rate_limiter import rate_limited_call
+from src.utils.bulk_quotes import fetch_bulk_quotes
+from src.utils.trading_levels import option_breakout_levels, levels_row
+from src.utils.stage_timer import StageTimer
+from src.utils.analysis_artifact import write_analysis_artifact, artifact_path_for
+from src.utils.analysis_history import AnalysisHistory
+from src.utils.candle_store import CandleStore
+from src.utils.local_screener import LocalScreener
+from src.utils.request_cache import RequestCache, memoized_call
+import logging
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from src.utils.angel_one_connect import AngelOneConnect
 from src.utils.send_message import send_telegram_message
 
@@ -25,13 +36,34 @@ logging.basicConfig(
     ]
 )
 
+# Inside-bar screens on stocks above ₹1000: red (close < open) and green (close > open)
+DEFAULT_SCAN_CLAUSES = [
+    "( {33489} ( daily high < 1 day ago high and daily low > 1 day ago low and daily close < daily open and daily close > 1000 ) )",
+    "( {33489} ( daily high < 1 day ago high and daily low > 1 day ago low and daily close > daily open and daily close > 1000 ) )",
+]
+
+ANALYSIS_FILE = "stock_interaday_json/stock_interaday_analysis.json"
+UNIVERSE_ANALYSIS_FILE = "stock_interaday_json/fno_universe_analysis.json"
+TELEGRAM_MESSAGE_LIMIT = 4096  # Characters per Telegram message
+
 
 class UpdateStockOptData:
     def __init__(self):
         self.smart_api = None
         self.min_price = 1000  # Filter stocks above ₹1000
+        self._option_chain_index = None
+        self._option_chain_source = None
+        self.max_workers = int(os.getenv('ANALYSIS_MAX_WORKERS', 4))  # Stocks analyzed concurrently
+        self._fetch_executor = None  # Shared pool for per-option fetches during a run
+        self.candle_store = CandleStore.get_instance()
+        self.scan_clauses = load_scan_clauses(DEFAULT_SCAN_CLAUSES)
+        # Breakout levels: entry above option day high, target/stoploss as fractions of it
+        self.level_params = {'entry_offset': 0.01, 'target_pct': 0.05, 'stoploss_pct': 0.05}
+        self.incremental = os.getenv('ANALYSIS_INCREMENTAL', '1') == '1'  # Carry forward unchanged results
+        self.universe_time_budget = float(os.getenv('UNIVERSE_TIME_BUDGET', 110))  # Seconds per full F&O scan
         self.connect_instance = AngelOneConnect()
         self.smart_api = self.connect_instance.connect()
+        self.local_screener = LocalScreener(self.smart_api, self.candle_store)
         
     
     def get_historical_data(self, symbol_token, exchange="NSE"):
@@ -40,26 +72,17 @@ class UpdateStockOptData:
             # Use current date
             end_date = datetime.now()
             start_date = end_date - timedelta(days=7)  # Get last 7 days data
-            
-            historicParam = {
-                "exchange": exchange,
-                "symboltoken": symbol_token,
-                "interval": "ONE_DAY",
-                "fromdate": start_date.strftime('%Y-%m-%d 09:00'),
-                "todate": end_date.strftime('%Y-%m-%d 15:30')
-            }
-            
+
             logging.info(f"   📅 Fetching OHLC data for {start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}")
-            
-            # Add delay to avoid rate limiting
-            time.sleep(1)
-            
-            historical_data = self.smart_api.getCandleData(historicParam)
-            
-            if historical_data['status'] and historical_data['data']:
+
+            # Served from the local candle store; only missing days hit the broker
+            candles = self.candle_store.get_daily_candles(self.smart_api, exchange, symbol_token, start_date, end_date)
+
+            if candles:
                 # Get the latest candle (today's data)
-                latest_candle = historical_data['data'][-1]
+                latest_candle = candles[-1]
                 return {
+                    'date': str(latest_candle[0])[:10],
                     'open': float(latest_candle[1]),
                     'high': float(latest_candle[2]),
                     'low': float(latest_candle[3]),
@@ -101,60 +124,41 @@ class UpdateStockOptData:
     def calculate_trading_levels(self, option_day_high, current_ltp):
         """Calculate trading levels based on option day high"""
         try:
-            # Buy Entry: Above option day high
-            buy_entry = option_day_high + 0.01  # Just above day high
-            
-            # Target: Option day high + 5%
-            target = option_day_high * 1.05
-            
-            # Stoploss: Option day high - 5%
-            stoploss = option_day_high * 0.95
-            
-            # Calculate risk-reward ratio
-            risk = buy_entry - stoploss
-            reward = target - buy_entry
-            risk_reward_ratio = reward / risk if risk > 0 else 0
-            
-            return {
-                'buy_entry': round(buy_entry, 2),
-                'target': round(target, 2),
-                'stoploss': round(stoploss, 2),
-                'risk_reward_ratio': round(risk_reward_ratio, 2),
-                'upside_potential': round(((target - current_ltp) / current_ltp) * 100, 2) if current_ltp else 0,
-                'downside_risk': round(((current_ltp - stoploss) / current_ltp) * 100, 2) if current_ltp else 0
-            }
+            # Buy entry just above the option day high, target/stoploss at +/-5%
+            return levels_row(self.calculate_trading_levels_batch([option_day_high], [current_ltp or 0]), 0)
             
         except Exception as e:
             logging.error(f"   ❌ Error calculating trading levels: {e}")
             return None
 
+    def calculate_trading_levels_batch(self, option_day_highs, current_ltps):
+        """Trading levels for many options at once, as arrays per level"""
+        return option_breakout_levels(option_day_highs, current_ltps, **self.level_params)
+
+    def trading_levels_for(self, market_data):
+        """Trading levels per option token for {token: (ltp, ohlc)} market data"""
+        tokens = [token for token, (_, ohlc) in market_data.items() if ohlc and ohlc['day_high'] > 0]
+        if not tokens:
+            return {}
+        levels = self.calculate_trading_levels_batch(
+            [market_data[token][1]['day_high'] for token in tokens],
+            [float((market_data[token][0] or {}).get('ltp', 0)) for token in tokens]
+        )
+        return {token: levels_row(levels, i) for i, token in enumerate(tokens)}
+
+    def get_option_chain_index(self, input_data):
+        """Get the option chain index for the input data, building it once"""
+        options = input_data.get('options', [])
+        if self._option_chain_index is None or self._option_chain_source is not options:
+            self._option_chain_index = OptionChainIndex(options)
+            self._option_chain_source = options
+        return self._option_chain_index
+
     def get_option_chain_from_input(self, symbol, input_data):
         """Get option chain from the provided input data"""
         try:
-            options_data = []
-            
-            # Filter options for the given symbol from input data
-            for option in input_data.get('options', []):
-                option_symbol = option.get('symbol', '')
-                option_name = option.get('name', '')
-                
-                # Check if this option belongs to our stock symbol
-                if symbol in option_symbol or symbol == option_name:
-                    # Parse strike price correctly (divide by 100 as it's stored with 2 decimals)
-                    strike_price = float(option.get('strike', 0)) / 100
-                    
-                    # Determine option type from symbol
-                    option_type=option_type = option_symbol[-2:] if option_symbol[-2:] in ("CE", "PE") else None
-
-                    if option_type!=None:
-                        options_data.append({
-                            'symbol': option_symbol,
-                            'token': option.get('token'),
-                            'strike': strike_price,
-                            'type': option_type,
-                            'expiry': option.get('expiry', ''),
-                            'lotsize': option.get('lotsize', 1)
-                        })
+            # Exact underlying match, so 'M&M' no longer picks up 'M&MFIN' contracts
+            options_data = self.get_option_chain_index(input_data).contracts(symbol)
             
             logging.info(f"   📊 Found {len(options_data)} options contracts for {symbol}")
             return options_data
@@ -163,107 +167,89 @@ class UpdateStockOptData:
             logging.error(f"   ❌ Error getting option chain from input: {e}")
             return None
         
-    def filter_current_month_options(self, options):
-        """
-        Filter options to keep only current month expiry contracts
-        More robust version using datetime parsing
-        """
-        try:
-            current_date = datetime.now()
-            current_month = current_date.month
-            current_year = current_date.year
-            
-            current_month_options = []
-            expiry_count = {}
-            
-            for option in options:
-                expiry_str = option.get('expiry', '')
-                
-                try:
-                    # Parse expiry string to datetime (format: '28OCT2025')
-                    expiry_date = datetime.strptime(expiry_str, '%d%b%Y')
-                    
-                    # Count expiries for statistics
-                    expiry_month_year = expiry_date.strftime('%b-%Y')
-                    expiry_count[expiry_month_year] = expiry_count.get(expiry_month_year, 0) + 1
-                    
-                    # Check if expiry is in current month and year
-                    if expiry_date.month == current_month and expiry_date.year == current_year:
-                        current_month_options.append(option)
-                        
-                except ValueError:
-                    logging.info(f"⚠️  Could not parse expiry: {expiry_str}")
-                    continue
-            
-            # logging.info expiry statistics
-            logging.info(f"   📅 Expiry distribution:")
-            for expiry, count in expiry_count.items():
-                status = "✅ CURRENT" if expiry == current_date.strftime('%b-%Y') else "📅 FUTURE"
-                logging.info(f"      {expiry}: {count} options {status}")
-            
-            logging.info(f"   ✅ Current month options filtered: {len(current_month_options)}")
-            return current_month_options
-            
-        except Exception as e:
-            logging.error(f"❌ Error in current month filtering: {e}")
-            return options  # Return original list if error occurs
-
-
-    def select_best_strikes(self, options_data, day_high):
+    def select_best_strikes(self, symbol, day_high, input_data, alternatives=3):
         """Select best CE and PE strikes based on day high"""
         try:
-            # Separate CE and PE options
-            ce_options = [opt for opt in options_data if opt['type'] == 'CE']
-            pe_options = [opt for opt in options_data if opt['type'] == 'PE']
-
-            ce_options = self.filter_current_month_options(ce_options)
-            pe_options = self.filter_current_month_options(pe_options)
+            index = self.get_option_chain_index(input_data)
+            expiry = index.current_month_expiry(symbol)
+            ce_side = index.get_side(symbol, expiry, 'CE') if expiry else None
+            pe_side = index.get_side(symbol, expiry, 'PE') if expiry else None
 
-            logging.info(f"   📈 {len(ce_options)} CE options, {len(pe_options)} PE options found")
+            logging.info(f"   📅 Current month expiry: {expiry or 'N/A'}")
+            logging.info(f"   📈 {len(ce_side or [])} CE options, {len(pe_side or [])} PE options found")
             logging.info(f"   Stock Day High: ₹{day_high:,.2f}")
             
-            # For CE: select strike just below day high
-            valid_ce = [opt for opt in ce_options if opt['strike'] < day_high]
-            if valid_ce:
-                # Sort by proximity to day high (closest first)
-                valid_ce.sort(key=lambda x: abs(x['strike'] - day_high))
-                best_ce = valid_ce[0]  # Closest strike below day high
+            # CE: strike just below day high, PE: strike just above day high
+            best_ce, best_pe, _, pe_options = index.select_strikes(symbol, day_high, expiry, alternatives)
+
+            if best_ce:
                 logging.info(f"   ✅ Best CE: ₹{best_ce['strike']:,.2f} (Difference: -₹{day_high - best_ce['strike']:,.2f})")
             else:
-                best_ce = None
                 logging.error(f"   ❌ No CE strikes below day high")
             
-            # For PE: select strike just above day high
-            valid_pe = [opt for opt in pe_options if opt['strike'] > day_high]
-            if valid_pe:
-                # Sort by proximity to day high (closest first)
-                valid_pe.sort(key=lambda x: abs(x['strike'] - day_high))
-                best_pe = valid_pe[0]  # Closest strike above day high
+            if best_pe:
                 logging.info(f"   ✅ Best PE: ₹{best_pe['strike']:,.2f} (Difference: +₹{best_pe['strike'] - day_high:,.2f})")
             else:
-                best_pe = None
                 logging.error(f"   ❌ No PE strikes above day high")
             
-            return best_ce, best_pe, valid_pe
+            return best_ce, best_pe, pe_options
             
         except Exception as e:
             logging.error(f"   ❌ Error selecting best strikes: {e}")
             return None, None, []
 
+    def select_best_strikes_batch(self, requests, input_data, alternatives=3):
+        """Select strikes for a batch of (symbol, day_high) pairs in one call"""
+        try:
+            return self.get_option_chain_index(input_data).select_strikes_batch(requests, alternatives)
+        except Exception as e:
+            logging.error(f"❌ Error selecting strikes for batch: {e}")
+            return {}
+
+    def attach_best_strikes(self, contexts, input_data, alternatives=3):
+        """Fill best_ce, best_pe and pe_options of prepared contexts in one batch"""
+        symbols = [context['stock'].get('symbol', '').replace('-EQ', '') for context in contexts]
+        selected = self.select_best_strikes_batch(
+            [(symbol, context['historical']['high']) for symbol, context in zip(symbols, contexts)],
+            input_data, alternatives
+        )
+        for symbol, context in zip(symbols, contexts):
+            best_ce, best_pe, _, pe_options = selected.get(symbol, (None, None, [], []))
+            if not best_ce:
+                logging.error(f"   ❌ {symbol}: no CE strikes below day high")
+            if not best_pe:
+                logging.error(f"   ❌ {symbol}: no PE strikes above day high")
+            context.update(best_ce=best_ce, best_pe=best_pe, pe_options=pe_options)
+        return contexts
+
     def analyze_stock_with_options(self, stock_data, input_data):
         """Complete analysis for a single stock"""
+        context = self.prepare_stock_analysis(stock_data, input_data)
+        if not context:
+            return None
+        
+        # Fetch LTP and OHLC for both legs concurrently
+        market_data = self.fetch_option_market_data([context['best_ce'], context['best_pe']])
+        return self.complete_stock_analysis(context, market_data)
+
+    def prepare_stock_analysis(self, stock_data, input_data, historical_data=None, min_price=None,
+                               select_strikes=True):
+        """Fetch stock OHLC, apply the price filter and select strikes
+
+        historical_data skips the candle fetch when the OHLC is already known;
+        min_price overrides self.min_price (0 disables the filter). With
+        select_strikes=False the legs are left empty for attach_best_strikes.
+        """
+        min_price = self.min_price if min_price is None else min_price
         symbol = stock_data.get('symbol', '').replace('-EQ', '')
         name = stock_data.get('name')
         token = stock_data.get('token')
         
         logging.info(f"\n🔍 Analyzing {name} ({symbol}) - Token: {token}")
         logging.info("=" * 60)
-        
-        # Add delay between API calls
-        time.sleep(1)
 
         # Get historical OHLC data for stock
-        historical_data = self.get_historical_data(token)
+        historical_data = historical_data or self.get_historical_data(token)
         
         if not historical_data:
             logging.error(f"❌ Could not fetch OHLC data for {symbol}")
@@ -276,11 +262,11 @@ class UpdateStockOptData:
         volume = historical_data['volume']
         
         # Check if stock price is above ₹1000
-        if day_close < self.min_price:
-            logging.error(f"❌ Stock price ₹{day_close:,.2f} is below ₹{self.min_price:,} filter")
+        if day_close < min_price:
+            logging.error(f"❌ Stock price ₹{day_close:,.2f} is below ₹{min_price:,} filter")
             return None
         
-        logging.info(f"✅ Stock meets price filter: ₹{day_close:,.2f} > ₹{self.min_price:,}")
+        logging.info(f"✅ Stock meets price filter: ₹{day_close:,.2f} > ₹{min_price:,}")
         
         logging.info(f"📊 STOCK OHLC Data:")
         logging.info(f"   Open:   ₹{day_open:,.2f}")
@@ -290,14 +276,36 @@ class UpdateStockOptData:
         logging.info(f"   Volume: {volume:,.0f}")
         
         # Get option chain from input data
-        options = self.get_option_chain_from_input(symbol, input_data)
-        
-        if not options:
+        if not self.get_option_chain_index(input_data).get_chain(symbol):
             logging.error(f"❌ No options found for {symbol}")
             return None
         
         # Select best strikes based on day high
-        best_ce, best_pe, pe_options = self.select_best_strikes(options, day_high)
+        best_ce, best_pe, pe_options = (
+            self.select_best_strikes(symbol, day_high, input_data) if select_strikes else (None, None, [])
+        )
+        
+        return {
+            'stock': stock_data,
+            'historical': historical_data,
+            'best_ce': best_ce,
+            'best_pe': best_pe,
+            'pe_options': pe_options
+        }
+
+    def complete_stock_analysis(self, context, market_data, levels_by_token=None):
+        """Attach option LTP, OHLC and trading levels given [(ce_ltp, ce_ohlc), (pe_ltp, pe_ohlc)]
+
+        levels_by_token holds levels already computed in a batch; missing
+        tokens are computed here.
+        """
+        levels_by_token = levels_by_token or {}
+        stock_data = context['stock']
+        historical_data = context['historical']
+        best_ce = context['best_ce']
+        best_pe = context['best_pe']
+        pe_options = context['pe_options']
+        day_high = historical_data['high']
         
         logging.info(f"\n🎯 OPTION STRATEGY (Based on Stock Day High: ₹{day_high:,.2f})")
         logging.info("-" * 50)
@@ -322,8 +330,7 @@ class UpdateStockOptData:
             logging.info(f"   Difference: -₹{day_high - best_ce['strike']:,.2f} from Stock Day High")
             
             # Get LTP and OHLC for CE option
-            ce_ltp = self.get_ltp_data(best_ce)
-            ce_ohlc = self.get_option_day_high_low(best_ce)
+            ce_ltp, ce_ohlc = market_data[0]
             
             if ce_ltp:
                 current_ltp = float(ce_ltp.get('ltp', 0))
@@ -339,7 +346,8 @@ class UpdateStockOptData:
                 
                 # Calculate trading levels for CE
                 if ce_ohlc['day_high'] > 0:
-                    trading_levels = self.calculate_trading_levels(ce_ohlc['day_high'], best_ce.get('ltp', 0))
+                    trading_levels = levels_by_token.get(best_ce['token']) or \
+                        self.calculate_trading_levels(ce_ohlc['day_high'], best_ce.get('ltp', 0))
                     if trading_levels:
                         logging.info(f"\n   📊 TRADING STRATEGY FOR CE:")
                         logging.info(f"   🟢 Buy Entry:    ₹{trading_levels['buy_entry']:,.2f} (Above Option Day High)")
@@ -365,8 +373,7 @@ class UpdateStockOptData:
             logging.info(f"   Difference: +₹{best_pe['strike'] - day_high:,.2f} from Stock Day High")
             
             # Get LTP and OHLC for PE option
-            pe_ltp = self.get_ltp_data(best_pe)
-            pe_ohlc = self.get_option_day_high_low(best_pe)
+            pe_ltp, pe_ohlc = market_data[1]
             
             if pe_ltp:
                 current_ltp = float(pe_ltp.get('ltp', 0))
@@ -382,7 +389,8 @@ class UpdateStockOptData:
                 
                 # Calculate trading levels for PE
                 if pe_ohlc['day_high'] > 0:
-                    trading_levels = self.calculate_trading_levels(pe_ohlc['day_high'], best_pe.get('ltp', 0))
+                    trading_levels = levels_by_token.get(best_pe['token']) or \
+                        self.calculate_trading_levels(pe_ohlc['day_high'], best_pe.get('ltp', 0))
                     if trading_levels:
                         logging.info(f"\n   📊 TRADING STRATEGY FOR PE:")
                         logging.info(f"   🟢 Buy Entry:    ₹{trading_levels['buy_entry']:,.2f} (Above Option Day High)")
@@ -405,12 +413,134 @@ class UpdateStockOptData:
         
         return result_data
     
-    def process_stocks_list(self, input_data):
-        """Process list of stocks from input data"""
+    def fetch_option_market_data(self, options, timer=None):
+        """Fetch (LTP, OHLC) for each option, concurrently when a run pool is active
+
+        With a timer, legs still pending at its deadline come back as (None, None).
+        """
+        if self._fetch_executor is None:
+            return [
+                (self.get_ltp_data(option), self.get_option_day_high_low(option)) if option else (None, None)
+                for option in options
+            ]
+        
+        futures = [
+            (self._fetch_executor.submit(self.get_ltp_data, option),
+             self._fetch_executor.submit(self.get_option_day_high_low, option)) if option else None
+            for option in options
+        ]
+        market_data = []
+        for pair in futures:
+            try:
+                market_data.append(tuple(future.result(timer.remaining() if timer else None) for future in pair)
+                                   if pair else (None, None))
+            except FutureTimeoutError:
+                market_data.append((None, None))
+        return market_data
+
+    def fetch_bulk_stock_ohlc(self, stocks, timer=None):
+        """Today's OHLC per stock token from FULL-mode bulk quotes, in get_historical_data format"""
+        quotes = fetch_bulk_quotes(self.smart_api, "NSE", [stock['token'] for stock in stocks], mode="FULL", timer=timer)
+        
+        stock_ohlc = {}
+        for token, quote in quotes.items():
+            if not quote.get('high'):
+                continue
+            try:
+                quote_date = datetime.strptime(quote.get('exchFeedTime', ''), '%d-%b-%Y %H:%M:%S').date()
+            except ValueError:
+                quote_date = datetime.now().date()
+            # After the close the LTP is the day's closing trade
+            stock_ohlc[token] = {
+                'date': quote_date.isoformat(),
+                'open': float(quote['open']),
+                'high': float(quote['high']),
+                'low': float(quote['low']),
+                'close': float(quote['ltp']),
+                'volume': float(quote.get('tradeVolume', 0))
+            }
+        return stock_ohlc
+
+    def fetch_bulk_option_market_data(self, options, timer=None):
+        """Fetch (LTP, OHLC) per option token via bulk quotes, falling back to candles
+
+        Bulk requests and candle fallbacks stop once the timer's deadline has passed.
+        """
+        options = [option for option in options if option]
+        quotes = fetch_bulk_quotes(self.smart_api, "NFO", [option['token'] for option in options], timer=timer)
+        
+        market_data = {}
+        fallback = []
+        for option in options:
+            quote = quotes.get(str(option['token']))
+            if not quote or not quote.get('high'):
+                fallback.append(option)
+                continue
+            # In OHLC mode 'close' is the previous session's close; after market
+            # hours the LTP is today's closing trade, matching the daily candle
+            market_data[option['token']] = (
+                {'ltp': quote['ltp']},
+                {
+                    'day_high': float(quote['high']),
+                    'day_low': float(quote['low']),
+                    'day_open': float(quote['open']),
+                    'day_close': float(quote['ltp'])
+                }
+            )
+        
+        if fallback and timer and timer.expired():
+            logging.warning(f"   ⏰ Time budget spent, skipping candle fallback for {len(fallback)} options")
+        elif fallback:
+            logging.info(f"   🔁 Falling back to candles for {len(fallback)} options")
+            for option, data in zip(fallback, self.fetch_option_market_data(fallback, timer)):
+                market_data[option['token']] = data
+        
+        return market_data
+
+    def load_previous_results(self, filename=ANALYSIS_FILE):
+        """Previous run's results keyed by stock token, empty if there are none"""
+        try:
+            with open(filename) as f:
+                previous = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return {str(result['stock'].get('token')): result for result in previous.get('results', [])}
+
+    def reusable_result(self, context, previous_results):
+        """Previous result for this stock if its inputs did not change
+
+        Reused only when the stock candle (same day and values) and the
+        selected CE/PE tokens match and every leg has its trading levels.
+        """
+        previous = previous_results.get(str(context['stock'].get('token')))
+        if not previous or previous.get('historical') != context['historical']:
+            return None
+        
+        for side, option in (('ce', context['best_ce']), ('pe', context['best_pe'])):
+            previous_option = previous.get('options', {}).get(side)
+            if not option and not previous_option:
+                continue
+            if not option or not previous_option or str(previous_option.get('token')) != str(option['token']):
+                return None
+            if 'trading_levels' not in previous_option:
+                return None
+        return previous
+
+    def process_stocks_list(self, input_data, previous_results=None, stock_ohlc=None, min_price=None, timer=None):
+        """Process list of stocks from input data
+
+        With previous_results (see load_previous_results) stocks whose inputs
+        are unchanged are carried forward without fetching option data.
+        stock_ohlc holds prefetched OHLC per stock token. timer records stage
+        timings; stocks not prepared before its deadline are skipped.
+        """
+        timer = timer or StageTimer()
+        stock_ohlc = stock_ohlc or {}
+        min_price = self.min_price if min_price is None else min_price
         # if not self.create_session():
         #     return None
         
-        logging.info("🎯 PROCESSING STOCKS > ₹1000")
+        logging.info(f"🎯 PROCESSING STOCKS > ₹{min_price:,}")
         logging.info("=" * 80)
         
         # Get stocks from input data
@@ -418,19 +548,85 @@ class UpdateStockOptData:
         
         logging.info(f"📈 Found {len(stocks_list)} stocks to analyze")
         
+        # Build the option chain index once before fanning out
+        with timer.stage('option_chain', len(input_data.get('options', []))):
+            self.get_option_chain_index(input_data)
+        
         results = []
-        stocks_above_1000 = 0
         
-        for stock in stocks_list:
-            analysis_result = self.analyze_stock_with_options(stock, input_data)
-            if analysis_result:
-                results.append(analysis_result)
-                stocks_above_1000 += 1
-            
-            # Add delay between stock analysis
-            time.sleep(2)
+        # Stock candles fan out over one pool, candle fallbacks for options over
+        # another, so a stock waiting on its legs never starves the pool it is
+        # running in. Both share the SmartAPI rate limiter. Once the budget is
+        # spent the pools are shut down without waiting for requests in flight.
+        fetch_executor = ThreadPoolExecutor(max_workers=self.max_workers * 4, thread_name_prefix='OptionFetch')
+        stock_executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='StockAnalysis')
+        self._fetch_executor = fetch_executor
+        try:
+            with timer.stage('prepare_stocks', len(stocks_list)):
+                futures = [] if timer.expired() else [
+                    stock_executor.submit(self.prepare_stock_analysis, stock, input_data,
+                                          stock_ohlc.get(str(stock.get('token'))), min_price, False)
+                    for stock in stocks_list
+                ]
+                
+                # Collect in input order so results stay deterministic
+                contexts = []
+                skipped = len(stocks_list) - len(futures)
+                for stock, future in zip(stocks_list, futures):
+                    try:
+                        context = future.result(timeout=timer.remaining())
+                    except FutureTimeoutError:
+                        skipped += 1
+                        continue
+                    except Exception as e:
+                        logging.error(f"❌ Analysis failed for {stock.get('symbol')}: {e}")
+                        continue
+                    if context:
+                        contexts.append(context)
+                
+                if skipped:
+                    logging.warning(f"⏰ Time budget spent, skipped {skipped} stocks")
+            
+            # Strikes for every prepared stock in one pass over the chain index
+            with timer.stage('select_strikes', len(contexts)):
+                self.attach_best_strikes(contexts, input_data)
+            
+            reused = {}
+            if previous_results:
+                for i, context in enumerate(contexts):
+                    previous = self.reusable_result(context, previous_results)
+                    if previous:
+                        reused[i] = previous
+                logging.info(f"♻️ Carrying forward {len(reused)}/{len(contexts)} unchanged stocks")
+            
+            # One bulk quote pass for every selected CE and PE that changed
+            selected = [option for i, context in enumerate(contexts) if i not in reused
+                        for option in (context['best_ce'], context['best_pe']) if option]
+            with timer.stage('option_quotes', len(selected)):
+                market_data = self.fetch_bulk_option_market_data(selected, timer) if selected else {}
+            with timer.stage('trading_levels', len(market_data)):
+                levels_by_token = self.trading_levels_for(market_data)
+        finally:
+            self._fetch_executor = None
+            wait = not timer.expired()
+            stock_executor.shutdown(wait=wait, cancel_futures=not wait)
+            fetch_executor.shutdown(wait=wait, cancel_futures=not wait)
         
-        logging.info(f"\n✅ Analysis Complete: {stocks_above_1000}/{len(stocks_list)} stocks above ₹{self.min_price:,}")
+        with timer.stage('complete', len(contexts)):
+            for i, context in enumerate(contexts):
+                if i in reused:
+                    results.append(reused[i])
+                    continue
+                try:
+                    legs = [
+                        market_data.get(option['token'], (None, None)) if option else (None, None)
+                        for option in (context['best_ce'], context['best_pe'])
+                    ]
+                    results.append(self.complete_stock_analysis(context, legs, levels_by_token))
+                except Exception as e:
+                    logging.error(f"❌ Analysis failed for {context['stock'].get('symbol')}: {e}")
+        
+        logging.info(f"\n✅ Analysis Complete: {len(results)}/{len(stocks_list)} stocks above ₹{min_price:,}")
         return results
     
     def get_ltp_data(self, option_data):
@@ -440,7 +636,11 @@ class UpdateStockOptData:
                 logging.error(f"   ❌ Invalid option data for LTP")
                 return None
                 
-            ltp_data = self.smart_api.ltpData(
+            ltp_data = memoized_call(
+                ('ltp', 'NFO', str(option_data['token'])),
+                rate_limited_call,
+                'ltp',
+                self.smart_api.ltpData,
                 exchange="NFO",
                 tradingsymbol=option_data['symbol'],
                 symboltoken=option_data['token']
@@ -457,90 +657,173 @@ class UpdateStockOptData:
             return None
 
 
+    def save_analysis(self, filename, output_data):
+        """Write the readable JSON, the compact artifact the monitor loads and the history entry"""
+        with open(filename, 'w') as f:
+            json.dump(output_data, f, indent=4)
+        
+        try:
+            write_analysis_artifact(output_data['results'], artifact_path_for(filename), output_data.get('analysis_time'))
+        except Exception as e:
+            # The monitor falls back to the JSON if the artifact is missing
+            logging.error(f"❌ Could not write analysis artifact: {e}")
+        
+        try:
+            AnalysisHistory.get_instance().record_run(output_data, source=os.path.basename(filename))
+        except Exception as e:
+            logging.error(f"❌ Could not record analysis history: {e}")
+
     # Example usage
-    def run(self):
-        # Your input data
-        # 
-        input_payload_red = "( {33489} ( daily high < 1 day ago high and daily low > 1 day ago low and daily close < daily open and daily close > 1000 ) )"
+    def run(self, incremental=None):
+        incremental = self.incremental if incremental is None else incremental
+        
+        # Responses are only reused within a single run
+        RequestCache.get_instance().clear()
 
-        # Fetch data (using your provided data structure)
-        stocks_data_red = fetch_chartink_data(input_payload_red)
-        stock_details_red = get_stock_details(stocks_data_red)
+        # Red and green inside-bar screens (or CHARTINK_SCANS_FILE) run concurrently;
+        # overlapping results are merged by nsecode so each stock is analyzed once
+        # Clauses Chartink fails on (or is too slow for) are screened locally
+        stocks_data = ChartinkClient.get_instance().scan_many(
+            self.scan_clauses, fallback=lambda clause: self.local_screener.screen(clause, refresh=True))
+        stock_details = get_stock_details(stocks_data)
 
-        input_payload_green = "( {33489} ( daily high < 1 day ago high and daily low > 1 day ago low and daily close > daily open and daily close > 1000 ) )"
 
-        stocks_data_green = fetch_chartink_data(input_payload_green)
-        stock_details_green = get_stock_details(stocks_data_green)
+        # analyzer = StockAnalysis()
+        previous_results = self.load_previous_results() if incremental else None
+        results = self.process_stocks_list(stock_details, previous_results)
+        return self.publish_results(results)
 
-        stock_details={"stocks":stock_details_red['stocks']+stock_details_green['stocks'],
-                       "options":stock_details_red['options']+stock_details_green['options']}  # Assuming both have same options structure
+    def publish_results(self, results, **summary):
+        """Save results as the analysis the live monitor loads and send the Telegram summary
 
+        Returns the saved counts plus any extra summary fields, None if there
+        were no results.
+        """
+        if not results:
+            logging.error(f"❌ No stocks found above ₹{self.min_price:,} or analysis failed")
+            send_telegram_message(f"❌ No stocks found above ₹{self.min_price:,} or analysis failed")
+            return None
+        
+        output_data = {
+            'analysis_time': datetime.now().isoformat(),
+            'min_price_filter': self.min_price,
+            'stocks_analyzed': len(results),
+            'results': results
+        }
+        self.save_analysis(ANALYSIS_FILE, output_data)
+        logging.info(f"\n💾 Analysis saved to: {ANALYSIS_FILE}")
+        
+        self.send_summary(results)
+        return {'analysis_file': ANALYSIS_FILE, 'stocks_analyzed': len(results), **summary}
 
-        # analyzer = StockAnalysis()
-        results = self.process_stocks_list(stock_details)
-        message = ""
+    def send_summary(self, results):
+        """Log the selected legs and send them via Telegram
 
-        # Save results to JSON
-        if results:
-            timestamp = datetime.now().strftime("%A_%Y-%m-%d")
-            filename = f"stock_interaday_json/stock_interaday_analysis.json"
-            
+        The message grows stock by stock and is resent after each one; once it
+        would pass Telegram's length limit a new message is started.
+        """
+        timestamp = datetime.now().strftime("%A_%Y-%m-%d")
+        logging.info(f"\n📊 STOCK OPTIONS TRADING STRATEGY SUMMARY - {timestamp}")
+        header = f"📊 STOCK OPTIONS TRADING STRATEGY SUMMARY - {timestamp}\n\n"
+        message = header
+        
+        for result in results:
+            stock = result['stock']
+            historical = result['historical']
+            options = result['options']
+            
+            logging.info(f"\n📈 {stock['name']} ({stock['symbol']})")
+            block = f"📈 {stock['name']} ({stock['symbol']})\n"
+            block += f"Stock Price: ₹{historical['close']:,.2f} | Stock Day High: ₹{historical['high']:,.2f}\n"
+            logging.info(f"   Stock Price: ₹{historical['close']:,.2f} | Stock Day High: ₹{historical['high']:,.2f}")
+            
+            # CE Option
+            if options.get('ce'):
+                ce = options['ce']
+                trading_levels = ce.get('trading_levels', {})
+                logging.info(f"   🟢 CE: {ce['symbol']}")
+                block += f"\n🟢 CE: {ce['symbol']}\n"
+                block += f"Strike: ₹{ce['strike']:,.2f} | LTP: {ce.get('ltp', 'N/A')}\n"
+                block += f"Entry: ₹{trading_levels.get('buy_entry', 'N/A')} | Target: ₹{trading_levels.get('target', 'N/A')}\n"
+                block += f"Stoploss: ₹{trading_levels.get('stoploss', 'N/A')} | R:R: {trading_levels.get('risk_reward_ratio', 'N/A')}:1\n"
+                logging.info(f"      Strike: ₹{ce['strike']:,.2f} | LTP: ₹{ce.get('ltp', 'N/A')}")
+                logging.info(f"      Entry: ₹{trading_levels.get('buy_entry', 'N/A')} | Target: ₹{trading_levels.get('target', 'N/A')}")
+                logging.info(f"      Stoploss: ₹{trading_levels.get('stoploss', 'N/A')} | R:R: {trading_levels.get('risk_reward_ratio', 'N/A')}:1")
+            
+            # PE Option
+            if options.get('pe'):
+                pe = options['pe']
+                trading_levels = pe.get('trading_levels', {})
+                logging.info(f"   🔴 PE: {pe['symbol']}")
+                block += f"\n🔴 PE: {pe['symbol']}\n"
+                block += f"Strike: ₹{pe['strike']:,.2f} | LTP: {pe.get('ltp', 'N/A')}\n"
+                block += f"Entry: ₹{trading_levels.get('buy_entry', 'N/A')} | Target: ₹{trading_levels.get('target', 'N/A')}\n"
+                block += f"Stoploss: ₹{trading_levels.get('stoploss', 'N/A')} | R:R: {trading_levels.get('risk_reward_ratio', 'N/A')}:1\n"
+                logging.info(f"      Strike: ₹{pe['strike']:,.2f} | LTP: ₹{pe.get('ltp', 'N/A')}")
+                logging.info(f"      Entry: ₹{trading_levels.get('buy_entry', 'N/A')} | Target: ₹{trading_levels.get('target', 'N/A')}")
+                logging.info(f"      Stoploss: ₹{trading_levels.get('stoploss', 'N/A')} | R:R: {trading_levels.get('risk_reward_ratio', 'N/A')}:1")
+            
+            if len(message) + len(block) > TELEGRAM_MESSAGE_LIMIT:
+                message = header
+            message += block
+            
+            # Send summary via Telegram with proper formatting
+            send_telegram_message(message)
+
+    def run_full_universe(self, time_budget=None, incremental=None):
+        """Analyze every NSE F&O underlying within a time budget
+
+        Stock OHLC comes from bulk quotes (candle store as fallback), option
+        legs from bulk quotes. The price filter is applied after analysis so
+        the universe file covers every stock; the stocks above min_price are
+        published like run()'s results, so the live monitor picks them up.
+        Returns counts and stage timings.
+
+        The budget is checked before every broker request: once it is spent
+        no new requests start and unfinished stocks are left out. Requests
+        already in flight are not interrupted, so a run can overrun the
+        budget by about one request's latency.
+        """
+        incremental = self.incremental if incremental is None else incremental
+        timer = StageTimer(self.universe_time_budget if time_budget is None else time_budget)
+        RequestCache.get_instance().clear()
+        
+        with timer.stage('universe'):
+            universe = self.local_screener.universe()
+            stock_details = get_stock_details(universe)
+            stock_details['stocks'] = [s for s in stock_details['stocks'] if s.get('symbol', '').endswith('-EQ')]
+        
+        with timer.stage('stock_quotes', len(stock_details['stocks'])):
+            stock_ohlc = self.fetch_bulk_stock_ohlc(stock_details['stocks'], timer)
+        
+        previous_results = self.load_previous_results(UNIVERSE_ANALYSIS_FILE) if incremental else None
+        results = self.process_stocks_list(stock_details, previous_results, stock_ohlc=stock_ohlc,
+                                           min_price=0, timer=timer)
+        
+        with timer.stage('filter', len(results)):
+            filtered = [result for result in results if result['historical']['close'] >= self.min_price]
+        
+        with timer.stage('save'):
             output_data = {
                 'analysis_time': datetime.now().isoformat(),
-                'min_price_filter': self.min_price,
+                'universe_size': len(stock_details['stocks']),
                 'stocks_analyzed': len(results),
+                'min_price_filter': self.min_price,
+                'stocks_above_min_price': len(filtered),
+                'time_budget': timer.budget,
+                'timings': timer.as_dict(),
                 'results': results
             }
-            
-            with open(filename, 'w') as f:
-                json.dump(output_data, f, indent=4)
-            
-            logging.info(f"\n💾 Analysis saved to: {filename}")
-            
-            # Logging summary
-            logging.info(f"\n📊 STOCK OPTIONS TRADING STRATEGY SUMMARY - {timestamp}")
-            message = f"📊 STOCK OPTIONS TRADING STRATEGY SUMMARY - {timestamp}\n\n"
-        
-            for result in results:
-                stock = result['stock']
-                historical = result['historical']
-                options = result['options']
-                
-                logging.info(f"\n📈 {stock['name']} ({stock['symbol']})")
-                message += f"📈 {stock['name']} ({stock['symbol']})\n"
-                message += f"Stock Price: ₹{historical['close']:,.2f} | Stock Day High: ₹{historical['high']:,.2f}\n"
-                logging.info(f"   Stock Price: ₹{historical['close']:,.2f} | Stock Day High: ₹{historical['high']:,.2f}")
-                
-                # CE Option
-                if options.get('ce'):
-                    ce = options['ce']
-                    trading_levels = ce.get('trading_levels', {})
-                    logging.info(f"   🟢 CE: {ce['symbol']}")
-                    message += f"\n🟢 CE: {ce['symbol']}\n"
-                    message += f"Strike: ₹{ce['strike']:,.2f} | LTP: {ce.get('ltp', 'N/A')}\n"
-                    message += f"Entry: ₹{trading_levels.get('buy_entry', 'N/A')} | Target: ₹{trading_levels.get('target', 'N/A')}\n"
-                    message += f"Stoploss: ₹{trading_levels.get('stoploss', 'N/A')} | R:R: {trading_levels.get('risk_reward_ratio', 'N/A')}:1\n"
-                    logging.info(f"      Strike: ₹{ce['strike']:,.2f} | LTP: ₹{ce.get('ltp', 'N/A')}")
-                    logging.info(f"      Entry: ₹{trading_levels.get('buy_entry', 'N/A')} | Target: ₹{trading_levels.get('target', 'N/A')}")
-                    logging.info(f"      Stoploss: ₹{trading_levels.get('stoploss', 'N/A')} | R:R: {trading_levels.get('risk_reward_ratio', 'N/A')}:1")
-                
-                # PE Option
-                if options.get('pe'):
-                    pe = options['pe']
-                    trading_levels = pe.get('trading_levels', {})
-                    logging.info(f"   🔴 PE: {pe['symbol']}")
-                    message += f"\n🔴 PE: {pe['symbol']}\n"
-                    message += f"Strike: ₹{pe['strike']:,.2f} | LTP: {pe.get('ltp', 'N/A')}\n"
-                    message += f"Entry: ₹{trading_levels.get('buy_entry', 'N/A')} | Target: ₹{trading_levels.get('target', 'N/A')}\n"
-                    message += f"Stoploss: ₹{trading_levels.get('stoploss', 'N/A')} | R:R: {trading_levels.get('risk_reward_ratio', 'N/A')}:1\n"
-                    logging.info(f"      Strike: ₹{pe['strike']:,.2f} | LTP: ₹{pe.get('ltp', 'N/A')}")
-                    logging.info(f"      Entry: ₹{trading_levels.get('buy_entry', 'N/A')} | Target: ₹{trading_levels.get('target', 'N/A')}")
-                    logging.info(f"      Stoploss: ₹{trading_levels.get('stoploss', 'N/A')} | R:R: {trading_levels.get('risk_reward_ratio', 'N/A')}:1")
-                
-                # Send summary via Telegram with proper formatting
-                send_telegram_message(message)
-                
-            
-        else:
-            logging.error("❌ No stocks found above ₹1000 or analysis failed")
-            send_telegram_message("❌ No stocks found above ₹1000 or analysis failed")   
\ No newline at end of file
+            self.save_analysis(UNIVERSE_ANALYSIS_FILE, output_data)
+        
+        logging.info(timer.report())
+        logging.info(f"💾 F&O universe: {len(results)}/{len(stock_details['stocks'])} stocks analyzed, "
+                     f"{len(filtered)} above ₹{self.min_price:,} -> {UNIVERSE_ANALYSIS_FILE}")
+        
+        return self.publish_results(
+            filtered,
+            universe_file=UNIVERSE_ANALYSIS_FILE,
+            universe_size=len(stock_details['stocks']),
+            universe_analyzed=len(results),
+            timings=timer.as_dict()
+        )
@@ -52,7 +52,7 @@ class MonitorManager:
         try:
             # Import and run your main function
             self.monitor_instance = ParallelOptionMonitor()
-            main()  # This will run your existing monitoring logic
+            main(self.monitor_instance)  # This will run your existing monitoring logic
             
         except Exception as e:
             logging.error(f"Monitor execution error: {e}")
@@ -90,4 +90,10 @@ class MonitorManager:
             "is_trading_day": self.trading_hours_manager.holiday_manager.is_trading_day()
         }
         
-        return status
\ No newline at end of file
+        return status
+
+    def get_metrics(self) -> Optional[Dict]:
+        """Metrics snapshot of the current monitor, None if it never started"""
+        if not self.monitor_instance:
+            return None
+        return self.monitor_instance.get_metrics()
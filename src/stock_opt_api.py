@@ -26,6 +26,7 @@ from src.main.interaday_stock_options.services.manage_monitor import MonitorMana
 
 from src.utils.send_message import send_telegram_message_admin
 from src.utils.timezone_utils import get_ist_now, convert_to_ist, IST
+from src.utils.analysis_history import AnalysisHistory
 
 # Set up logging
 logging.basicConfig(
@@ -39,6 +40,9 @@ logging.basicConfig(
 
 load_dotenv('./env/.env.prod')
 
+# Scheduled analysis scans the whole F&O universe instead of the Chartink screens
+FULL_UNIVERSE_ANALYSIS = os.getenv('ANALYSIS_FULL_UNIVERSE', '0') == '1'
+
 # Initialize managers
 holiday_manager = MarketHolidayManager()
 trading_hours_manager = TradingHoursManager(holiday_manager)
@@ -72,11 +76,15 @@ def force_garbage_collection():
     
     return memory_after
 
-async def run_stock_analysis():
-    """Run stock options analysis at 8:00 PM IST"""
+async def run_stock_analysis(full_universe=False):
+    """Run stock options analysis at 8:00 PM IST
+
+    full_universe analyzes every F&O underlying instead of the screened stocks.
+    """
     try:
         ist_now = get_ist_now()
-        logging.info(f"🔄 Starting scheduled stock options analysis at {ist_now.strftime('%Y-%m-%d %H:%M:%S')} IST...")
+        scope = "F&O universe" if full_universe else "stock options"
+        logging.info(f"🔄 Starting scheduled {scope} analysis at {ist_now.strftime('%Y-%m-%d %H:%M:%S')} IST...")
         
         from src.main.interaday_stock_options.angel_one.stock_options_analysis import UpdateStockOptData
         
@@ -84,13 +92,14 @@ async def run_stock_analysis():
         force_garbage_collection()
         
         analyzer = UpdateStockOptData()
-        result = analyzer.run()
+        result = analyzer.run_full_universe() if full_universe else analyzer.run()
         
         # Force garbage collection after completion
         force_garbage_collection()
         
+        # result holds counts and, for the F&O universe, stage timings (never the result list)
         ist_completed = get_ist_now()
-        logging.info(f"✅ Stock options analysis completed at {ist_completed.strftime('%Y-%m-%d %H:%M:%S')} IST: {result}")
+        logging.info(f"✅ {scope} analysis completed at {ist_completed.strftime('%Y-%m-%d %H:%M:%S')} IST: {result}")
         return result
         
     except Exception as e:
@@ -109,7 +118,7 @@ async def scheduled_tasks_manager():
             # Schedule stock analysis at 8:00 PM IST (20:00)
             if current_time.hour == 20 and current_time.minute == 0 and current_time.second == 0:
                 logging.info(f"⏰ 8:00 PM IST ({ist_now.strftime('%Y-%m-%d %H:%M:%S')}) - Triggering stock options analysis")
-                asyncio.create_task(run_stock_analysis())
+                asyncio.create_task(run_stock_analysis(full_universe=FULL_UNIVERSE_ANALYSIS))
                 
                 # Sleep for 61 seconds to avoid multiple triggers in the same minute
                 await asyncio.sleep(61)
@@ -327,7 +336,7 @@ async def root():
             "trading_info": "GET /trading-info - Get trading hours and holidays",
             "health": "GET /health - Health check",
             "memory": "GET /memory - Memory usage info",
-            "run_analysis": "POST /run-analysis - Run stock analysis manually"
+            "run_analysis": "POST /run-analysis - Run stock analysis manually (?full_universe=true for every F&O stock)"
         }
     }
 
@@ -498,6 +507,19 @@ async def health_check():
     return {"status": "healthy", "timestamp": datetime.now().isoformat()}
 
 
+@app.get("/monitor-metrics")
+async def get_monitor_metrics():
+    """Tick and alert metrics of the live monitor"""
+    metrics = monitor_manager.get_metrics()
+    if metrics is None:
+        raise HTTPException(status_code=404, detail="Monitor has not been started")
+    return {
+        "monitor_running": monitor_manager.is_running,
+        "timestamp": datetime.now().isoformat(),
+        "metrics": metrics
+    }
+
+
 @app.get("/next-trading-day")
 async def get_next_trading_day():
     """Get information about the next trading day"""
@@ -534,10 +556,10 @@ async def get_memory_info():
     }
 
 @app.post("/run-analysis")
-async def run_analysis_now():
-    """Run stock options analysis manually"""
+async def run_analysis_now(full_universe: bool = False):
+    """Run stock options analysis manually, optionally over the whole F&O universe"""
     try:
-        result = await run_stock_analysis()
+        result = await run_stock_analysis(full_universe)
         if result:
             return {"message": "Stock analysis completed successfully", "result": result}
         else:
@@ -545,6 +567,34 @@ async def run_analysis_now():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analysis error: {str(e)}")
 
+@app.get("/analysis-history")
+async def get_analysis_history(start_date: Optional[date] = None, end_date: Optional[date] = None,
+                               symbol: Optional[str] = None, token: Optional[str] = None,
+                               run_id: Optional[int] = None, limit: int = 500):
+    """Past option selections and levels by date range, underlying, token or run"""
+    try:
+        selections = AnalysisHistory.get_instance().selections(
+            start_date=start_date.isoformat() if start_date else None,
+            end_date=end_date.isoformat() if end_date else None,
+            underlying=symbol, token=token, run_id=run_id, limit=min(limit, 5000)
+        )
+        return {"count": len(selections), "selections": selections}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"History query failed: {str(e)}")
+
+@app.get("/analysis-history/runs")
+async def get_analysis_runs(start_date: Optional[date] = None, end_date: Optional[date] = None, limit: int = 100):
+    """Recorded analysis runs, newest first"""
+    try:
+        runs = AnalysisHistory.get_instance().runs(
+            start_date=start_date.isoformat() if start_date else None,
+            end_date=end_date.isoformat() if end_date else None,
+            limit=min(limit, 1000)
+        )
+        return {"count": len(runs), "runs": runs}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"History query failed: {str(e)}")
+
 @app.post("/cleanup-memory")
 async def cleanup_memory():
     """Force garbage collection and memory cleanup"""
@@ -0,0 +1,115 @@
+import json
+import os
+import tempfile
+import logging
+from typing import Dict, List, Optional
+import numpy as np
+
+ARTIFACT_VERSION = 1
+
+# One row per option leg: exactly the fields the live monitor reads
+STRING_COLUMNS = ('token', 'symbol', 'option_type', 'expiry', 'stock_name', 'stock_symbol')
+FLOAT_COLUMNS = (
+    'strike', 'ltp', 'stock_day_high',
+    'day_open', 'day_high', 'day_low', 'day_close',
+    'buy_entry', 'target', 'stoploss', 'risk_reward_ratio', 'upside_potential', 'downside_risk',
+)
+INT_COLUMNS = ('lotsize',)
+BOOL_COLUMNS = ('has_ohlc', 'has_levels')
+
+OHLC_FIELDS = ('day_open', 'day_high', 'day_low', 'day_close')
+LEVEL_FIELDS = ('buy_entry', 'target', 'stoploss', 'risk_reward_ratio', 'upside_potential', 'downside_risk')
+
+
+def artifact_path_for(json_path: str) -> str:
+    """Binary artifact written next to an analysis JSON file"""
+    return os.path.splitext(json_path)[0] + '.npz'
+
+
+def is_artifact_current(artifact_path: str, json_path: str) -> bool:
+    """True if the artifact exists and is not older than its JSON"""
+    if not os.path.exists(artifact_path):
+        return False
+    return not os.path.exists(json_path) or os.path.getmtime(artifact_path) >= os.path.getmtime(json_path)
+
+
+def _number(value, default=np.nan) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def analysis_to_columns(results: List[Dict]) -> Dict[str, np.ndarray]:
+    """Flatten analysis results into per-leg columns"""
+    rows = []
+    for result in results:
+        stock = result.get('stock', {})
+        stock_day_high = _number(result.get('historical', {}).get('high'), 0.0)
+        for option_type in ('ce', 'pe'):
+            option = (result.get('options') or {}).get(option_type)
+            if not option or not str(option.get('token', '')).strip():
+                continue
+            ohlc = option.get('option_ohlc') or {}
+            levels = option.get('trading_levels') or {}
+            rows.append({
+                'token': str(option['token']),
+                'symbol': option.get('symbol', ''),
+                'option_type': option_type.upper(),
+                'expiry': option.get('expiry', ''),
+                'stock_name': stock.get('name', ''),
+                'stock_symbol': stock.get('symbol', ''),
+                'strike': _number(option.get('strike')),
+                'ltp': _number(option.get('ltp')),
+                'stock_day_high': stock_day_high,
+                'lotsize': int(_number(option.get('lotsize'), 0)),
+                'has_ohlc': bool(ohlc),
+                'has_levels': bool(levels),
+                **{field: _number(ohlc.get(field)) for field in OHLC_FIELDS},
+                **{field: _number(levels.get(field)) for field in LEVEL_FIELDS},
+            })
+
+    columns = {}
+    for column in STRING_COLUMNS:
+        columns[column] = np.array([row[column] for row in rows], dtype=str)
+    for column in FLOAT_COLUMNS:
+        columns[column] = np.array([row[column] for row in rows], dtype=np.float64)
+    for column in INT_COLUMNS:
+        columns[column] = np.array([row[column] for row in rows], dtype=np.int32)
+    for column in BOOL_COLUMNS:
+        columns[column] = np.array([row[column] for row in rows], dtype=bool)
+    return columns
+
+
+def write_analysis_artifact(results: List[Dict], path: str, analysis_time: Optional[str] = None):
+    """Write the monitor's columns as an uncompressed .npz, replacing the file atomically"""
+    columns = analysis_to_columns(results)
+    meta = {
+        'version': ARTIFACT_VERSION,
+        'analysis_time': analysis_time,
+        'stocks_analyzed': len(results),
+        'rows': len(columns['token']),
+    }
+
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp_', suffix='.npz')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, meta=np.array(json.dumps(meta)), **columns)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    logging.info(f"🗜️ Wrote {meta['rows']} option legs to {path}")
+
+
+def read_analysis_artifact(path: str):
+    """Load (meta, columns) from an artifact; ValueError if the schema version differs"""
+    with np.load(path, allow_pickle=False) as data:
+        meta = json.loads(str(data['meta']))
+        if meta.get('version') != ARTIFACT_VERSION:
+            raise ValueError(f"Unsupported analysis artifact version {meta.get('version')} in {path}")
+        columns = {column: data[column] for column in (*STRING_COLUMNS, *FLOAT_COLUMNS, *INT_COLUMNS, *BOOL_COLUMNS)}
+    return meta, columns
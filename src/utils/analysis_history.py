@@ -0,0 +1,137 @@
+import os
+import sqlite3
+import threading
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional
+import numpy as np
+from src.utils.analysis_artifact import analysis_to_columns, STRING_COLUMNS, FLOAT_COLUMNS, INT_COLUMNS
+
+LEG_COLUMNS = (*STRING_COLUMNS, *FLOAT_COLUMNS, *INT_COLUMNS)
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    analysis_time TEXT NOT NULL,
+    analysis_date TEXT NOT NULL,
+    source TEXT,
+    stocks_analyzed INTEGER
+);
+CREATE TABLE IF NOT EXISTS selections (
+    run_id INTEGER NOT NULL REFERENCES runs(run_id),
+    analysis_date TEXT NOT NULL,
+    underlying TEXT NOT NULL,
+    {', '.join(f'{column} {"TEXT" if column in STRING_COLUMNS else "REAL" if column in FLOAT_COLUMNS else "INTEGER"}'
+               for column in LEG_COLUMNS)}
+);
+CREATE INDEX IF NOT EXISTS idx_runs_date ON runs (analysis_date);
+CREATE INDEX IF NOT EXISTS idx_selections_date ON selections (analysis_date);
+CREATE INDEX IF NOT EXISTS idx_selections_underlying ON selections (underlying, analysis_date);
+CREATE INDEX IF NOT EXISTS idx_selections_token ON selections (token, analysis_date);
+"""
+
+
+class AnalysisHistory:
+    """Append-only SQLite history of analysis runs and their selected option legs
+
+    Every saved analysis becomes a run; its legs are stored with the run's
+    date and underlying so past selections and levels can be queried by
+    date range, underlying or option token without reading old files.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or os.getenv('ANALYSIS_HISTORY_PATH', os.path.join('cache', 'analysis_history.sqlite3'))
+        os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        with self._write_lock:
+            self._conn().executescript(SCHEMA)
+
+    @classmethod
+    def get_instance(cls):
+        """Get the process-wide history store"""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def _conn(self) -> sqlite3.Connection:
+        """One connection per thread"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def record_run(self, output_data: Dict, source: Optional[str] = None) -> int:
+        """Append one analysis output (as saved to JSON) and return its run id"""
+        analysis_time = output_data.get('analysis_time') or datetime.now().isoformat()
+        analysis_date = analysis_time[:10]
+        columns = analysis_to_columns(output_data.get('results', []))
+
+        values = {column: columns[column].tolist() for column in LEG_COLUMNS}
+        # NaN marks a missing number in the artifact columns; store it as NULL
+        for column in FLOAT_COLUMNS:
+            values[column] = [None if np.isnan(v) else v for v in values[column]]
+        underlyings = [symbol.replace('-EQ', '') for symbol in values['stock_symbol']]
+
+        with self._write_lock, self._conn() as conn:
+            run_id = conn.execute(
+                "INSERT INTO runs (analysis_time, analysis_date, source, stocks_analyzed) VALUES (?, ?, ?, ?)",
+                (analysis_time, analysis_date, source, output_data.get('stocks_analyzed', 0))
+            ).lastrowid
+            conn.executemany(
+                f"INSERT INTO selections (run_id, analysis_date, underlying, {', '.join(LEG_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * (len(LEG_COLUMNS) + 3))})",
+                [(run_id, analysis_date, underlying, *row)
+                 for underlying, row in zip(underlyings, zip(*(values[column] for column in LEG_COLUMNS)))]
+            )
+
+        logging.info(f"🗄️ Recorded analysis run {run_id} with {len(underlyings)} option legs")
+        return run_id
+
+    def runs(self, start_date: Optional[str] = None, end_date: Optional[str] = None, limit: int = 100) -> List[Dict]:
+        """Runs between two ISO dates (inclusive), newest first"""
+        where, params = self._date_filter(start_date, end_date)
+        rows = self._conn().execute(
+            f"SELECT * FROM runs {where} ORDER BY run_id DESC LIMIT ?", (*params, limit)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def selections(self, start_date: Optional[str] = None, end_date: Optional[str] = None,
+                   underlying: Optional[str] = None, token: Optional[str] = None,
+                   run_id: Optional[int] = None, limit: int = 500) -> List[Dict]:
+        """Selected legs and their levels, newest run first"""
+        where, params = self._date_filter(start_date, end_date)
+        clauses = [where[len('WHERE '):]] if where else []
+        if underlying:
+            clauses.append("underlying = ?")
+            params.append(underlying.upper())
+        if token:
+            clauses.append("token = ?")
+            params.append(str(token))
+        if run_id is not None:
+            clauses.append("run_id = ?")
+            params.append(run_id)
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._conn().execute(
+            f"SELECT * FROM selections {where} ORDER BY run_id DESC, rowid LIMIT ?", (*params, limit)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    @staticmethod
+    def _date_filter(start_date: Optional[str], end_date: Optional[str]):
+        clauses, params = [], []
+        if start_date:
+            clauses.append("analysis_date >= ?")
+            params.append(start_date)
+        if end_date:
+            clauses.append("analysis_date <= ?")
+            params.append(end_date)
+        return (f"WHERE {' AND '.join(clauses)}" if clauses else ""), params
@@ -0,0 +1,45 @@
+import logging
+from typing import Dict, Iterable
+from src.utils.rate_limiter import rate_limited_call
+from src.utils.request_cache import memoized_call
+
+# SmartAPI getMarketData accepts at most 50 tokens per request
+MAX_TOKENS_PER_REQUEST = 50
+
+
+def fetch_bulk_quotes(smart_api, exchange: str, tokens: Iterable, mode: str = "OHLC", timer=None) -> Dict[str, Dict]:
+    """Fetch quotes for many tokens through getMarketData, 50 tokens per request
+
+    Returns token -> quote dict (ltp, open, high, low, close, ...). Tokens the
+    broker could not fetch, or that were left when the timer's deadline
+    passed, are simply missing from the result.
+    """
+    unique_tokens = list(dict.fromkeys(str(token) for token in tokens if token))
+    quotes = {}
+
+    for i in range(0, len(unique_tokens), MAX_TOKENS_PER_REQUEST):
+        if timer and timer.expired():
+            logging.warning(f"   ⏰ Time budget spent, skipping bulk quotes for {len(unique_tokens) - i} {exchange} tokens")
+            break
+        batch = unique_tokens[i:i + MAX_TOKENS_PER_REQUEST]
+        try:
+            response = memoized_call(('quote', mode, exchange, tuple(batch)),
+                                     rate_limited_call, 'quote', smart_api.getMarketData, mode, {exchange: batch})
+        except Exception as e:
+            logging.error(f"   ❌ Bulk quote error for {len(batch)} {exchange} tokens: {e}")
+            continue
+
+        if not response or not response.get('status') or not response.get('data'):
+            logging.error(f"   ❌ Bulk quote failed: {response.get('message') if response else 'No response'}")
+            continue
+
+        for quote in response['data'].get('fetched', []):
+            quotes[str(quote.get('symbolToken'))] = quote
+
+        unfetched = response['data'].get('unfetched', [])
+        if unfetched:
+            logging.warning(f"   ⚠️ {len(unfetched)} {exchange} tokens not fetched in bulk quote")
+
+    logging.info(f"   📦 Bulk quotes: {len(quotes)}/{len(unique_tokens)} {exchange} tokens in "
+                 f"{(len(unique_tokens) + MAX_TOKENS_PER_REQUEST - 1) // MAX_TOKENS_PER_REQUEST} requests")
+    return quotes
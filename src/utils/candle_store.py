@@ -0,0 +1,204 @@
+import os
+import sqlite3
+import threading
+import logging
+from datetime import date, datetime, time as dt_time, timedelta
+from typing import List, Optional, Tuple
+from src.utils.rate_limiter import RateLimitExceeded, rate_limited_call
+from src.utils.request_cache import memoized_call
+from src.utils.timezone_utils import get_ist_now
+
+# A day's candle is final once it was fetched after the session closed (IST)
+SESSION_CLOSE = {
+    'NSE': dt_time(15, 30),
+    'NFO': dt_time(15, 30),
+    'BSE': dt_time(15, 30),
+    'MCX': dt_time(23, 55),
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS candles (
+    exchange TEXT NOT NULL,
+    token TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    date TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    open REAL, high REAL, low REAL, close REAL, volume REAL,
+    PRIMARY KEY (exchange, token, interval, date)
+) WITHOUT ROWID;
+DROP TABLE IF EXISTS coverage;
+CREATE TABLE IF NOT EXISTS coverage_ranges (
+    exchange TEXT NOT NULL,
+    token TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    fetched_from TEXT NOT NULL,
+    fetched_through TEXT NOT NULL,
+    fetched_at TEXT NOT NULL,
+    PRIMARY KEY (exchange, token, interval, fetched_from)
+) WITHOUT ROWID;
+"""
+
+
+def _as_date(value) -> date:
+    return value.date() if isinstance(value, datetime) else value
+
+
+class CandleStore:
+    """SQLite store of OHLC candles keyed by (exchange, token, interval, date)
+
+    Tracks the disjoint date ranges fetched per token so that repeated runs
+    only request the days that are missing. Only final days are recorded as
+    covered, so a day fetched before its session closed is fetched again.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or os.getenv('CANDLE_STORE_PATH', os.path.join('cache', 'candles.sqlite3'))
+        os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        with self._write_lock:
+            self._conn().executescript(SCHEMA)
+
+    @classmethod
+    def get_instance(cls):
+        """Get the process-wide candle store"""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def _conn(self) -> sqlite3.Connection:
+        """One connection per thread"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def get_candles(self, exchange: str, token, interval: str, start_date, end_date) -> List[list]:
+        """Stored candles in SmartAPI format [timestamp, open, high, low, close, volume]"""
+        rows = self._conn().execute(
+            "SELECT timestamp, open, high, low, close, volume FROM candles "
+            "WHERE exchange = ? AND token = ? AND interval = ? AND date BETWEEN ? AND ? ORDER BY date",
+            (exchange, str(token), interval, _as_date(start_date).isoformat(), _as_date(end_date).isoformat())
+        ).fetchall()
+        return [list(row) for row in rows]
+
+    def get_candles_bulk(self, exchange: str, tokens: List, interval: str, start_date, end_date) -> List[tuple]:
+        """Stored (token, date, open, high, low, close, volume) rows for many tokens"""
+        tokens = [str(token) for token in tokens]
+        rows = []
+        # Stay well below SQLite's bound-parameter limit
+        for i in range(0, len(tokens), 500):
+            batch = tokens[i:i + 500]
+            rows.extend(self._conn().execute(
+                f"SELECT token, date, open, high, low, close, volume FROM candles "
+                f"WHERE exchange = ? AND interval = ? AND date BETWEEN ? AND ? "
+                f"AND token IN ({','.join('?' * len(batch))})",
+                (exchange, interval, _as_date(start_date).isoformat(), _as_date(end_date).isoformat(), *batch)
+            ).fetchall())
+        return rows
+
+    def save_candles(self, exchange: str, token, interval: str, candles: List[list]):
+        """Insert or replace candles returned by getCandleData"""
+        rows = [
+            (exchange, str(token), interval, str(c[0])[:10], str(c[0]),
+             float(c[1]), float(c[2]), float(c[3]), float(c[4]), float(c[5]))
+            for c in candles
+        ]
+        with self._write_lock, self._conn() as conn:
+            conn.executemany("INSERT OR REPLACE INTO candles VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def _coverage(self, exchange: str, token, interval: str) -> List[Tuple[date, date, datetime]]:
+        """Fetched (from, through, fetched_at) ranges, ordered by start"""
+        rows = self._conn().execute(
+            "SELECT fetched_from, fetched_through, fetched_at FROM coverage_ranges "
+            "WHERE exchange = ? AND token = ? AND interval = ? ORDER BY fetched_from",
+            (exchange, str(token), interval)
+        ).fetchall()
+        return [(date.fromisoformat(f), date.fromisoformat(t), datetime.fromisoformat(at)) for f, t, at in rows]
+
+    def _add_coverage(self, exchange: str, token, interval: str, fetched_from: date,
+                      fetched_through: date, fetched_at: datetime):
+        """Record the final days of a fetched range, merging ranges that overlap or touch
+
+        fetched_at is naive IST. Days whose session had not closed by then
+        (including days after fetched_at) are left uncovered.
+        """
+        close = SESSION_CLOSE.get(exchange, dt_time(23, 59))
+        last_final = fetched_at.date() if fetched_at.time() >= close else fetched_at.date() - timedelta(days=1)
+        fetched_through = min(fetched_through, last_final)
+        if fetched_through < fetched_from:
+            return
+
+        key = (exchange, str(token), interval)
+        with self._write_lock, self._conn() as conn:
+            ranges = sorted(self._coverage(*key) + [(fetched_from, fetched_through, fetched_at)])
+            merged = [list(ranges[0])]
+            for covered_from, covered_through, covered_at in ranges[1:]:
+                last = merged[-1]
+                if covered_from > last[1] + timedelta(days=1):
+                    merged.append([covered_from, covered_through, covered_at])
+                else:
+                    last[1], last[2] = max(last[1], covered_through), max(last[2], covered_at)
+
+            conn.execute("DELETE FROM coverage_ranges WHERE exchange = ? AND token = ? AND interval = ?", key)
+            conn.executemany(
+                "INSERT INTO coverage_ranges VALUES (?, ?, ?, ?, ?, ?)",
+                [(*key, f.isoformat(), t.isoformat(), at.isoformat()) for f, t, at in merged]
+            )
+
+    def missing_ranges(self, exchange: str, token, interval: str, start_date, end_date):
+        """Date ranges that still have to be requested from the broker"""
+        start_date, end_date = _as_date(start_date), _as_date(end_date)
+
+        ranges = []
+        cursor = start_date
+        for covered_from, covered_through, _ in self._coverage(exchange, token, interval):
+            if covered_through < cursor:
+                continue
+            if covered_from > end_date:
+                break
+            if covered_from > cursor:
+                ranges.append((cursor, covered_from - timedelta(days=1)))
+            cursor = covered_through + timedelta(days=1)
+            if cursor > end_date:
+                return ranges
+
+        ranges.append((cursor, end_date))
+        return ranges
+
+    def get_daily_candles(self, smart_api, exchange: str, token, start_date, end_date,
+                          interval: str = "ONE_DAY") -> List[list]:
+        """Candles for a date range, fetching only the days not already stored"""
+        start_date, end_date = _as_date(start_date), _as_date(end_date)
+
+        for fetch_from, fetch_to in self.missing_ranges(exchange, token, interval, start_date, end_date):
+            fetched_at = get_ist_now().replace(tzinfo=None)
+            historicParam = {
+                "exchange": exchange,
+                "symboltoken": str(token),
+                "interval": interval,
+                "fromdate": fetch_from.strftime('%Y-%m-%d 00:00'),
+                "todate": fetch_to.strftime('%Y-%m-%d 23:59')
+            }
+            # Concurrent callers for the same token and range share one request
+            try:
+                response = memoized_call(('candles', exchange, str(token), interval, fetch_from, fetch_to),
+                                         rate_limited_call, 'historical', smart_api.getCandleData, historicParam)
+            except RateLimitExceeded as e:
+                logging.error(f"   ❌ Candle fetch failed for {exchange}:{token}: {e}")
+                continue
+            if not response or not response.get('status'):
+                logging.error(f"   ❌ Candle fetch failed for {exchange}:{token}: "
+                              f"{response.get('message') if response else 'No response'}")
+                continue
+
+            self.save_candles(exchange, token, interval, response.get('data') or [])
+            self._add_coverage(exchange, token, interval, fetch_from, fetch_to, fetched_at)
+
+        return self.get_candles(exchange, token, interval, start_date, end_date)
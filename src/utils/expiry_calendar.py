@@ -0,0 +1,109 @@
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+EXPIRY_FORMAT = '%d%b%Y'  # e.g. '28OCT2025'
+
+
+@lru_cache(maxsize=4096)
+def parse_expiry(expiry_str: str) -> Optional[date]:
+    """Parse a scrip master expiry string once; None if it is not a date"""
+    try:
+        return datetime.strptime(expiry_str, EXPIRY_FORMAT).date()
+    except (TypeError, ValueError):
+        return None
+
+
+def _today(today) -> date:
+    if today is None:
+        return datetime.now().date()
+    return today.date() if isinstance(today, datetime) else today
+
+
+def _now(now) -> datetime:
+    if now is None:
+        return datetime.now()
+    return now if isinstance(now, datetime) else datetime.combine(now, time.min)
+
+
+class ExpiryCalendar:
+    """Pre-parsed expiries per underlying with month and roll queries
+
+    Expiry strings are parsed once; queries are dictionary hits or a bisect
+    over the underlying's sorted expiry dates.
+    """
+
+    def __init__(self):
+        self._raw = defaultdict(set)
+        self._sorted = {}
+        self._by_month = {}
+
+    def add(self, underlying: str, expiry_str: str):
+        """Register an expiry for an underlying"""
+        underlying = underlying.upper()
+        if expiry_str not in self._raw[underlying] and parse_expiry(expiry_str):
+            self._raw[underlying].add(expiry_str)
+            self._sorted.pop(underlying, None)
+            self._by_month.pop(underlying, None)
+
+    def expiries(self, underlying: str) -> List[Tuple[date, str]]:
+        """All (date, expiry string) pairs of an underlying, nearest first"""
+        underlying = underlying.upper()
+        if underlying not in self._sorted:
+            self._sorted[underlying] = sorted((parse_expiry(e), e) for e in self._raw.get(underlying, ()))
+        return self._sorted[underlying]
+
+    def _months(self, underlying: str) -> Dict[Tuple[int, int], List[Tuple[date, str]]]:
+        underlying = underlying.upper()
+        if underlying not in self._by_month:
+            by_month = defaultdict(list)
+            for expiry_date, expiry in self.expiries(underlying):
+                by_month[(expiry_date.year, expiry_date.month)].append((expiry_date, expiry))
+            self._by_month[underlying] = dict(by_month)
+        return self._by_month[underlying]
+
+    def current_month(self, underlying: str, today=None) -> Optional[str]:
+        """Nearest unexpired expiry falling in the current month"""
+        today = _today(today)
+        month = self._months(underlying).get((today.year, today.month), [])
+        i = bisect_left(month, (today, ''))
+        return month[i][1] if i < len(month) else None
+
+    def next_month(self, underlying: str, today=None) -> Optional[str]:
+        """Nearest expiry falling in the next calendar month"""
+        today = _today(today)
+        next_month = (today.replace(day=1) + timedelta(days=32))
+        month = self._months(underlying).get((next_month.year, next_month.month))
+        return month[0][1] if month else None
+
+    def nearest_with_min_days(self, underlying: str, min_days: int, now=None) -> Optional[str]:
+        """Nearest expiry at least min_days full days away from now
+
+        Same test as days_to_expiry(...) >= min_days: the expiry date counts
+        from its midnight, so partly elapsed days are not counted.
+        """
+        expiries = self.expiries(underlying)
+        cutoff = _now(now) + timedelta(days=min_days)
+        first_day = cutoff.date() if cutoff.time() == time.min else cutoff.date() + timedelta(days=1)
+        i = bisect_left(expiries, (first_day, ''))
+        return expiries[i][1] if i < len(expiries) else None
+
+    def is_weekly(self, underlying: str, expiry_str: str) -> bool:
+        """True if the expiry is not the last (monthly) expiry of its month"""
+        expiry_date = parse_expiry(expiry_str)
+        if not expiry_date:
+            return False
+        month = self._months(underlying).get((expiry_date.year, expiry_date.month), [])
+        return bool(month) and month[-1][0] != expiry_date
+
+    def weekly_expiries(self, underlying: str) -> List[str]:
+        """Weekly expiries of an underlying, nearest first"""
+        return [expiry for _, expiry in self.expiries(underlying) if self.is_weekly(underlying, expiry)]
+
+    @staticmethod
+    def days_to_expiry(expiry_str: str, now=None) -> Optional[int]:
+        """Full days left from now until the expiry date's midnight"""
+        expiry_date = parse_expiry(expiry_str)
+        return (datetime.combine(expiry_date, time.min) - _now(now)).days if expiry_date else None
@@ -1,37 +1,128 @@
 import requests
 import re
+import os
+import json
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+SCREENER_URL = "https://chartink.com/screener"
+PROCESS_URL = "https://chartink.com/screener/process"
+
+# Statuses Chartink answers with once the CSRF token or session cookie is stale
+REJECTED_STATUSES = (401, 403, 419)
+
+
+class ChartinkClient:
+    """Chartink screener client that reuses its session and CSRF token
+
+    The screener page is only downloaded again when Chartink rejects the
+    cached token. Several scan clauses can be run concurrently and merged.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, max_workers: int = 4, timeout: float = 30):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.session = requests.Session()
+        self._csrf_token = None
+        self._token_lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        """Get the process-wide Chartink client"""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls(max_workers=int(os.getenv('CHARTINK_MAX_WORKERS', 4)),
+                                    timeout=float(os.getenv('CHARTINK_TIMEOUT', 30)))
+            return cls._instance
+
+    def _get_token(self, stale_token: Optional[str] = None) -> str:
+        """Cached CSRF token; refreshed once if it matches the rejected one"""
+        with self._token_lock:
+            if self._csrf_token is None or self._csrf_token == stale_token:
+                resp = self.session.get(SCREENER_URL, timeout=self.timeout)
+                resp.raise_for_status()
+                # Extract CSRF token from the HTML meta tag
+                self._csrf_token = re.search(r'meta name="csrf-token" content="(.*?)"', resp.text).group(1)
+            return self._csrf_token
+
+    def _post_scan(self, scan_clause: str, csrf_token: str) -> requests.Response:
+        headers = {
+            "User-Agent": "Mozilla/5.0",
+            "X-Requested-With": "XMLHttpRequest",
+            "X-CSRF-TOKEN": csrf_token,
+            "Referer": SCREENER_URL,
+            "Origin": "https://chartink.com",
+        }
+        return self.session.post(PROCESS_URL, data={"scan_clause": scan_clause},
+                                 headers=headers, timeout=self.timeout)
+
+    def scan(self, scan_clause: str) -> List[Dict]:
+        """Run one scan clause and return its rows"""
+        csrf_token = self._get_token()
+        resp = self._post_scan(scan_clause, csrf_token)
+        if resp.status_code in REJECTED_STATUSES:
+            logging.info("🔑 Chartink rejected the cached CSRF token, refreshing")
+            resp = self._post_scan(scan_clause, self._get_token(stale_token=csrf_token))
+        resp.raise_for_status()
+        return resp.json()['data']
+
+    def scan_many(self, scan_clauses: List[str],
+                  fallback: Optional[Callable[[str], List[Dict]]] = None) -> List[Dict]:
+        """Run scan clauses concurrently; rows merged and deduplicated by nsecode
+
+        A clause that fails or times out is handed to fallback, if given.
+        """
+        if not scan_clauses:
+            return []
+
+        try:
+            # Fetch the token up front so concurrent scans don't all download the page
+            self._get_token()
+        except Exception as e:
+            outcomes = [e] * len(scan_clauses)
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(scan_clauses)),
+                                    thread_name_prefix="Chartink") as executor:
+                futures = [executor.submit(self.scan, clause) for clause in scan_clauses]
+            outcomes = [future.exception() or future.result() for future in futures]
+
+        merged = {}
+        for clause, rows in zip(scan_clauses, outcomes):
+            if isinstance(rows, Exception):
+                logging.error(f"❌ Chartink scan failed: {rows} ({clause})")
+                if fallback is None:
+                    continue
+                try:
+                    rows = fallback(clause)
+                except Exception as e:
+                    logging.error(f"❌ Fallback scan failed: {e} ({clause})")
+                    continue
+            for row in rows:
+                merged.setdefault(row.get('nsecode'), row)
+
+        logging.info(f"🔎 Chartink: {len(merged)} unique stocks from {len(scan_clauses)} scans")
+        return list(merged.values())
+
+
+def load_scan_clauses(default: List[str]) -> List[str]:
+    """Scan clauses from the JSON list in CHARTINK_SCANS_FILE, else the default"""
+    path = os.getenv('CHARTINK_SCANS_FILE')
+    if not path:
+        return list(default)
+    try:
+        with open(path) as f:
+            clauses = json.load(f)
+        return [c['scan_clause'] if isinstance(c, dict) else c for c in clauses]
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logging.error(f"❌ Could not load Chartink scans from {path}: {e}")
+        return list(default)
+
 
 def fetch_chartink_data(input_payload):
     """Fetch data from Chartink using CSRF token"""
-    # Step 1: Start a session
-    session = requests.Session()
-    url = "https://chartink.com/screener"
-
-    # Get the screener page
-    resp = session.get(url)
-    html = resp.text
-
-    # Extract CSRF token from the HTML meta tag
-    csrf_token = re.search(r'meta name="csrf-token" content="(.*?)"', html).group(1)
-
-    # print("CSRF Token:", csrf_token)
-
-    # Step 2: Use token in headers for POST
-    post_url = "https://chartink.com/screener/process"
-    headers = {
-        "User-Agent": "Mozilla/5.0",
-        "X-Requested-With": "XMLHttpRequest",
-        "X-CSRF-TOKEN": csrf_token,
-        "Referer": url,
-        "Origin": "https://chartink.com",
-    }
-
-    payload = {
-        "scan_clause": input_payload,
-    }
-
-    resp2 = session.post(post_url, data=payload, headers=headers)
-
-    # print(resp2.json()['data'])
-    data=resp2.json()['data']
-    return data
\ No newline at end of file
+    return ChartinkClient.get_instance().scan(input_payload)
@@ -0,0 +1,95 @@
+import glob
+import os
+import threading
+import logging
+from collections import defaultdict
+from typing import Dict, List, Optional
+from src.utils.scrip_master import ScripMasterStore, segment_filter
+from src.utils.instrument_table import InstrumentTable, compile_instrument_table, table_path_for
+
+# Only the segments we trade are kept in memory
+INDEXED_SEGMENTS = ('NSE', 'NFO', 'MCX')
+
+
+class InstrumentIndex:
+    """Hash index over scrip master rows by (exch_seg, name), token and symbol"""
+
+    def __init__(self, instruments: List[Dict], version: Optional[str] = None):
+        self.version = version
+        self.by_name = defaultdict(list)
+        self.by_token = {}
+        self.by_symbol = {}
+
+        for instrument in instruments:
+            exch_seg = instrument.get('exch_seg', '')
+            name = instrument.get('name', '').upper()
+            self.by_name[(exch_seg, name)].append(instrument)
+
+            token = instrument.get('token')
+            if token:
+                self.by_token[(exch_seg, str(token))] = instrument
+
+            symbol = instrument.get('symbol', '').upper()
+            if symbol:
+                self.by_symbol[(exch_seg, symbol)] = instrument
+
+        logging.info(f"🗂️ Indexed {len(instruments)} instruments ({len(self.by_name)} names)")
+
+    def lookup(self, exch_seg: str, name: str) -> List[Dict]:
+        """Get all instruments for a name on an exchange segment"""
+        return self.by_name.get((exch_seg, name.upper()), [])
+
+    def underlyings(self, exch_seg: str, instrumenttype: str) -> List[str]:
+        """Distinct names with instruments of a type on a segment, e.g. OPTSTK on NFO"""
+        return sorted({
+            instruments[0].get('name', '')
+            for (seg, _), instruments in self.by_name.items()
+            if seg == exch_seg and any(i.get('instrumenttype') == instrumenttype for i in instruments)
+        })
+
+    def get_by_token(self, exch_seg: str, token) -> Optional[Dict]:
+        """Get an instrument by exchange segment and token"""
+        return self.by_token.get((exch_seg, str(token)))
+
+    def get_by_symbol(self, exch_seg: str, symbol: str) -> Optional[Dict]:
+        """Get an instrument by exchange segment and trading symbol"""
+        return self.by_symbol.get((exch_seg, symbol.upper()))
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def _load_instrument_table(store: ScripMasterStore, version: Optional[str]) -> InstrumentTable:
+    """Memory-map the compiled table for this version, compiling it first if needed"""
+    path = table_path_for(store.cache_dir, version)
+    if not os.path.exists(path):
+        compile_instrument_table(store.get_instruments(segment_filter(*INDEXED_SEGMENTS)), path, version)
+        # Tables for older versions are no longer needed; open maps stay valid
+        for old_path in glob.glob(os.path.join(store.cache_dir, 'instrument_table_*.bin')):
+            if old_path != path:
+                try:
+                    os.remove(old_path)
+                except OSError:
+                    pass
+    return InstrumentTable(path)
+
+
+def get_instrument_index():
+    """Get the instrument index for the current scrip master version
+
+    Prefers the memory-mapped InstrumentTable so restarts skip JSON parsing;
+    falls back to the in-memory InstrumentIndex if the table is unusable.
+    """
+    global _index
+    store = ScripMasterStore.get_instance()
+    with _index_lock:
+        store.refresh()
+        version = store.version
+        if _index is None or _index.version != version:
+            try:
+                _index = _load_instrument_table(store, version)
+            except Exception as e:
+                logging.warning(f"⚠️ Instrument table unavailable, building in-memory index: {e}")
+                _index = InstrumentIndex(store.get_instruments(segment_filter(*INDEXED_SEGMENTS)), version)
+        return _index
@@ -0,0 +1,209 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import logging
+from bisect import bisect_left
+from typing import Dict, List, Optional
+import numpy as np
+
+MAGIC = b'INSTTBL1'
+ALIGNMENT = 64
+
+STRING_COLUMNS = ('token', 'symbol', 'name', 'exch_seg', 'expiry', 'instrumenttype')
+
+
+def _to_float(value, default=0.0) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _to_int(value, default=0) -> int:
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return default
+
+
+def _composite(exch_codes: np.ndarray, codes: np.ndarray) -> np.ndarray:
+    return (exch_codes.astype(np.int64) << 32) | codes.astype(np.int64)
+
+
+def table_path_for(cache_dir: str, version: Optional[str]) -> str:
+    """Path of the compiled table for a scrip master version"""
+    digest = hashlib.sha1(str(version).encode('utf-8')).hexdigest()[:12]
+    return os.path.join(cache_dir, f"instrument_table_{digest}.bin")
+
+
+def compile_instrument_table(instruments: List[Dict], path: str, version: Optional[str] = None):
+    """Compile scrip master rows into a columnar, memory-mappable file
+
+    String columns are stored as int32 codes into one sorted, interned string
+    table. Sorted composite keys for (exch_seg, name), (exch_seg, token) and
+    (exch_seg, symbol) are stored alongside so lookups are binary searches.
+    """
+    rows = len(instruments)
+    raw = {column: [inst.get(column, '') or '' for inst in instruments] for column in STRING_COLUMNS}
+    raw['token'] = [str(token) for token in raw['token']]
+    # Upper-cased copies used as lookup keys, so queries stay case-insensitive
+    raw['name_key'] = [name.upper() for name in raw['name']]
+    raw['symbol_key'] = [symbol.upper() for symbol in raw['symbol']]
+
+    strings = sorted(set().union(*raw.values()))
+    codes = {value: i for i, value in enumerate(strings)}
+    encoded = [value.encode('utf-8') for value in strings]
+    string_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=string_offsets[1:])
+
+    arrays = {
+        column: np.fromiter((codes[v] for v in values), dtype=np.int32, count=rows)
+        for column, values in raw.items()
+    }
+    arrays['strike'] = np.fromiter((_to_float(i.get('strike'), -1.0) for i in instruments), dtype=np.float64, count=rows)
+    arrays['lotsize'] = np.fromiter((_to_int(i.get('lotsize'), 1) for i in instruments), dtype=np.int32, count=rows)
+    arrays['tick_size'] = np.fromiter((_to_float(i.get('tick_size')) for i in instruments), dtype=np.float64, count=rows)
+
+    exch = arrays['exch_seg']
+    for key, column in (('name', 'name_key'), ('token', 'token'), ('symbol', 'symbol_key')):
+        composite = _composite(exch, arrays[column])
+        order = np.argsort(composite, kind='stable').astype(np.int32)
+        arrays[f'{key}_order'] = order
+        arrays[f'{key}_keys'] = composite[order]
+
+    arrays['string_offsets'] = string_offsets
+    arrays['string_data'] = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+
+    # Lay out every array at an aligned offset after the header
+    columns = {}
+    offset = 0
+    for column, array in arrays.items():
+        offset = (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+        columns[column] = {'dtype': array.dtype.str, 'offset': offset, 'length': len(array)}
+        offset += array.nbytes
+
+    header = json.dumps({'version': version, 'rows': rows, 'columns': columns}).encode('utf-8')
+    data_start = (len(MAGIC) + 8 + len(header) + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(MAGIC)
+            f.write(struct.pack('<Q', len(header)))
+            f.write(header)
+            for column, array in arrays.items():
+                f.seek(data_start + columns[column]['offset'])
+                f.write(array.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    logging.info(f"🗜️ Compiled {rows} instruments into {path}")
+
+
+class InstrumentTable:
+    """Read-only, memory-mapped view of a compiled instrument table
+
+    Columns are NumPy arrays backed by the shared page cache, so several
+    processes can query the same file without holding a dict per row.
+    Query methods mirror InstrumentIndex and only materialise matched rows.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"Not an instrument table: {path}")
+        (header_len,) = struct.unpack_from('<Q', self._mmap, len(MAGIC))
+        header_start = len(MAGIC) + 8
+        header = json.loads(self._mmap[header_start:header_start + header_len])
+        data_start = (header_start + header_len + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+        self.version = header['version']
+        self.rows = header['rows']
+        self.columns = {
+            column: np.frombuffer(self._mmap, dtype=np.dtype(spec['dtype']), count=spec['length'],
+                                  offset=data_start + spec['offset'])
+            for column, spec in header['columns'].items()
+        }
+        self._string_offsets = self.columns['string_offsets']
+        self._string_data = self.columns['string_data']
+        self._string_count = len(self._string_offsets) - 1
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def string(self, code: int) -> str:
+        """Decode an interned string by its code"""
+        start, end = self._string_offsets[code], self._string_offsets[code + 1]
+        return self._string_data[start:end].tobytes().decode('utf-8')
+
+    def string_code(self, value: str) -> int:
+        """Code of an interned string, -1 if the table has no such string"""
+        i = bisect_left(range(self._string_count), value, key=self.string)
+        if i < self._string_count and self.string(i) == value:
+            return i
+        return -1
+
+    def _find(self, key: str, exch_seg: str, value: str) -> np.ndarray:
+        exch_code = self.string_code(exch_seg)
+        code = self.string_code(value)
+        if exch_code < 0 or code < 0:
+            return np.empty(0, dtype=np.int32)
+        composite = (exch_code << 32) | code
+        keys = self.columns[f'{key}_keys']
+        lo = np.searchsorted(keys, composite, side='left')
+        hi = np.searchsorted(keys, composite, side='right')
+        return self.columns[f'{key}_order'][lo:hi]
+
+    def row_ids(self, exch_seg: str, name: str) -> np.ndarray:
+        """Row ids for a name on an exchange segment, in scrip master order"""
+        return self._find('name', exch_seg, name.upper())
+
+    def row(self, i: int) -> Dict:
+        """Materialise one row in the scrip master's own format"""
+        c = self.columns
+        return {
+            'token': self.string(c['token'][i]),
+            'symbol': self.string(c['symbol'][i]),
+            'name': self.string(c['name'][i]),
+            'expiry': self.string(c['expiry'][i]),
+            'strike': f"{c['strike'][i]:.6f}",
+            'lotsize': str(int(c['lotsize'][i])),
+            'instrumenttype': self.string(c['instrumenttype'][i]),
+            'exch_seg': self.string(c['exch_seg'][i]),
+            'tick_size': f"{c['tick_size'][i]:.6f}"
+        }
+
+    def lookup(self, exch_seg: str, name: str) -> List[Dict]:
+        """Get all instruments for a name on an exchange segment"""
+        return [self.row(i) for i in self.row_ids(exch_seg, name)]
+
+    def underlyings(self, exch_seg: str, instrumenttype: str) -> List[str]:
+        """Distinct names with instruments of a type on a segment, e.g. OPTSTK on NFO"""
+        exch_code = self.string_code(exch_seg)
+        type_code = self.string_code(instrumenttype)
+        if exch_code < 0 or type_code < 0:
+            return []
+        c = self.columns
+        mask = (c['exch_seg'] == exch_code) & (c['instrumenttype'] == type_code)
+        return sorted(self.string(code) for code in np.unique(c['name'][mask]))
+
+    def get_by_token(self, exch_seg: str, token) -> Optional[Dict]:
+        """Get an instrument by exchange segment and token"""
+        ids = self._find('token', exch_seg, str(token))
+        return self.row(ids[-1]) if len(ids) else None
+
+    def get_by_symbol(self, exch_seg: str, symbol: str) -> Optional[Dict]:
+        """Get an instrument by exchange segment and trading symbol"""
+        ids = self._find('symbol', exch_seg, symbol.upper())
+        return self.row(ids[-1]) if len(ids) else None
@@ -0,0 +1,86 @@
+import codecs
+import json
+from typing import Callable, Dict, Iterable, Iterator, Optional
+
+CHUNK_SIZE = 64 * 1024
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+
+
+def iter_json_array(chunks: Iterable) -> Iterator:
+    """Incrementally yield the elements of a top-level JSON array
+
+    Only one element is decoded at a time, so a multi-MB array never has to be
+    held in memory as a whole. Chunks may be bytes (UTF-8) or str.
+    """
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    chunk_iter = iter(chunks)
+    buf = ''
+    pos = 0
+    eof = False
+    started = False
+
+    def read_more():
+        nonlocal buf, pos, eof
+        try:
+            chunk = next(chunk_iter)
+        except StopIteration:
+            eof = True
+            buf = buf[pos:] + utf8.decode(b'', final=True)
+            pos = 0
+            return
+        if isinstance(chunk, bytes):
+            chunk = utf8.decode(chunk)
+        buf = buf[pos:] + chunk
+        pos = 0
+
+    while True:
+        # Skip whitespace and element separators
+        while pos < len(buf) and (buf[pos] in _WHITESPACE or (started and buf[pos] == ',')):
+            pos += 1
+        if pos >= len(buf):
+            if eof:
+                raise ValueError("Unexpected end of JSON array")
+            read_more()
+            continue
+
+        if not started:
+            if buf[pos] != '[':
+                raise ValueError("Expected a JSON array")
+            started = True
+            pos += 1
+            continue
+
+        if buf[pos] == ']':
+            return
+
+        try:
+            value, end = _decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            read_more()
+            continue
+
+        # Accept a value only once the delimiter after it has arrived: a number cut at
+        # the chunk edge ("1." or "1.5e") may still decode as a shorter valid prefix
+        after = end
+        while after < len(buf) and buf[after] in _WHITESPACE:
+            after += 1
+        if after >= len(buf) or buf[after] not in ',]':
+            if not eof:
+                read_more()
+                continue
+            raise ValueError(f"Expected ',' or ']' after array element at position {after}")
+
+        pos = end
+        yield value
+
+
+def iter_json_file(path: str, predicate: Optional[Callable[[Dict], bool]] = None) -> Iterator:
+    """Stream the elements of a JSON array file, keeping only those matching predicate"""
+    with open(path, 'rb') as f:
+        for item in iter_json_array(iter(lambda: f.read(CHUNK_SIZE), b'')):
+            if predicate is None or predicate(item):
+                yield item
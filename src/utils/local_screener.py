@@ -0,0 +1,246 @@
+import re
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+from src.utils.candle_store import CandleStore
+from src.utils.instrument_index import get_instrument_index
+
+FIELDS = ('open', 'high', 'low', 'close', 'volume')
+COMPARISONS = {
+    '<': np.less, '<=': np.less_equal, '>': np.greater,
+    '>=': np.greater_equal, '=': np.equal, '!=': np.not_equal,
+}
+ARITHMETIC = {'+': np.add, '-': np.subtract, '*': np.multiply, '/': np.divide}
+
+TOKEN_PATTERN = re.compile(r'\s*(\{\w+\}|<=|>=|!=|[()<>=+\-*/]|\d+(?:\.\d+)?|[A-Za-z_]+)')
+
+
+class UnsupportedClause(ValueError):
+    """Raised for scan clause syntax the local screener does not understand"""
+
+
+def tokenize(clause: str) -> List[str]:
+    tokens, pos = [], 0
+    clause = clause.strip()
+    while pos < len(clause):
+        match = TOKEN_PATTERN.match(clause, pos)
+        if not match:
+            raise UnsupportedClause(f"Unexpected input at {pos}: {clause[pos:pos + 20]!r}")
+        tokens.append(match.group(1).lower())
+        pos = match.end()
+    return tokens
+
+
+class ClauseParser:
+    """Recursive-descent parser for the daily-candle subset of Chartink clauses
+
+    Supported:
+        ( {segment} ( condition and/or condition ... ) )
+        condition := operand (< | <= | > | >= | = | !=) operand
+        operand   := term ((+ | -) term)*,  term := atom ((* | /) atom)*
+        atom      := number | [N day(s) ago] [daily | latest] open|high|low|close|volume
+
+    Segment ids like {33489} are accepted and ignored; the screener runs
+    over the F&O universe.
+    """
+
+    def __init__(self, clause: str):
+        self.tokens = tokenize(clause)
+        self.pos = 0
+
+    def parse(self):
+        node = self._expr()
+        if self.pos != len(self.tokens):
+            raise UnsupportedClause(f"Unexpected token {self.tokens[self.pos]!r}")
+        return node
+
+    def _peek(self) -> Optional[str]:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def _take(self, expected: Optional[str] = None) -> str:
+        token = self._peek()
+        if token is None or (expected is not None and token != expected):
+            raise UnsupportedClause(f"Expected {expected or 'token'}, got {token!r}")
+        self.pos += 1
+        return token
+
+    def _expr(self):
+        nodes = [self._and()]
+        while self._peek() == 'or':
+            self._take()
+            nodes.append(self._and())
+        return nodes[0] if len(nodes) == 1 else ('or', nodes)
+
+    def _and(self):
+        nodes = [self._factor()]
+        while self._peek() == 'and':
+            self._take()
+            nodes.append(self._factor())
+        return nodes[0] if len(nodes) == 1 else ('and', nodes)
+
+    def _factor(self):
+        if self._peek() == '(':
+            self._take('(')
+            if self._peek() and self._peek().startswith('{'):
+                self._take()  # Segment selector
+                if self._peek() == ')':
+                    self._take(')')
+                    return ('true',)
+            node = self._expr()
+            self._take(')')
+            return node
+        lhs = self._operand()
+        op = self._take()
+        if op not in COMPARISONS:
+            raise UnsupportedClause(f"Unsupported comparison {op!r}")
+        return ('cmp', op, lhs, self._operand())
+
+    def _operand(self):
+        node = self._term()
+        while self._peek() in ('+', '-'):
+            op = self._take()
+            node = ('arith', op, node, self._term())
+        return node
+
+    def _term(self):
+        node = self._atom()
+        while self._peek() in ('*', '/'):
+            op = self._take()
+            node = ('arith', op, node, self._atom())
+        return node
+
+    def _atom(self):
+        token = self._peek()
+        if token is None:
+            raise UnsupportedClause("Unexpected end of clause")
+
+        ago = 0
+        if re.fullmatch(r'\d+(\.\d+)?', token):
+            self._take()
+            if self._peek() not in ('day', 'days'):
+                return ('num', float(token))
+            self._take()
+            self._take('ago')
+            ago = int(float(token))
+
+        if self._peek() in ('daily', 'latest'):
+            self._take()
+        field = self._take()
+        if field not in FIELDS:
+            raise UnsupportedClause(f"Unsupported field {field!r}")
+        return ('field', field, ago)
+
+
+def parse_clause(clause: str):
+    """Parse a scan clause into a small expression tree"""
+    return ClauseParser(clause).parse()
+
+
+def max_lookback(node) -> int:
+    """Largest 'N days ago' offset used by an expression tree"""
+    kind = node[0]
+    if kind == 'field':
+        return node[2]
+    if kind in ('and', 'or'):
+        return max(max_lookback(child) for child in node[1])
+    if kind in ('cmp', 'arith'):
+        return max(max_lookback(node[2]), max_lookback(node[3]))
+    return 0
+
+
+def evaluate(node, panel: Dict[str, np.ndarray], rows: int) -> np.ndarray:
+    """Evaluate an expression tree over (stocks x days) arrays, latest day last"""
+    kind = node[0]
+    if kind == 'true':
+        return np.ones(rows, dtype=bool)
+    if kind == 'num':
+        return np.full(rows, node[1])
+    if kind == 'field':
+        values = panel[node[1]]
+        return values[:, values.shape[1] - 1 - node[2]]
+    if kind == 'arith':
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return ARITHMETIC[node[1]](evaluate(node[2], panel, rows), evaluate(node[3], panel, rows))
+    if kind == 'cmp':
+        # Missing candles are NaN, which never satisfies a comparison (not even !=)
+        lhs, rhs = evaluate(node[2], panel, rows), evaluate(node[3], panel, rows)
+        with np.errstate(invalid='ignore'):
+            return COMPARISONS[node[1]](lhs, rhs) & ~(np.isnan(lhs) | np.isnan(rhs))
+    if kind == 'and':
+        return np.logical_and.reduce([evaluate(child, panel, rows) for child in node[1]])
+    if kind == 'or':
+        return np.logical_or.reduce([evaluate(child, panel, rows) for child in node[1]])
+    raise UnsupportedClause(f"Unknown node {kind!r}")
+
+
+class LocalScreener:
+    """Evaluates Chartink-style scan clauses over the local daily candle store
+
+    Returns the same {'nsecode', 'name'} records as Chartink so the result
+    can be passed straight to get_stock_details.
+    """
+
+    def __init__(self, smart_api=None, candle_store: Optional[CandleStore] = None, max_workers: int = 4):
+        self.smart_api = smart_api
+        self.candle_store = candle_store or CandleStore.get_instance()
+        self.max_workers = max_workers
+        self._universe = None
+
+    def universe(self) -> List[Dict]:
+        """F&O stocks: OPTSTK underlyings with a matching NSE equity"""
+        if self._universe is None:
+            index = get_instrument_index()
+            universe = []
+            for name in index.underlyings('NFO', 'OPTSTK'):
+                equity = index.get_by_symbol('NSE', f"{name}-EQ")
+                if equity:
+                    universe.append({'nsecode': name, 'name': name, 'token': str(equity['token'])})
+            self._universe = universe
+            logging.info(f"🌐 F&O universe: {len(universe)} stocks")
+        return self._universe
+
+    def refresh(self, start_date, end_date):
+        """Backfill missing daily candles for the whole universe"""
+        if self.smart_api is None:
+            return
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="Backfill") as executor:
+            for stock in self.universe():
+                executor.submit(self.candle_store.get_daily_candles, self.smart_api, "NSE",
+                                stock['token'], start_date, end_date)
+
+    def load_panel(self, days: int, end_date=None) -> Dict[str, np.ndarray]:
+        """(stocks x days) arrays per field for the latest `days` trading dates"""
+        end_date = end_date or datetime.now()
+        # Calendar window wide enough to cover weekends and holidays
+        start_date = end_date - timedelta(days=days * 2 + 7)
+        tokens = [stock['token'] for stock in self.universe()]
+
+        candles = pd.DataFrame(
+            self.candle_store.get_candles_bulk("NSE", tokens, "ONE_DAY", start_date, end_date),
+            columns=['token', 'date', *FIELDS]
+        )
+        dates = sorted(candles['date'].unique())[-days:]
+        return {
+            field: candles.pivot(index='token', columns='date', values=field)
+                          .reindex(index=tokens, columns=dates).to_numpy(dtype=float)
+            for field in FIELDS
+        }
+
+    def screen(self, clause: str, refresh: bool = False, end_date=None) -> List[Dict]:
+        """Stocks matching a scan clause, as Chartink-style records"""
+        tree = parse_clause(clause)
+        days = max_lookback(tree) + 1
+        end_date = end_date or datetime.now()
+        if refresh:
+            self.refresh(end_date - timedelta(days=days * 2 + 7), end_date)
+
+        panel = self.load_panel(days, end_date)
+        if panel['close'].shape[1] < days:
+            logging.warning(f"⚠️ Local screener has {panel['close'].shape[1]}/{days} days of candles")
+            return []
+
+        mask = evaluate(tree, panel, len(self.universe()))
+        return [{'nsecode': s['nsecode'], 'name': s['name']} for s, hit in zip(self.universe(), mask) if hit]
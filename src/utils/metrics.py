@@ -0,0 +1,154 @@
+import threading
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence
+
+# Upper bounds in seconds for latency histograms; one overflow bucket is added
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _PerThreadCells:
+    """One mutable cell per writing thread, so writers never share state
+
+    A thread creates its cell on first write; readers sum over all cells.
+    Cells of finished threads are kept so totals never go backwards.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._local = threading.local()
+        self._cells = []
+        self._lock = threading.Lock()
+
+    def local(self):
+        try:
+            return self._local.cell
+        except AttributeError:
+            cell = self._local.cell = self._factory()
+            with self._lock:
+                self._cells.append(cell)
+            return cell
+
+    def all(self) -> List:
+        with self._lock:
+            return list(self._cells)
+
+
+class Counter:
+    """Monotonic count; inc() touches only the calling thread's cell"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._cells = _PerThreadCells(lambda: [0])
+
+    def inc(self, amount: int = 1):
+        self._cells.local()[0] += amount
+
+    def value(self) -> int:
+        return sum(cell[0] for cell in self._cells.all())
+
+
+class Gauge:
+    """Last-set value, or the running maximum via set_max()"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def set(self, value: float):
+        self._value = value
+
+    def set_max(self, value: float):
+        if value > self._value:
+            with self._lock:
+                if value > self._value:
+                    self._value = value
+
+    def value(self) -> float:
+        return self._value
+
+
+class _HistogramCell:
+    __slots__ = ('counts', 'total')
+
+    def __init__(self, size: int):
+        self.counts = [0] * size
+        self.total = 0.0
+
+
+class Histogram:
+    """Fixed-bucket distribution with per-thread bucket counts"""
+
+    def __init__(self, name: str, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.buckets = tuple(sorted(buckets))
+        self._cells = _PerThreadCells(lambda: _HistogramCell(len(self.buckets) + 1))
+
+    def observe(self, value: float):
+        cell = self._cells.local()
+        cell.counts[bisect_left(self.buckets, value)] += 1
+        cell.total += value
+
+    def snapshot(self) -> Dict:
+        counts = [0] * (len(self.buckets) + 1)
+        total = 0.0
+        for cell in self._cells.all():
+            for i, count in enumerate(cell.counts):
+                counts[i] += count
+            total += cell.total
+
+        count = sum(counts)
+        return {
+            'count': count,
+            'sum': round(total, 6),
+            'mean': round(total / count, 6) if count else 0.0,
+            'p50': self._quantile(counts, count, 0.50),
+            'p95': self._quantile(counts, count, 0.95),
+            'p99': self._quantile(counts, count, 0.99),
+            'buckets': {**{str(le): n for le, n in zip(self.buckets, counts)}, '+Inf': counts[-1]},
+        }
+
+    def _quantile(self, counts: List[int], count: int, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile (None if it overflowed)"""
+        if not count:
+            return 0.0
+        seen = 0
+        for i, n in enumerate(counts):
+            seen += n
+            if seen >= q * count:
+                return self.buckets[i] if i < len(self.buckets) else None
+        return None
+
+
+class MetricsRegistry:
+    """Named counters, gauges and histograms, aggregated only when snapshotted"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Counter] = {}
+        self._gauges: Dict[str, Gauge] = {}
+        self._histograms: Dict[str, Histogram] = {}
+
+    def counter(self, name: str) -> Counter:
+        with self._lock:
+            return self._counters.setdefault(name, Counter(name))
+
+    def gauge(self, name: str) -> Gauge:
+        with self._lock:
+            return self._gauges.setdefault(name, Gauge(name))
+
+    def histogram(self, name: str, buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        with self._lock:
+            return self._histograms.setdefault(name, Histogram(name, buckets))
+
+    def snapshot(self) -> Dict:
+        """Plain-dict copy of every metric, safe to serialize or hand to another thread"""
+        with self._lock:
+            counters = list(self._counters.values())
+            gauges = list(self._gauges.values())
+            histograms = list(self._histograms.values())
+        return {
+            'counters': {counter.name: counter.value() for counter in counters},
+            'gauges': {gauge.name: gauge.value() for gauge in gauges},
+            'histograms': {histogram.name: histogram.snapshot() for histogram in histograms},
+        }
@@ -0,0 +1,81 @@
+import math
+from typing import Dict, Optional
+from src.utils.analysis_artifact import LEVEL_FIELDS
+
+
+def _float(value, default: float = 0.0) -> float:
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return default
+    return default if math.isnan(value) else value
+
+
+class MonitoredOption:
+    """One option leg watched by the live monitor, with its levels as plain floats
+
+    The tick path reads buy_entry/target/stoploss straight off the object
+    instead of walking the nested analysis dicts; id is the option's
+    position in the monitor's list.
+    """
+
+    __slots__ = (
+        'id', 'token', 'symbol', 'option_type', 'expiry', 'strike', 'lotsize',
+        'stock_name', 'stock_symbol', 'stock_day_high', 'day_open', 'has_levels',
+        'buy_entry', 'target', 'stoploss', 'risk_reward_ratio', 'upside_potential', 'downside_risk',
+        'unique_id',
+    )
+
+    def __init__(self, id: int, token: str, symbol: str, option_type: str, expiry: str = '',
+                 strike: float = 0.0, lotsize: int = 0, stock_name: str = '', stock_symbol: str = '',
+                 stock_day_high: float = 0.0, day_open: float = 0.0, levels: Optional[Dict] = None):
+        self.id = id
+        self.token = token
+        self.symbol = symbol
+        self.option_type = option_type
+        self.expiry = expiry
+        self.strike = strike
+        self.lotsize = lotsize
+        self.stock_name = stock_name
+        self.stock_symbol = stock_symbol
+        self.stock_day_high = stock_day_high
+        self.day_open = day_open
+        self.has_levels = bool(levels)
+        levels = levels or {}
+        self.buy_entry = _float(levels.get('buy_entry'))
+        self.target = _float(levels.get('target'))
+        self.stoploss = _float(levels.get('stoploss'))
+        self.risk_reward_ratio = _float(levels.get('risk_reward_ratio'))
+        self.upside_potential = _float(levels.get('upside_potential'))
+        self.downside_risk = _float(levels.get('downside_risk'))
+        self.unique_id = f"{symbol}_{option_type}"
+
+    @classmethod
+    def from_analysis(cls, id: int, option: Dict, option_type: str, stock: Dict, stock_day_high) -> 'MonitoredOption':
+        """Build from one leg of an analysis JSON result"""
+        return cls(
+            id=id,
+            token=str(option['token']),
+            symbol=option.get('symbol', ''),
+            option_type=option_type,
+            expiry=option.get('expiry', ''),
+            strike=_float(option.get('strike')),
+            lotsize=int(_float(option.get('lotsize'))),
+            stock_name=stock.get('name', ''),
+            stock_symbol=stock.get('symbol', ''),
+            stock_day_high=_float(stock_day_high),
+            day_open=_float((option.get('option_ohlc') or {}).get('day_open')),
+            levels=option.get('trading_levels'),
+        )
+
+    @property
+    def alert_key(self) -> str:
+        return self.unique_id
+
+    @property
+    def trading_levels(self) -> Dict[str, float]:
+        """Levels in the analysis dict format, empty if the leg has none"""
+        return {field: getattr(self, field) for field in LEVEL_FIELDS} if self.has_levels else {}
+
+    def __repr__(self) -> str:
+        return f"MonitoredOption({self.id}, {self.symbol!r}, token={self.token!r})"
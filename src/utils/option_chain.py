@@ -0,0 +1,126 @@
+import logging
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from src.utils.expiry_calendar import ExpiryCalendar
+
+
+class OptionChainSide:
+    """CE or PE contracts of one underlying and expiry, sorted by strike"""
+
+    __slots__ = ('option_type', 'expiry', 'strikes', 'tokens', 'symbols', 'lotsizes')
+
+    def __init__(self, option_type: str, expiry: str, contracts: List[Dict]):
+        contracts = sorted(contracts, key=lambda c: c['strike'])
+        self.option_type = option_type
+        self.expiry = expiry
+        self.strikes = [c['strike'] for c in contracts]
+        self.tokens = [c['token'] for c in contracts]
+        self.symbols = [c['symbol'] for c in contracts]
+        self.lotsizes = [c['lotsize'] for c in contracts]
+
+    def __len__(self) -> int:
+        return len(self.strikes)
+
+    def nearest_below(self, value: float, k: int = 1) -> List[Dict]:
+        """Up to k contracts with strike strictly below value, nearest first"""
+        i = bisect_left(self.strikes, value)
+        return [self.contract(j) for j in range(i - 1, max(i - 1 - k, -1), -1)]
+
+    def nearest_above(self, value: float, k: int = 1) -> List[Dict]:
+        """Up to k contracts with strike strictly above value, nearest first"""
+        i = bisect_right(self.strikes, value)
+        return [self.contract(j) for j in range(i, min(i + k, len(self.strikes)))]
+
+    def contract(self, i: int) -> Dict:
+        """Contract at position i in the legacy option dict format"""
+        return {
+            'symbol': self.symbols[i],
+            'token': self.tokens[i],
+            'strike': self.strikes[i],
+            'type': self.option_type,
+            'expiry': self.expiry,
+            'lotsize': self.lotsizes[i]
+        }
+
+
+class OptionChainIndex:
+    """Option contracts grouped as underlying -> expiry -> CE/PE strike arrays"""
+
+    def __init__(self, options: List[Dict]):
+        grouped = defaultdict(lambda: defaultdict(lambda: {'CE': [], 'PE': []}))
+        seen_tokens = set()
+        self.calendar = ExpiryCalendar()
+
+        for option in options:
+            option_symbol = option.get('symbol', '')
+            option_type = option_symbol[-2:]
+            # Overlapping screens can list the same contract twice
+            if option_type not in ('CE', 'PE') or option.get('token') in seen_tokens:
+                continue
+            seen_tokens.add(option.get('token'))
+
+            expiry = option.get('expiry', '')
+            underlying = option.get('name', '').upper()
+            self.calendar.add(underlying, expiry)
+            grouped[underlying][expiry][option_type].append({
+                'symbol': option_symbol,
+                'token': option.get('token'),
+                # Strike is stored with 2 implied decimals in the scrip master
+                'strike': float(option.get('strike', 0)) / 100,
+                'lotsize': option.get('lotsize', 1)
+            })
+
+        self.chains = {
+            underlying: {
+                expiry: {option_type: OptionChainSide(option_type, expiry, contracts)
+                         for option_type, contracts in sides.items()}
+                for expiry, sides in expiries.items()
+            }
+            for underlying, expiries in grouped.items()
+        }
+        logging.info(f"🔗 Indexed option chains for {len(self.chains)} underlyings")
+
+    def get_chain(self, underlying: str) -> Dict[str, Dict[str, OptionChainSide]]:
+        """Expiry -> {'CE': side, 'PE': side} for an underlying"""
+        return self.chains.get(underlying.upper(), {})
+
+    def get_side(self, underlying: str, expiry: str, option_type: str) -> Optional[OptionChainSide]:
+        """Sorted CE or PE strikes for an underlying and expiry"""
+        return self.get_chain(underlying).get(expiry, {}).get(option_type)
+
+    def contracts(self, underlying: str) -> List[Dict]:
+        """All contracts of an underlying in the legacy option dict format"""
+        return [
+            side.contract(i)
+            for sides in self.get_chain(underlying).values()
+            for side in sides.values()
+            for i in range(len(side))
+        ]
+
+    def current_month_expiry(self, underlying: str, today: Optional[datetime] = None) -> Optional[str]:
+        """Nearest expiry of an underlying that falls in the current month"""
+        return self.calendar.current_month(underlying, today)
+
+    def select_strikes(self, underlying: str, day_high: float, expiry: Optional[str] = None,
+                       k: int = 3) -> Tuple[Optional[Dict], Optional[Dict], List[Dict], List[Dict]]:
+        """Nearest CE strike below and PE strike above day_high by binary search
+
+        Returns (best_ce, best_pe, ce_candidates, pe_candidates) where each
+        candidate list holds the best strike followed by up to k alternatives.
+        """
+        expiry = expiry or self.current_month_expiry(underlying)
+        ce_side = self.get_side(underlying, expiry, 'CE') if expiry else None
+        pe_side = self.get_side(underlying, expiry, 'PE') if expiry else None
+
+        ce_candidates = ce_side.nearest_below(day_high, k + 1) if ce_side else []
+        pe_candidates = pe_side.nearest_above(day_high, k + 1) if pe_side else []
+
+        best_ce = ce_candidates[0] if ce_candidates else None
+        best_pe = pe_candidates[0] if pe_candidates else None
+        return best_ce, best_pe, ce_candidates, pe_candidates
+
+    def select_strikes_batch(self, requests: List[Tuple[str, float]], k: int = 3) -> Dict[str, Tuple]:
+        """Run select_strikes for many (underlying, day_high) pairs in one call"""
+        return {underlying: self.select_strikes(underlying, day_high, k=k) for underlying, day_high in requests}
@@ -0,0 +1,197 @@
+import asyncio
+import threading
+import time
+import logging
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Angel One SmartAPI published limits as (requests, per seconds) windows
+SMARTAPI_LIMITS = {
+    'historical': [(3, 1), (180, 60), (5000, 3600)],   # getCandleData
+    'ltp': [(10, 1), (500, 60), (5000, 3600)],         # ltpData
+    'quote': [(10, 1), (500, 60), (5000, 3600)],       # getMarketData
+    'order': [(20, 1), (500, 60), (1000, 3600)],       # placeOrder / modifyOrder
+}
+
+THROTTLE_MARKERS = ('exceeding access rate', 'too many requests', 'rate limit')
+
+
+class RateLimitExceeded(Exception):
+    """A broker call was still throttled after every retry"""
+
+    def __init__(self, endpoint: str, response=None):
+        super().__init__(f"{endpoint} still throttled after retries: {response}")
+        self.endpoint = endpoint
+        self.response = response
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at capacity / period tokens per second"""
+
+    def __init__(self, capacity: int, period: float):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until one token is available"""
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def consume(self):
+        self.tokens -= 1
+
+
+class EndpointLimiter:
+    """All rate windows of one endpoint class plus adaptive throttle backoff"""
+
+    def __init__(self, name: str, limits: List[Tuple[int, float]],
+                 base_backoff: float = 1.0, max_backoff: float = 30.0):
+        self.name = name
+        self.buckets = [TokenBucket(capacity, period) for capacity, period in limits]
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self._backoff = base_backoff
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take a token from every window, or return how long to wait first"""
+        with self._lock:
+            now = time.monotonic()
+            wait = max([self._blocked_until - now] + [b.wait_time(now) for b in self.buckets])
+            if wait > 0:
+                return wait
+            for bucket in self.buckets:
+                bucket.consume()
+            return 0.0
+
+    def acquire(self):
+        """Block the calling thread until a request may be sent"""
+        while True:
+            wait = self._reserve()
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """Wait without blocking the event loop until a request may be sent"""
+        while True:
+            wait = self._reserve()
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    def on_throttled(self):
+        """Pause this endpoint after a throttle response, doubling the pause each time"""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + self._backoff)
+            logging.warning(f"⏳ {self.name} throttled, backing off {self._backoff:.1f}s")
+            self._backoff = min(self._backoff * 2, self.max_backoff)
+
+    def on_success(self):
+        """Reset the backoff once requests go through again"""
+        with self._lock:
+            self._backoff = self.base_backoff
+
+
+class RateLimiter:
+    """Shared, thread-safe and asyncio-aware limiter keyed by endpoint class"""
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, limits: Optional[Dict[str, List[Tuple[int, float]]]] = None):
+        self.limiters = {name: EndpointLimiter(name, windows) for name, windows in (limits or SMARTAPI_LIMITS).items()}
+
+    @classmethod
+    def get_instance(cls):
+        """Get the process-wide limiter"""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def __getitem__(self, endpoint: str) -> EndpointLimiter:
+        return self.limiters[endpoint]
+
+    def acquire(self, endpoint: str):
+        self.limiters[endpoint].acquire()
+
+    async def acquire_async(self, endpoint: str):
+        await self.limiters[endpoint].acquire_async()
+
+
+def is_throttle_response(response) -> bool:
+    """True if a SmartAPI response or error says we exceeded the rate limit"""
+    if isinstance(response, dict):
+        text = f"{response.get('message', '')} {response.get('errorcode', '')}"
+    else:
+        text = str(response)
+    text = text.lower()
+    return any(marker in text for marker in THROTTLE_MARKERS)
+
+
+def rate_limited_call(endpoint: str, func: Callable, *args, retries: int = 3, **kwargs):
+    """Call a broker API under the shared limit, retrying after throttle responses
+
+    Raises RateLimitExceeded if the last attempt is still throttled; the
+    endpoint stays backed off in that case.
+    """
+    limiter = RateLimiter.get_instance()[endpoint]
+    for attempt in range(retries + 1):
+        limiter.acquire()
+        try:
+            response = func(*args, **kwargs)
+        except Exception as e:
+            if not is_throttle_response(e):
+                raise
+            limiter.on_throttled()
+            if attempt < retries:
+                continue
+            raise RateLimitExceeded(endpoint, e) from e
+
+        if is_throttle_response(response):
+            limiter.on_throttled()
+            if attempt < retries:
+                continue
+            raise RateLimitExceeded(endpoint, response)
+
+        limiter.on_success()
+        return response
+
+
+async def rate_limited_call_async(endpoint: str, func: Callable, *args, retries: int = 3, **kwargs):
+    """rate_limited_call for the event loop
+
+    Waits for the limit without blocking the loop. Coroutine functions are
+    awaited; blocking functions (the SmartAPI client) run in a worker thread.
+    """
+    limiter = RateLimiter.get_instance()[endpoint]
+    for attempt in range(retries + 1):
+        await limiter.acquire_async()
+        try:
+            if asyncio.iscoroutinefunction(func):
+                response = await func(*args, **kwargs)
+            else:
+                response = await asyncio.to_thread(func, *args, **kwargs)
+        except Exception as e:
+            if not is_throttle_response(e):
+                raise
+            limiter.on_throttled()
+            if attempt < retries:
+                continue
+            raise RateLimitExceeded(endpoint, e) from e
+
+        if is_throttle_response(response):
+            limiter.on_throttled()
+            if attempt < retries:
+                continue
+            raise RateLimitExceeded(endpoint, response)
+
+        limiter.on_success()
+        return response
@@ -0,0 +1,105 @@
+import os
+import threading
+import time
+import logging
+from concurrent.futures import Future
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+DEFAULT_TTL = float(os.getenv('BROKER_CACHE_TTL', 300))  # Seconds a response is reused within a run
+
+
+def is_successful_response(response) -> bool:
+    """Only keep responses the broker marked as successful"""
+    if isinstance(response, dict) and 'status' in response:
+        return bool(response['status'])
+    return response is not None
+
+
+class RequestCache:
+    """Coalesces identical in-flight broker calls and memoizes results with a TTL
+
+    The first caller of a key runs the request; concurrent callers of the same
+    key wait on its future. Successful results are served until they expire,
+    failures are never cached. clear() starts a new generation, so requests
+    still in flight from before it do not store their results.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, ttl: float = DEFAULT_TTL):
+        self.ttl = ttl
+        self._entries: Dict[Hashable, Tuple[float, Future]] = {}
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def get_instance(cls):
+        """Get the process-wide request cache"""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def call(self, key: Hashable, func: Callable, *args, ttl: Optional[float] = None,
+             should_cache: Callable = is_successful_response, **kwargs):
+        """Return func(*args, **kwargs), sharing the result with identical calls"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and (not entry[1].done() or entry[0] > time.monotonic()):
+                self.hits += 1
+                future = entry[1]
+                owner = False
+            else:
+                self.misses += 1
+                future = Future()
+                # In flight: never expires until the owner settles it
+                self._entries[key] = (float('inf'), future)
+                owner = True
+            generation = self._generation
+
+        if not owner:
+            return future.result()
+
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as e:
+            with self._lock:
+                self._release(key, future)
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            if should_cache(result) and generation == self._generation:
+                self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), future)
+            else:
+                self._release(key, future)
+        future.set_result(result)
+        return result
+
+    def _release(self, key: Hashable, future: Future):
+        """Drop key if it still holds this future (callers hold the lock)"""
+        entry = self._entries.get(key)
+        if entry and entry[1] is future:
+            del self._entries[key]
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Drop everything, e.g. at the start of a new run"""
+        with self._lock:
+            if self.hits or self.misses:
+                logging.info(f"🗂️ Request cache: {self.hits} hits, {self.misses} misses")
+            self._entries.clear()
+            self._generation += 1
+            self.hits = 0
+            self.misses = 0
+
+
+def memoized_call(key: Hashable, func: Callable, *args, **kwargs):
+    """Call through the shared request cache"""
+    return RequestCache.get_instance().call(key, func, *args, **kwargs)
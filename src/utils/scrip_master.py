@@ -0,0 +1,147 @@
+import json
+import os
+import tempfile
+import threading
+import logging
+import requests
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional
+from src.utils.json_stream import iter_json_file
+from src.utils.timezone_utils import get_ist_now
+
+SCRIP_MASTER_URL = "https://margincalculator.angelbroking.com/OpenAPI_File/files/OpenAPIScripMaster.json"
+
+
+class ScripMasterStore:
+    """Shared on-disk copy of Angel One's OpenAPIScripMaster.json
+
+    The file is downloaded at most once per trading day (IST), revalidated with
+    conditional requests and replaced atomically so that readers in other
+    threads or processes never see a partially written file.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, cache_dir: Optional[str] = None, url: str = SCRIP_MASTER_URL):
+        self.cache_dir = cache_dir or os.getenv('SCRIP_MASTER_CACHE_DIR', 'cache')
+        self.url = url
+        self.data_path = os.path.join(self.cache_dir, 'OpenAPIScripMaster.json')
+        self.meta_path = os.path.join(self.cache_dir, 'OpenAPIScripMaster.meta.json')
+        self._refresh_lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        """Get the process-wide store"""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    @classmethod
+    def reset_instance(cls):
+        """Reset the shared store (for testing purposes)"""
+        with cls._instance_lock:
+            cls._instance = None
+
+    def _read_meta(self) -> Dict:
+        """Read cache metadata, empty if missing or unreadable"""
+        try:
+            with open(self.meta_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _atomic_write(self, path: str, chunks):
+        """Write chunks to a temp file in the cache dir and move it into place"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix='.tmp_')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in chunks:
+                    if chunk:
+                        f.write(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _write_meta(self, meta: Dict):
+        self._atomic_write(self.meta_path, [json.dumps(meta, indent=2).encode('utf-8')])
+
+    @property
+    def version(self) -> Optional[str]:
+        """Identifier of the cached scrip master content"""
+        return self._read_meta().get('version')
+
+    def refresh(self, force: bool = False) -> str:
+        """Make sure the cached file is current for today and return its path"""
+        with self._refresh_lock:
+            meta = self._read_meta()
+            today = get_ist_now().date().isoformat()
+            has_file = os.path.exists(self.data_path)
+
+            if has_file and not force and meta.get('checked_date') == today:
+                return self.data_path
+
+            headers = {}
+            if has_file:
+                if meta.get('etag'):
+                    headers['If-None-Match'] = meta['etag']
+                if meta.get('last_modified'):
+                    headers['If-Modified-Since'] = meta['last_modified']
+
+            try:
+                with requests.get(self.url, headers=headers, timeout=60, stream=True) as response:
+                    if response.status_code == 304 and has_file:
+                        meta['checked_date'] = today
+                        self._write_meta(meta)
+                        logging.info("✅ Scrip master unchanged, using cached copy")
+                        return self.data_path
+
+                    response.raise_for_status()
+                    logging.info("📥 Downloading scrip master from Angel One...")
+                    self._atomic_write(self.data_path, response.iter_content(chunk_size=1024 * 1024))
+
+                    etag = response.headers.get('ETag')
+                    last_modified = response.headers.get('Last-Modified')
+                    fetched_at = datetime.now().isoformat()
+                    self._write_meta({
+                        'etag': etag,
+                        'last_modified': last_modified,
+                        'version': etag or last_modified or fetched_at,
+                        'fetched_at': fetched_at,
+                        'checked_date': today
+                    })
+                    logging.info(f"💾 Scrip master cached at {self.data_path}")
+
+            except Exception as e:
+                if has_file:
+                    logging.warning(f"⚠️ Scrip master refresh failed, using cached copy: {e}")
+                    return self.data_path
+                raise
+
+            return self.data_path
+
+    def iter_instruments(self, predicate: Optional[Callable[[Dict], bool]] = None) -> Iterator[Dict]:
+        """Stream instruments from the cached scrip master, filtering while parsing"""
+        path = self.refresh()
+        return iter_json_file(path, predicate)
+
+    def get_instruments(self, predicate: Optional[Callable[[Dict], bool]] = None) -> List[Dict]:
+        """Get instruments from the cached scrip master, optionally filtered"""
+        return list(self.iter_instruments(predicate))
+
+
+def segment_filter(*exch_segs: str) -> Callable[[Dict], bool]:
+    """Build a predicate keeping only rows from the given exchange segments"""
+    segments = set(exch_segs)
+    return lambda instrument: instrument.get('exch_seg') in segments
+
+
+def get_scrip_master_instruments(predicate: Optional[Callable[[Dict], bool]] = None) -> List[Dict]:
+    """Get instruments from the shared scrip master store"""
+    return ScripMasterStore.get_instance().get_instruments(predicate)
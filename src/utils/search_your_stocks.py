@@ -1,12 +1,9 @@
-import requests
 import json
+from src.utils.instrument_index import get_instrument_index
 
 def get_stock_details(stock_data):
     """Search for your specific stocks"""
-    url = "https://margincalculator.angelbroking.com/OpenAPI_File/files/OpenAPIScripMaster.json"
-    
-    response = requests.get(url)
-    instruments = response.json()
+    index = get_instrument_index()
     
     # Your stocks data
     # your_stocks = [
@@ -29,19 +26,9 @@ def get_stock_details(stock_data):
         # print(f"\n🎯 Searching: {company_name} ({nse_code})")
         # print("-" * 50)
         
-        for instrument in instruments:
-            name = instrument.get('name', '').upper()
-            symbol = instrument.get('symbol', '').upper()
-
-            
-            # Search by company name
-            if nse_code.upper()== name and instrument["exch_seg"]=="NSE":
-                # print(instrument)
-                # print("Token:", instrument.get('token'))
-                found_stocks.append(instrument)
-            elif instrument["exch_seg"]=="NFO" and nse_code.upper()==name:
-                
-                found_options.append(instrument)
+        # O(1) lookups per stock instead of scanning the whole scrip master
+        found_stocks.extend(index.lookup('NSE', nse_code))
+        found_options.extend(index.lookup('NFO', nse_code))
 
     stock_data={
         'stocks':found_stocks,
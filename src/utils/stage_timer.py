@@ -0,0 +1,49 @@
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+
+class StageTimer:
+    """Wall-clock durations of named pipeline stages, with an optional deadline"""
+
+    def __init__(self, budget: Optional[float] = None):
+        self.budget = budget
+        self.started = time.monotonic()
+        self.deadline = self.started + budget if budget else None
+        self.durations: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+
+    @contextmanager
+    def stage(self, name: str, count: Optional[int] = None):
+        """Time a block; repeated stages accumulate"""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.durations[name] = self.durations.get(name, 0.0) + time.monotonic() - start
+            if count is not None:
+                self.counts[name] = self.counts.get(name, 0) + count
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left before the deadline, None without a budget"""
+        return None if self.deadline is None else max(0.0, self.deadline - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def as_dict(self) -> Dict[str, Dict]:
+        return {
+            name: {'seconds': round(seconds, 3), **({'items': self.counts[name]} if name in self.counts else {})}
+            for name, seconds in self.durations.items()
+        }
+
+    def report(self) -> str:
+        """One line per stage plus the total"""
+        lines = [f"⏱️ Stage timings ({self.elapsed():.2f}s total)"]
+        for name, seconds in self.durations.items():
+            items = f" ({self.counts[name]} items)" if name in self.counts else ""
+            lines.append(f"   {name:<16} {seconds:8.2f}s{items}")
+        return "\n".join(lines)
@@ -0,0 +1,132 @@
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from src.utils.monitored_option import MonitoredOption
+
+# position_state values: IDLE -> ENTRY_TRIGGERED -> ACTIVE -> TARGET | STOPLOSS
+POSITION_IDLE = 0
+POSITION_ENTRY_TRIGGERED = 1
+POSITION_ACTIVE = 2
+POSITION_TARGET = 3
+POSITION_STOPLOSS = 4
+
+OPEN_POSITION_STATES = (POSITION_ENTRY_TRIGGERED, POSITION_ACTIVE)
+CLOSED_POSITION_STATES = (POSITION_TARGET, POSITION_STOPLOSS)
+TRIGGERED_POSITION_STATES = (*OPEN_POSITION_STATES, *CLOSED_POSITION_STATES)
+
+
+class TickState:
+    """The monitor's per-option hot state as parallel NumPy arrays
+
+    Row i belongs to options[i] (whose id is i); index maps a feed token to
+    its row. Levels are copied in once at load; LTPs, alert times and
+    position states are updated in place as ticks arrive.
+
+    position_state is a state machine with a single writer: only the
+    thread evaluating ticks calls advance() or evaluate_batch(). Each
+    transition is returned as an event ('entry', 'target' or 'stoploss')
+    for the caller to hand off; an entry becomes ACTIVE on the option's
+    next evaluated tick, so one tick never both enters and exits.
+    """
+
+    def __init__(self, options: List[MonitoredOption]):
+        self.options = options
+        self.index: Dict[str, int] = {option.token: option.id for option in options}
+
+        self.buy_entry = np.array([option.buy_entry for option in options], dtype=np.float64)
+        self.target = np.array([option.target for option in options], dtype=np.float64)
+        self.stoploss = np.array([option.stoploss for option in options], dtype=np.float64)
+        self.has_levels = np.array([option.has_levels for option in options], dtype=bool)
+
+        self.ltp = np.zeros(len(options), dtype=np.float64)
+        self.last_alert_time = np.zeros(len(options), dtype=np.float64)
+        self.position_state = np.zeros(len(options), dtype=np.int8)
+
+    def __len__(self) -> int:
+        return len(self.options)
+
+    def count(self, *states: int) -> int:
+        # Readers on other threads work on a copy; the writer may change states mid-call
+        return int(np.isin(self.position_state.copy(), states).sum())
+
+    def unique_ids(self, *states: int) -> List[str]:
+        """unique_ids of the options currently in any of the given states"""
+        return [self.options[i].unique_id for i in np.flatnonzero(np.isin(self.position_state.copy(), states))]
+
+    def advance(self, i: int, ltp: float, now: float, cooldown: float) -> Optional[str]:
+        """Apply one tick to row i and return the event of the transition it caused, if any"""
+        self.ltp[i] = ltp
+        if not self.has_levels[i] or now - self.last_alert_time[i] < cooldown:
+            return None
+
+        state = self.position_state[i]
+        if state == POSITION_IDLE:
+            if ltp < self.buy_entry[i]:
+                return None
+            self.position_state[i] = POSITION_ENTRY_TRIGGERED
+            event = 'entry'
+        elif state == POSITION_ENTRY_TRIGGERED or state == POSITION_ACTIVE:
+            if ltp >= self.target[i]:
+                self.position_state[i] = POSITION_TARGET
+                event = 'target'
+            elif ltp <= self.stoploss[i]:
+                self.position_state[i] = POSITION_STOPLOSS
+                event = 'stoploss'
+            else:
+                self.position_state[i] = POSITION_ACTIVE
+                return None
+        else:
+            return None
+
+        self.last_alert_time[i] = now
+        return event
+
+    def evaluate_batch(self, rows: np.ndarray, ltps: np.ndarray, now: float,
+                       cooldown: float) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        """Apply a batch of (row, ltp) ticks, in arrival order, and advance every crossing row in one pass
+
+        A row's transition is decided by its first tick that crosses a level,
+        so a spike inside the window still crosses, and a row reaching both
+        target and stoploss exits at whichever came first (target on the same
+        tick, as in advance()). Returns event -> (rows, trigger prices) for
+        the rows that changed state; the price is that of the crossing tick.
+        """
+        self.ltp[rows] = ltps  # last tick of each row wins
+
+        ticks = np.arange(len(rows))
+        unique_rows, inverse = np.unique(rows, return_inverse=True)
+
+        def first_tick(crossed: np.ndarray) -> np.ndarray:
+            """Index of each unique row's first crossing tick, len(rows) if none"""
+            first = np.full(len(unique_rows), len(rows))
+            np.minimum.at(first, inverse[crossed], ticks[crossed])
+            return first
+
+        first_entry = first_tick(ltps >= self.buy_entry[rows])
+        first_target = first_tick(ltps >= self.target[rows])
+        first_stoploss = first_tick(ltps <= self.stoploss[rows])
+
+        rows = unique_rows
+        ready = self.has_levels[rows] & (now - self.last_alert_time[rows] >= cooldown)
+        state = self.position_state[rows]
+        is_open = ready & np.isin(state, OPEN_POSITION_STATES)
+
+        entry = ready & (state == POSITION_IDLE) & (first_entry < len(ticks))
+        target = is_open & (first_target < len(ticks)) & (first_target <= first_stoploss)
+        stoploss = is_open & (first_stoploss < first_target)
+
+        self.position_state[rows[is_open]] = POSITION_ACTIVE
+        self.position_state[rows[entry]] = POSITION_ENTRY_TRIGGERED
+        self.position_state[rows[target]] = POSITION_TARGET
+        self.position_state[rows[stoploss]] = POSITION_STOPLOSS
+        self.last_alert_time[rows[entry | target | stoploss]] = now
+        return {
+            'entry': (rows[entry], ltps[first_entry[entry]]),
+            'target': (rows[target], ltps[first_target[target]]),
+            'stoploss': (rows[stoploss], ltps[first_stoploss[stoploss]]),
+        }
+
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in (
+            self.buy_entry, self.target, self.stoploss, self.has_levels,
+            self.ltp, self.last_alert_time, self.position_state,
+        ))
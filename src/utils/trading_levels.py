@@ -0,0 +1,85 @@
+from typing import Dict, Optional
+import numpy as np
+
+OPTION_LEVEL_COLUMNS = ('buy_entry', 'target', 'stoploss', 'risk_reward_ratio', 'upside_potential', 'downside_risk')
+
+
+def round_each(values: np.ndarray, decimals: int) -> np.ndarray:
+    """Python's round() on every element (a per-element loop, only for exact_rounding)"""
+    return np.fromiter((round(value, decimals) for value in values.tolist()), dtype=float, count=values.size)
+
+
+def option_breakout_levels(day_highs, ltps, entry_offset: float = 0.01, target_pct: float = 0.05,
+                           stoploss_pct: float = 0.05, decimals: Optional[int] = 2,
+                           exact_rounding: bool = False) -> Dict[str, np.ndarray]:
+    """Breakout levels above each option's day high, computed for all contracts at once
+
+    Entry is day_high + entry_offset, target and stoploss are day_high
+    scaled by +/- the given fractions. Upside/downside are percentages of
+    the LTP and 0 where the LTP is missing or zero.
+
+    decimals rounds every level with np.round (None keeps full precision).
+    np.round scales by 10**decimals first, so on values that sit on a tie in
+    decimal it can differ from round() by one unit in the last place, e.g.
+    np.round(2.675, 2) is 2.68 where round(2.675, 2) is 2.67. exact_rounding
+    uses round() per element instead, at the cost of a Python loop.
+    """
+    day_highs = np.asarray(day_highs, dtype=float)
+    ltps = np.nan_to_num(np.asarray(ltps, dtype=float))
+
+    buy_entry = day_highs + entry_offset
+    target = day_highs * (1 + target_pct)
+    stoploss = day_highs * (1 - stoploss_pct)
+
+    risk = buy_entry - stoploss
+    reward = target - buy_entry
+    has_ltp = ltps != 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        risk_reward_ratio = np.where(risk > 0, reward / risk, 0.0)
+        upside_potential = np.where(has_ltp, (target - ltps) / ltps * 100, 0.0)
+        downside_risk = np.where(has_ltp, (ltps - stoploss) / ltps * 100, 0.0)
+
+    levels = {
+        'buy_entry': buy_entry,
+        'target': target,
+        'stoploss': stoploss,
+        'risk_reward_ratio': risk_reward_ratio,
+        'upside_potential': upside_potential,
+        'downside_risk': downside_risk,
+    }
+    if decimals is not None:
+        round_levels = round_each if exact_rounding else np.round
+        levels = {column: round_levels(values, decimals) for column, values in levels.items()}
+    return levels
+
+
+def range_levels(highs, lows, entry_pct: float = 0.1, target_pct: float = 0.15,
+                 stoploss_pct: float = 0.05) -> Dict[str, np.ndarray]:
+    """Buy/sell levels inside each contract's high-low range
+
+    highs and lows are (contracts x days) arrays, or 1-D for one contract;
+    the range is the max high and min low across the days. Entries sit
+    entry_pct of the range inside the low/high, targets and stoplosses are
+    target_pct and stoploss_pct of the range beyond the entries.
+    """
+    range_high = np.nanmax(np.atleast_2d(np.asarray(highs, dtype=float)), axis=-1)
+    range_low = np.nanmin(np.atleast_2d(np.asarray(lows, dtype=float)), axis=-1)
+    price_range = range_high - range_low
+
+    buy_entry = range_low + price_range * entry_pct
+    sell_entry = range_high - price_range * entry_pct
+    return {
+        'three_day_high': range_high,
+        'three_day_low': range_low,
+        'buy_entry': buy_entry,
+        'buy_target': buy_entry + price_range * target_pct,
+        'buy_sl': buy_entry - price_range * stoploss_pct,
+        'sell_entry': sell_entry,
+        'sell_target': sell_entry - price_range * target_pct,
+        'sell_sl': sell_entry + price_range * stoploss_pct,
+    }
+
+
+def levels_row(levels: Dict[str, np.ndarray], i: int) -> Dict[str, float]:
+    """One contract's levels as plain floats"""
+    return {column: float(values[i]) for column, values in levels.items()}
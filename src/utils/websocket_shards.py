@@ -0,0 +1,148 @@
+import os
+import time
+import logging
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from SmartApi.smartWebSocketV2 import SmartWebSocketV2
+
+# Angel One SmartAPI limits: tokens per WebSocket connection, concurrent connections per client
+DEFAULT_TOKENS_PER_CONNECTION = 1000
+DEFAULT_MAX_CONNECTIONS = 3
+
+NFO_EXCHANGE_TYPE = 2  # 2 = NFO, 1 = NSE, 13 = BSE
+LTP_MODE = 1  # 1 = LTP, 2 = Quote, 3 = Snap Quote
+
+
+def partition_tokens(tokens: Sequence[str], per_connection: Optional[int] = None,
+                     max_connections: Optional[int] = None) -> Tuple[List[List[str]], List[str]]:
+    """Split tokens into at most max_connections chunks of per_connection
+
+    Returns (shards, dropped); dropped holds the tokens beyond the account's
+    total capacity so the caller can report them.
+    """
+    per_connection = per_connection or int(os.getenv('WS_TOKENS_PER_CONNECTION', DEFAULT_TOKENS_PER_CONNECTION))
+    max_connections = max_connections or int(os.getenv('WS_MAX_CONNECTIONS', DEFAULT_MAX_CONNECTIONS))
+
+    capacity = per_connection * max_connections
+    tokens = list(tokens)
+    shards = [tokens[i:i + per_connection] for i in range(0, min(len(tokens), capacity), per_connection)]
+    return shards, tokens[capacity:]
+
+
+class WebSocketShard:
+    """One SmartWebSocketV2 connection subscribed to a slice of the tokens
+
+    Runs its own receive thread, subscribes (again) whenever the socket
+    opens, forwards every message to on_tick and keeps its own health:
+    status, tick count, last tick time and open/error counts. The status
+    becomes FAILED once the client stops reconnecting.
+    """
+
+    def __init__(self, shard_id: int, tokens: List[str], auth_token: str, api_key: str, client_code: str,
+                 feed_token: str, on_tick: Callable, on_status: Optional[Callable] = None,
+                 exchange_type: int = NFO_EXCHANGE_TYPE, mode: int = LTP_MODE):
+        self.shard_id = shard_id
+        self.tokens = tokens
+        self.exchange_type = exchange_type
+        self.mode = mode
+        self.correlation_id = f"option_monitor_{shard_id:03d}"
+        self.on_tick = on_tick
+        self.on_status = on_status
+
+        self.status = 'CREATED'
+        self.opens = 0
+        self.errors = 0
+        self.ticks = 0
+        self.last_tick_time = None
+        self.last_error = None
+
+        self.web_socket = SmartWebSocketV2(
+            auth_token=auth_token,
+            api_key=api_key,
+            client_code=client_code,
+            feed_token=feed_token
+        )
+        self.web_socket.on_open = self._on_open
+        self.web_socket.on_data = self._on_data
+        self.web_socket.on_error = self._on_error
+        self.web_socket.on_close = self._on_close
+        self.thread = None
+
+    @property
+    def is_connected(self) -> bool:
+        return self.status == 'CONNECTED'
+
+    def start(self):
+        self.status = 'CONNECTING'
+        self.thread = threading.Thread(
+            target=self._run,
+            name=f"WebSocketShard-{self.shard_id}",
+            daemon=True
+        )
+        self.thread.start()
+
+    def _run(self):
+        try:
+            self.web_socket.connect()
+        except Exception as e:
+            self.errors += 1
+            self.last_error = str(e)
+            logging.error(f"Shard {self.shard_id}: WebSocket connect failed: {e}")
+        
+        # connect() only returns once the client has given up reconnecting
+        if self.status != 'CLOSED':
+            logging.error(f"Shard {self.shard_id}: WebSocket stopped reconnecting")
+            self._set_status('FAILED')
+
+    def close(self):
+        self.status = 'CLOSED'
+        try:
+            self.web_socket.close_connection()
+        except Exception as e:
+            logging.error(f"Error closing WebSocket shard {self.shard_id}: {e}")
+
+    def _set_status(self, status: str):
+        self.status = status
+        if self.on_status:
+            self.on_status(self)
+
+    def _on_open(self, wsapp):
+        self.opens += 1
+        try:
+            token_list = [{"exchangeType": self.exchange_type, "tokens": self.tokens}]
+            result = self.web_socket.subscribe(self.correlation_id, self.mode, token_list)
+            logging.info(f"Shard {self.shard_id}: subscribed {len(self.tokens)} tokens ({result})")
+        except Exception as e:
+            # Even if subscription fails, we might still get data if the connection is established
+            logging.error(f"Shard {self.shard_id}: subscription failed: {e}")
+        self._set_status('CONNECTED')
+
+    def _on_data(self, wsapp, message):
+        self.ticks += 1
+        self.last_tick_time = time.time()
+        self.on_tick(wsapp, message)
+
+    def _on_error(self, wsapp, error):
+        self.errors += 1
+        self.last_error = str(error)
+        logging.error(f"Shard {self.shard_id}: WebSocket error: {error}")
+        self._set_status('DISCONNECTED')
+
+    def _on_close(self, wsapp):
+        if self.status != 'CLOSED':
+            logging.warning(f"Shard {self.shard_id}: WebSocket connection closed")
+            self._set_status('DISCONNECTED')
+
+    def health(self) -> Dict:
+        return {
+            'shard': self.shard_id,
+            'status': self.status,
+            'tokens': len(self.tokens),
+            'ticks': self.ticks,
+            'last_tick': datetime.fromtimestamp(self.last_tick_time).isoformat() if self.last_tick_time else None,
+            'opens': self.opens,
+            'errors': self.errors,
+            'last_error': self.last_error,
+            'thread_alive': bool(self.thread and self.thread.is_alive()),
+        }
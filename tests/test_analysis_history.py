@@ -0,0 +1,65 @@
+from src.utils.analysis_history import AnalysisHistory
+
+
+def _result(name, ce_token, pe_token=None, buy_entry=110.0):
+    options = {'ce': {'token': ce_token, 'symbol': f"{name}28OCT25100CE", 'strike': 100, 'ltp': 105,
+                      'expiry': '28OCT2025', 'lotsize': '50',
+                      'trading_levels': {'buy_entry': buy_entry, 'target': 130, 'stoploss': 95}}}
+    if pe_token:
+        options['pe'] = {'token': pe_token, 'symbol': f"{name}28OCT25120PE", 'strike': 120, 'ltp': 'n/a'}
+    return {'stock': {'name': name, 'symbol': f"{name}-EQ"}, 'historical': {'high': 115}, 'options': options}
+
+
+def _output(analysis_time, *results):
+    return {'analysis_time': analysis_time, 'stocks_analyzed': len(results), 'results': list(results)}
+
+
+def _history(tmp_path):
+    history = AnalysisHistory(str(tmp_path / 'history' / 'analysis.sqlite3'))
+    history.record_run(_output('2025-10-06T09:20:00', _result('TCS', '1', '2'), _result('INFY', '3')), source='chartink')
+    history.record_run(_output('2025-10-07T09:20:00', _result('TCS', '1', buy_entry=112.5)), source='universe')
+    return history
+
+
+def test_runs_are_listed_newest_first_and_filtered_by_date(tmp_path):
+    history = _history(tmp_path)
+
+    runs = history.runs()
+    assert [(run['analysis_date'], run['source'], run['stocks_analyzed']) for run in runs] == [
+        ('2025-10-07', 'universe', 1), ('2025-10-06', 'chartink', 2)]
+    assert [run['analysis_date'] for run in history.runs(start_date='2025-10-07')] == ['2025-10-07']
+    assert history.runs(end_date='2025-10-05') == []
+    assert len(history.runs(limit=1)) == 1
+
+
+def test_every_leg_is_stored_with_its_underlying(tmp_path):
+    history = _history(tmp_path)
+
+    legs = history.selections(end_date='2025-10-06')
+    assert [(leg['underlying'], leg['token'], leg['option_type']) for leg in legs] == [
+        ('TCS', '1', 'CE'), ('TCS', '2', 'PE'), ('INFY', '3', 'CE')]
+    assert legs[0]['buy_entry'] == 110.0 and legs[0]['lotsize'] == 50
+
+
+def test_missing_numbers_are_stored_as_null(tmp_path):
+    pe_leg = _history(tmp_path).selections(token='2')[0]
+
+    assert pe_leg['ltp'] is None
+    assert pe_leg['buy_entry'] is None
+
+
+def test_selections_filter_by_underlying_token_and_run(tmp_path):
+    history = _history(tmp_path)
+
+    assert [leg['buy_entry'] for leg in history.selections(underlying='tcs', token='1')] == [112.5, 110.0]
+    assert [leg['underlying'] for leg in history.selections(run_id=2)] == ['TCS']
+    assert history.selections(underlying='SBIN') == []
+
+
+def test_run_without_results_records_no_legs(tmp_path):
+    history = AnalysisHistory(str(tmp_path / 'analysis.sqlite3'))
+
+    run_id = history.record_run({'results': []})
+
+    assert history.runs()[0]['run_id'] == run_id
+    assert history.selections(run_id=run_id) == []
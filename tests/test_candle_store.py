@@ -0,0 +1,90 @@
+from datetime import date, datetime, timedelta
+from src.utils.candle_store import CandleStore
+from src.utils.request_cache import RequestCache
+
+
+class FakeSmartApi:
+    """getCandleData returning one candle per day of the requested range"""
+
+    def __init__(self):
+        self.calls = []
+
+    def getCandleData(self, params):
+        start = datetime.strptime(params['fromdate'], '%Y-%m-%d %H:%M').date()
+        end = datetime.strptime(params['todate'], '%Y-%m-%d %H:%M').date()
+        self.calls.append((start, end))
+        days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+        return {'status': True, 'data': [[f"{day.isoformat()}T00:00:00+05:30", 1, 2, 0.5, 1.5, 100] for day in days]}
+
+
+def _store(tmp_path):
+    RequestCache.get_instance().clear()
+    return CandleStore(str(tmp_path / 'candles.sqlite3'))
+
+
+def test_non_adjacent_fetches_leave_the_gap_missing(tmp_path):
+    store, api = _store(tmp_path), FakeSmartApi()
+    store.get_daily_candles(api, 'NSE', '1', date(2025, 9, 1), date(2025, 9, 7))
+    store.get_daily_candles(api, 'NSE', '1', date(2025, 9, 20), date(2025, 9, 27))
+
+    candles = store.get_daily_candles(api, 'NSE', '1', date(2025, 9, 8), date(2025, 9, 18))
+
+    assert api.calls[-1] == (date(2025, 9, 8), date(2025, 9, 18))
+    assert len(candles) == 11
+
+
+def test_only_uncovered_days_are_fetched(tmp_path):
+    store, api = _store(tmp_path), FakeSmartApi()
+    store.get_daily_candles(api, 'NSE', '1', date(2025, 9, 1), date(2025, 9, 7))
+    store.get_daily_candles(api, 'NSE', '1', date(2025, 9, 20), date(2025, 9, 27))
+    store.get_daily_candles(api, 'NSE', '1', date(2025, 9, 8), date(2025, 9, 18))
+    api.calls.clear()
+
+    candles = store.get_daily_candles(api, 'NSE', '1', date(2025, 9, 1), date(2025, 9, 27))
+
+    assert api.calls == [(date(2025, 9, 19), date(2025, 9, 19))]
+    assert len(candles) == 27
+    assert store.missing_ranges('NSE', '1', 'ONE_DAY', date(2025, 9, 1), date(2025, 9, 27)) == []
+
+
+def test_touching_ranges_merge(tmp_path):
+    store, api = _store(tmp_path), FakeSmartApi()
+    for start, end in ((date(2025, 9, 1), date(2025, 9, 4)), (date(2025, 9, 10), date(2025, 9, 12)),
+                       (date(2025, 9, 5), date(2025, 9, 9))):
+        store.get_daily_candles(api, 'NSE', '1', start, end)
+
+    assert [(f, t) for f, t, _ in store._coverage('NSE', '1', 'ONE_DAY')] == [(date(2025, 9, 1), date(2025, 9, 12))]
+
+
+def test_day_fetched_before_close_is_refetched(tmp_path):
+    store = _store(tmp_path)
+    store._add_coverage('NSE', '1', 'ONE_DAY', date(2025, 9, 1), date(2025, 9, 5), datetime(2025, 9, 5, 11, 0))
+
+    assert store.missing_ranges('NSE', '1', 'ONE_DAY', date(2025, 9, 1), date(2025, 9, 5)) == \
+        [(date(2025, 9, 5), date(2025, 9, 5))]
+
+
+def test_non_final_day_is_not_merged_into_a_later_range(tmp_path):
+    store = _store(tmp_path)
+    store._add_coverage('NSE', '1', 'ONE_DAY', date(2025, 9, 1), date(2025, 9, 5), datetime(2025, 9, 5, 11, 0))
+    store._add_coverage('NSE', '1', 'ONE_DAY', date(2025, 9, 6), date(2025, 9, 8), datetime(2025, 9, 8, 16, 0))
+
+    assert store.missing_ranges('NSE', '1', 'ONE_DAY', date(2025, 9, 1), date(2025, 9, 8)) == \
+        [(date(2025, 9, 5), date(2025, 9, 5))]
+
+
+def test_days_after_the_fetch_stay_missing(tmp_path):
+    store = _store(tmp_path)
+    store._add_coverage('NSE', '1', 'ONE_DAY', date(2025, 9, 1), date(2025, 9, 10), datetime(2025, 9, 5, 16, 0))
+
+    assert store.missing_ranges('NSE', '1', 'ONE_DAY', date(2025, 9, 1), date(2025, 9, 10)) == \
+        [(date(2025, 9, 6), date(2025, 9, 10))]
+
+
+def test_fetch_time_is_taken_in_ist(tmp_path, monkeypatch):
+    store, api = _store(tmp_path), FakeSmartApi()
+    # 16:00 IST is after the NSE close, whatever the host's local time
+    monkeypatch.setattr('src.utils.candle_store.get_ist_now', lambda: datetime(2025, 9, 5, 16, 0))
+    store.get_daily_candles(api, 'NSE', '1', date(2025, 9, 1), date(2025, 9, 5))
+
+    assert store.missing_ranges('NSE', '1', 'ONE_DAY', date(2025, 9, 1), date(2025, 9, 5)) == []
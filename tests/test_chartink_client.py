@@ -0,0 +1,130 @@
+import json
+import pytest
+import requests
+from src.utils.get_chartlink_data import ChartinkClient, load_scan_clauses
+
+PAGE = '<meta name="csrf-token" content="token-{}">'
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, text='', data=None):
+        self.status_code = status_code
+        self.text = text
+        self._data = data
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} error")
+
+    def json(self):
+        return {'data': self._data}
+
+
+class FakeSession:
+    """Chartink stand-in: rows per clause, failing clauses, optional stale first token"""
+
+    def __init__(self, rows, failing=(), reject_first_token=False, page_status=200):
+        self.rows = rows
+        self.failing = set(failing)
+        self.reject_first_token = reject_first_token
+        self.page_status = page_status
+        self.page_loads = 0
+        self.posts = []
+
+    def get(self, url, timeout=None):
+        self.page_loads += 1
+        return FakeResponse(self.page_status, PAGE.format(self.page_loads))
+
+    def post(self, url, data=None, headers=None, timeout=None):
+        clause = data['scan_clause']
+        self.posts.append((clause, headers['X-CSRF-TOKEN']))
+        if self.reject_first_token and headers['X-CSRF-TOKEN'] == 'token-1':
+            return FakeResponse(419)
+        if clause in self.failing:
+            return FakeResponse(500)
+        return FakeResponse(data=self.rows[clause])
+
+
+def _client(session):
+    client = ChartinkClient(max_workers=2, timeout=1)
+    client.session = session
+    return client
+
+
+def test_scan_many_merges_rows_by_nsecode_with_one_page_load():
+    session = FakeSession({'a': [{'nsecode': 'TCS', 'close': 1}, {'nsecode': 'INFY'}],
+                           'b': [{'nsecode': 'TCS', 'close': 2}, {'nsecode': 'SBIN'}]})
+
+    rows = _client(session).scan_many(['a', 'b'])
+
+    assert [row['nsecode'] for row in rows] == ['TCS', 'INFY', 'SBIN']
+    assert rows[0]['close'] == 1
+    assert session.page_loads == 1
+    assert {token for _, token in session.posts} == {'token-1'}
+
+
+def test_rejected_token_is_refreshed_once_and_reused():
+    session = FakeSession({'a': [{'nsecode': 'TCS'}]}, reject_first_token=True)
+    client = _client(session)
+
+    assert client.scan('a') == [{'nsecode': 'TCS'}]
+    assert client.scan('a') == [{'nsecode': 'TCS'}]
+    assert session.page_loads == 2
+    assert [token for _, token in session.posts] == ['token-1', 'token-2', 'token-2']
+
+
+def test_failed_clause_goes_to_the_fallback():
+    session = FakeSession({'a': [{'nsecode': 'TCS'}]}, failing={'b'})
+    fallback_calls = []
+
+    def fallback(clause):
+        fallback_calls.append(clause)
+        return [{'nsecode': 'LOCAL'}]
+
+    rows = _client(session).scan_many(['a', 'b'], fallback=fallback)
+
+    assert fallback_calls == ['b']
+    assert [row['nsecode'] for row in rows] == ['TCS', 'LOCAL']
+
+
+def test_failed_clause_without_fallback_is_skipped():
+    session = FakeSession({'a': [{'nsecode': 'TCS'}]}, failing={'b'})
+
+    assert _client(session).scan_many(['a', 'b']) == [{'nsecode': 'TCS'}]
+
+
+def test_unreachable_screener_falls_back_for_every_clause():
+    session = FakeSession({}, page_status=503)
+
+    def fallback(clause):
+        if clause == 'b':
+            raise ValueError('bad clause')
+        return [{'nsecode': clause.upper()}]
+
+    assert _client(session).scan_many(['a', 'b'], fallback=fallback) == [{'nsecode': 'A'}]
+    assert session.posts == []
+
+
+def test_scan_many_without_clauses_makes_no_requests():
+    session = FakeSession({})
+
+    assert _client(session).scan_many([]) == []
+    assert session.page_loads == 0
+
+
+def test_scan_clauses_are_loaded_from_file(tmp_path, monkeypatch):
+    path = tmp_path / 'scans.json'
+    path.write_text(json.dumps(['( close > 100 )', {'scan_clause': '( volume > 1000 )'}]))
+    monkeypatch.setenv('CHARTINK_SCANS_FILE', str(path))
+
+    assert load_scan_clauses(['default']) == ['( close > 100 )', '( volume > 1000 )']
+
+
+@pytest.mark.parametrize('content', [None, 'not json', '[{"clause": "x"}]'])
+def test_unusable_scans_file_uses_the_default(tmp_path, monkeypatch, content):
+    path = tmp_path / 'scans.json'
+    if content is not None:
+        path.write_text(content)
+    monkeypatch.setenv('CHARTINK_SCANS_FILE', str(path))
+
+    assert load_scan_clauses(['default']) == ['default']
@@ -0,0 +1,70 @@
+from datetime import date, datetime
+import pytest
+from src.utils.expiry_calendar import ExpiryCalendar, parse_expiry
+
+EXPIRIES = ['04NOV2025', '21OCT2025', '07OCT2025', '28OCT2025', '14OCT2025', '25NOV2025']
+
+
+@pytest.fixture
+def calendar():
+    calendar = ExpiryCalendar()
+    for expiry in EXPIRIES:
+        calendar.add('nifty', expiry)
+    return calendar
+
+
+def test_parse_expiry_returns_none_for_non_dates():
+    assert parse_expiry('28OCT2025') == date(2025, 10, 28)
+    assert parse_expiry('') is None
+    assert parse_expiry(None) is None
+
+
+def test_expiries_are_sorted_and_invalid_ones_ignored(calendar):
+    calendar.add('NIFTY', 'garbage')
+    calendar.add('NIFTY', '07OCT2025')
+
+    assert [expiry for _, expiry in calendar.expiries('Nifty')] == [
+        '07OCT2025', '14OCT2025', '21OCT2025', '28OCT2025', '04NOV2025', '25NOV2025']
+
+
+def test_current_month_skips_expired_dates(calendar):
+    assert calendar.current_month('NIFTY', date(2025, 10, 1)) == '07OCT2025'
+    assert calendar.current_month('NIFTY', date(2025, 10, 14)) == '14OCT2025'
+    assert calendar.current_month('NIFTY', datetime(2025, 10, 15, 9, 15)) == '21OCT2025'
+    assert calendar.current_month('NIFTY', date(2025, 10, 29)) is None
+
+
+def test_next_month_is_the_first_expiry_of_the_following_month(calendar):
+    assert calendar.next_month('NIFTY', date(2025, 10, 31)) == '04NOV2025'
+    assert calendar.next_month('NIFTY', date(2025, 11, 1)) is None
+
+
+def test_min_days_cutoff_at_midnight_includes_that_day(calendar):
+    now = datetime(2025, 10, 7)
+
+    assert calendar.nearest_with_min_days('NIFTY', 7, now) == '14OCT2025'
+    assert ExpiryCalendar.days_to_expiry('14OCT2025', now) == 7
+
+
+def test_min_days_cutoff_during_the_day_rolls_to_the_next_expiry(calendar):
+    now = datetime(2025, 10, 7, 10, 30)
+
+    assert calendar.nearest_with_min_days('NIFTY', 7, now) == '21OCT2025'
+    assert ExpiryCalendar.days_to_expiry('14OCT2025', now) == 6
+
+
+def test_min_days_beyond_the_last_expiry_finds_nothing(calendar):
+    assert calendar.nearest_with_min_days('NIFTY', 60, datetime(2025, 10, 7)) is None
+    assert calendar.nearest_with_min_days('BANKNIFTY', 0, datetime(2025, 10, 7)) is None
+
+
+def test_weekly_expiries_exclude_the_last_expiry_of_each_month(calendar):
+    assert calendar.is_weekly('NIFTY', '14OCT2025')
+    assert not calendar.is_weekly('NIFTY', '28OCT2025')
+    assert not calendar.is_weekly('NIFTY', 'garbage')
+    assert calendar.weekly_expiries('NIFTY') == ['07OCT2025', '14OCT2025', '21OCT2025', '04NOV2025']
+
+
+def test_days_to_expiry_accepts_dates_and_bad_strings():
+    assert ExpiryCalendar.days_to_expiry('28OCT2025', date(2025, 10, 20)) == 8
+    assert ExpiryCalendar.days_to_expiry('bad', date(2025, 10, 20)) is None
@@ -0,0 +1,44 @@
+import json
+import pytest
+from src.utils.json_stream import iter_json_array, iter_json_file
+
+DOCUMENTS = [
+    '[]',
+    '[1.5e3]',
+    '[1.5e3, 2]',
+    '[ -12.5E-3 , 0 , 10 ]',
+    '[true, false, null]',
+    '["a", "caf\\u00e9", "naïve ₹ 100", "quote \\" inside"]',
+    '[{"symbol": "ABC-EQ", "token": "1", "levels": [1.25, 2e-2]}, {"nested": {"x": []}}]',
+    '\n[\n  123456789012,\n  -0.0001\n]\n',
+]
+
+
+def _chunks(data: bytes, size: int):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize('document', DOCUMENTS)
+@pytest.mark.parametrize('size', [1, 2, 3, 4, 5, 7, 64])
+def test_chunk_boundaries(document, size):
+    data = document.encode('utf-8')
+    assert list(iter_json_array(_chunks(data, size))) == json.loads(document)
+
+
+@pytest.mark.parametrize('size', [1, 3])
+def test_str_chunks(size):
+    document = '[1.5e3, "x", {"a": 1}]'
+    chunks = [document[i:i + size] for i in range(0, len(document), size)]
+    assert list(iter_json_array(chunks)) == json.loads(document)
+
+
+@pytest.mark.parametrize('document', ['[1, 2', '[1.5e]', '{"a": 1}', '[1 2]'])
+def test_malformed_input_raises(document):
+    with pytest.raises(ValueError):
+        list(iter_json_array(_chunks(document.encode(), 1)))
+
+
+def test_iter_json_file_filters(tmp_path):
+    path = tmp_path / 'instruments.json'
+    path.write_text(json.dumps([{'exch_seg': 'NSE', 'i': i} for i in range(5)] + [{'exch_seg': 'MCX'}]))
+    assert len(list(iter_json_file(str(path), lambda item: item['exch_seg'] == 'NSE'))) == 5
@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta
+import pytest
+from src.utils.candle_store import CandleStore
+from src.utils.local_screener import LocalScreener, UnsupportedClause, max_lookback, parse_clause
+
+END = datetime(2025, 10, 10)
+UNIVERSE = [{'nsecode': name, 'name': name, 'token': token} for name, token in (('UP', '1'), ('DOWN', '2'), ('NEW', '3'))]
+
+
+def test_clause_parses_into_a_tree():
+    tree = parse_clause('( {33489} ( latest close > 1 day ago high * 1.02 or daily volume >= 100000 ) )')
+
+    assert tree == ('or', [
+        ('cmp', '>', ('field', 'close', 0), ('arith', '*', ('field', 'high', 1), ('num', 1.02))),
+        ('cmp', '>=', ('field', 'volume', 0), ('num', 100000.0)),
+    ])
+
+
+def test_and_binds_tighter_than_or():
+    tree = parse_clause('close > 1 or close > 2 and open < 3')
+
+    assert tree[0] == 'or'
+    assert tree[1][1][0] == 'and'
+
+
+def test_segment_only_clause_matches_everything():
+    assert parse_clause('( {33489} )') == ('true',)
+
+
+def test_max_lookback_is_the_largest_days_ago():
+    assert max_lookback(parse_clause('close > 2 days ago close and open - 5 days ago low > 0')) == 5
+    assert max_lookback(parse_clause('( {33489} )')) == 0
+
+
+@pytest.mark.parametrize('clause', [
+    'close > sma( close, 20 )',
+    'close ~ 1',
+    'close > 1 )',
+    'close >',
+    '1 day close > 1',
+])
+def test_unsupported_syntax_raises(clause):
+    with pytest.raises(UnsupportedClause):
+        parse_clause(clause)
+
+
+def _screener(tmp_path):
+    store = CandleStore(str(tmp_path / 'candles.sqlite3'))
+    days = [END - timedelta(days=i) for i in (2, 1, 0)]
+    closes = {'1': [100, 105, 110], '2': [110, 105, 100]}
+    for token, values in closes.items():
+        store.save_candles('NSE', token, 'ONE_DAY', [
+            [f"{day.date().isoformat()}T00:00:00+05:30", close, close + 1, close - 1, close, 1000]
+            for day, close in zip(days, values)
+        ])
+    store.save_candles('NSE', '3', 'ONE_DAY', [[f"{END.date().isoformat()}T00:00:00+05:30", 50, 51, 49, 50, 10]])
+
+    screener = LocalScreener(candle_store=store)
+    screener._universe = UNIVERSE
+    return screener
+
+
+def test_screen_returns_chartink_style_records(tmp_path):
+    screener = _screener(tmp_path)
+
+    assert screener.screen('( {33489} ( close > 1 day ago close ) )', end_date=END) == [{'nsecode': 'UP', 'name': 'UP'}]
+    assert [s['nsecode'] for s in screener.screen('close < 2 days ago close', end_date=END)] == ['DOWN']
+
+
+def test_missing_history_never_matches(tmp_path):
+    screener = _screener(tmp_path)
+
+    assert [s['nsecode'] for s in screener.screen('close > 0', end_date=END)] == ['UP', 'DOWN', 'NEW']
+    assert [s['nsecode'] for s in screener.screen('close != 1 day ago close', end_date=END)] == ['UP', 'DOWN']
+
+
+def test_panel_is_stocks_by_latest_days(tmp_path):
+    panel = _screener(tmp_path).load_panel(2, END)
+
+    assert panel['close'].shape == (3, 2)
+    assert panel['close'][0].tolist() == [105.0, 110.0]
+
+
+def test_too_few_stored_days_screens_nothing(tmp_path):
+    assert _screener(tmp_path).screen('close > 5 days ago close', end_date=END) == []
@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta
+from src.utils.option_chain import OptionChainIndex
+
+EXPIRY = '28OCT2025'
+NEXT_EXPIRY = '25NOV2025'
+
+
+def _option(name, strike, option_type, expiry=EXPIRY, token=None):
+    symbol = f"{name}{expiry[:2]}{expiry[2:5]}{expiry[-2:]}{strike}{option_type}"
+    return {'symbol': symbol, 'name': name, 'token': token or symbol, 'strike': str(strike * 100),
+            'expiry': expiry, 'lotsize': '50'}
+
+
+def _index():
+    options = [_option('M&M', strike, option_type) for strike in (3000, 3100, 3200, 3300, 3400)
+               for option_type in ('CE', 'PE')]
+    options += [_option('M&MFIN', 300, 'CE'), _option('M&M', 3500, 'CE', NEXT_EXPIRY)]
+    return OptionChainIndex(options)
+
+
+def test_chains_are_grouped_by_exact_underlying_and_expiry():
+    index = _index()
+
+    assert set(index.chains) == {'M&M', 'M&MFIN'}
+    assert set(index.get_chain('m&m')) == {EXPIRY, NEXT_EXPIRY}
+    assert len(index.contracts('M&M')) == 11
+    assert all(contract['symbol'].startswith('M&M2') for contract in index.contracts('M&M'))
+
+
+def test_side_is_sorted_by_strike_with_implied_decimals():
+    options = [_option('ABC', strike, 'CE') for strike in (120, 100, 110)]
+
+    side = OptionChainIndex(options).get_side('ABC', EXPIRY, 'CE')
+
+    assert side.strikes == [100.0, 110.0, 120.0]
+    assert side.contract(0) == {'symbol': options[1]['symbol'], 'token': options[1]['token'], 'strike': 100.0,
+                                'type': 'CE', 'expiry': EXPIRY, 'lotsize': '50'}
+
+
+def test_duplicate_tokens_and_non_options_are_skipped():
+    option = _option('ABC', 100, 'CE')
+    future = {**_option('ABC', 100, 'CE', token='fut'), 'symbol': 'ABC28OCT25FUT'}
+
+    index = OptionChainIndex([option, dict(option), future])
+
+    assert len(index.contracts('ABC')) == 1
+
+
+def test_unknown_underlying_has_no_chain():
+    index = _index()
+
+    assert index.get_chain('XYZ') == {}
+    assert index.get_side('XYZ', EXPIRY, 'CE') is None
+    assert index.contracts('XYZ') == []
+
+
+def test_strikes_are_strictly_below_and_above_the_day_high():
+    best_ce, best_pe, ce_candidates, pe_candidates = _index().select_strikes('M&M', 3200, expiry=EXPIRY, k=1)
+
+    assert best_ce['strike'] == 3100.0 and best_ce['type'] == 'CE'
+    assert best_pe['strike'] == 3300.0 and best_pe['type'] == 'PE'
+    assert [c['strike'] for c in ce_candidates] == [3100.0, 3000.0]
+    assert [c['strike'] for c in pe_candidates] == [3300.0, 3400.0]
+
+
+def test_candidates_stop_at_the_edge_of_the_chain():
+    best_ce, best_pe, ce_candidates, pe_candidates = _index().select_strikes('M&M', 3350, expiry=EXPIRY, k=3)
+
+    assert [c['strike'] for c in ce_candidates] == [3300.0, 3200.0, 3100.0, 3000.0]
+    assert [c['strike'] for c in pe_candidates] == [3400.0]
+    assert best_pe is pe_candidates[0]
+
+
+def test_day_high_outside_the_chain_has_no_strike_on_that_side():
+    index = _index()
+
+    assert index.select_strikes('M&M', 2900, expiry=EXPIRY)[0] is None
+    assert index.select_strikes('M&M', 3500, expiry=EXPIRY)[1] is None
+
+
+def test_missing_expiry_selects_nothing():
+    assert _index().select_strikes('M&M', 3200, expiry='30DEC2025') == (None, None, [], [])
+    assert _index().select_strikes('XYZ', 3200) == (None, None, [], [])
+
+
+def test_batch_uses_the_current_month_expiry():
+    today = datetime.now()
+    month_end = (today.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+    expiry = month_end.strftime('%d%b%Y').upper()
+    options = [_option(name, strike, option_type, expiry) for name in ('ABC', 'XYZ')
+               for strike in (100, 110, 120) for option_type in ('CE', 'PE')]
+
+    selected = OptionChainIndex(options).select_strikes_batch([('ABC', 115), ('XYZ', 105)], k=0)
+
+    assert selected['ABC'][0]['strike'] == 110.0 and selected['ABC'][1]['strike'] == 120.0
+    assert selected['XYZ'][0]['strike'] == 100.0 and selected['XYZ'][1]['strike'] == 110.0
+    assert selected['ABC'][0]['expiry'] == expiry
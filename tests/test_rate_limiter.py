@@ -0,0 +1,71 @@
+import asyncio
+import threading
+import pytest
+from src.utils.rate_limiter import RateLimiter, RateLimitExceeded, rate_limited_call, rate_limited_call_async
+
+THROTTLED = {'status': False, 'message': 'Access denied because of exceeding access rate', 'errorcode': 'AB1004'}
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    limiter = RateLimiter({'test': [(1000, 1)]})
+    endpoint = limiter['test']
+    endpoint.base_backoff = endpoint._backoff = 0.001
+    monkeypatch.setattr(RateLimiter, '_instance', limiter)
+    return endpoint
+
+
+def test_throttled_after_retries_raises_and_stays_backed_off(limiter):
+    calls = []
+
+    def throttled():
+        calls.append(1)
+        return THROTTLED
+
+    with pytest.raises(RateLimitExceeded) as error:
+        rate_limited_call('test', throttled, retries=2)
+
+    assert len(calls) == 3
+    assert error.value.response == THROTTLED
+    assert limiter._backoff > limiter.base_backoff
+
+
+def test_throttle_exception_after_retries_raises(limiter):
+    def throttled():
+        raise Exception('Too many requests')
+
+    with pytest.raises(RateLimitExceeded):
+        rate_limited_call('test', throttled, retries=1)
+    assert limiter._backoff > limiter.base_backoff
+
+
+def test_success_after_throttle_resets_backoff(limiter):
+    responses = iter([THROTTLED, {'status': True, 'data': 1}])
+
+    assert rate_limited_call('test', next, responses, retries=1) == {'status': True, 'data': 1}
+    assert limiter._backoff == limiter.base_backoff
+
+
+def test_async_call_runs_blocking_functions_off_the_loop(limiter):
+    loop_thread = threading.get_ident()
+    threads = []
+
+    def blocking():
+        threads.append(threading.get_ident())
+        return {'status': True, 'data': 1}
+
+    assert asyncio.run(rate_limited_call_async('test', blocking)) == {'status': True, 'data': 1}
+    assert threads and threads[0] != loop_thread
+
+
+def test_async_call_retries_then_raises(limiter):
+    calls = []
+
+    async def throttled():
+        calls.append(1)
+        return THROTTLED
+
+    with pytest.raises(RateLimitExceeded):
+        asyncio.run(rate_limited_call_async('test', throttled, retries=2))
+    assert len(calls) == 3
+    assert limiter._backoff > limiter.base_backoff
@@ -0,0 +1,59 @@
+import threading
+from src.utils.request_cache import RequestCache
+
+
+def test_clear_during_request_does_not_store_its_result():
+    cache = RequestCache(ttl=60)
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return {'status': True, 'data': 'old'}
+
+    owner = threading.Thread(target=cache.call, args=('key', slow))
+    owner.start()
+    started.wait(5)
+    cache.clear()
+    release.set()
+    owner.join(5)
+
+    assert cache.call('key', lambda: {'status': True, 'data': 'new'}) == {'status': True, 'data': 'new'}
+    assert len(calls) == 1
+
+
+def test_stale_owner_does_not_evict_a_newer_request():
+    cache = RequestCache(ttl=60)
+    started, release = threading.Event(), threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(5)
+        return None
+
+    owner = threading.Thread(target=cache.call, args=('key', slow))
+    owner.start()
+    started.wait(5)
+    cache.clear()
+    cache.call('key', lambda: {'status': True, 'data': 'new'})
+    release.set()
+    owner.join(5)
+
+    assert cache.call('key', lambda: {'status': True, 'data': 'other'}) == {'status': True, 'data': 'new'}
+
+
+def test_successful_results_are_shared():
+    cache = RequestCache(ttl=60)
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return {'status': True, 'data': 1}
+
+    cache.call('key', fetch)
+    cache.call('key', fetch)
+
+    assert len(calls) == 1
+    assert (cache.hits, cache.misses) == (1, 1)
@@ -0,0 +1,69 @@
+import numpy as np
+from src.utils.monitored_option import MonitoredOption
+from src.utils.tick_state import (
+    POSITION_ACTIVE, POSITION_ENTRY_TRIGGERED, POSITION_IDLE, POSITION_STOPLOSS, POSITION_TARGET, TickState
+)
+
+LEVELS = {'buy_entry': 100.01, 'target': 105.0, 'stoploss': 95.0}
+
+
+def _state(n=1, position=POSITION_ACTIVE):
+    state = TickState([MonitoredOption(i, str(i), f'S{i}', 'CE', levels=LEVELS) for i in range(n)])
+    state.position_state[:] = position
+    return state
+
+
+def _evaluate(state, ticks):
+    rows = np.array([row for row, _ in ticks], dtype=np.intp)
+    ltps = np.array([ltp for _, ltp in ticks], dtype=np.float64)
+    events = state.evaluate_batch(rows, ltps, now=100.0, cooldown=0)
+    return {event: (rows.tolist(), prices.tolist()) for event, (rows, prices) in events.items() if len(rows)}
+
+
+def test_stoploss_before_target_exits_at_stoploss():
+    state = _state()
+
+    events = _evaluate(state, [(0, 94.0), (0, 106.0)])
+
+    assert events == {'stoploss': ([0], [94.0])}
+    assert state.position_state[0] == POSITION_STOPLOSS
+
+
+def test_target_before_stoploss_exits_at_target():
+    state = _state()
+
+    events = _evaluate(state, [(0, 100.0), (0, 105.5), (0, 90.0)])
+
+    assert events == {'target': ([0], [105.5])}
+    assert state.position_state[0] == POSITION_TARGET
+
+
+def test_rows_are_decided_independently():
+    state = _state(3)
+
+    events = _evaluate(state, [(1, 106.0), (0, 94.0), (2, 100.0), (0, 107.0), (1, 93.0)])
+
+    assert events == {'target': ([1], [106.0]), 'stoploss': ([0], [94.0])}
+    assert state.position_state.tolist() == [POSITION_STOPLOSS, POSITION_TARGET, POSITION_ACTIVE]
+    assert state.ltp.tolist() == [107.0, 93.0, 100.0]
+
+
+def test_entry_reports_the_crossing_tick():
+    state = _state(position=POSITION_IDLE)
+
+    events = _evaluate(state, [(0, 99.0), (0, 100.5), (0, 104.0)])
+
+    assert events == {'entry': ([0], [100.5])}
+    assert state.position_state[0] == POSITION_ENTRY_TRIGGERED
+
+
+def test_single_tick_batches_match_advance():
+    rng = np.random.default_rng(3)
+    ticks = [(int(row), float(ltp)) for row, ltp in zip(rng.integers(0, 50, 5000), rng.uniform(90, 110, 5000).round(2))]
+    batched, single = _state(50, POSITION_IDLE), _state(50, POSITION_IDLE)
+
+    for row, ltp in ticks:
+        _evaluate(batched, [(row, ltp)])
+        single.advance(row, ltp, now=100.0, cooldown=0)
+
+    assert batched.position_state.tolist() == single.position_state.tolist()
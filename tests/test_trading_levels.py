@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+from src.utils.trading_levels import OPTION_LEVEL_COLUMNS, levels_row, option_breakout_levels
+
+
+def scalar_levels(option_day_high, current_ltp):
+    """The per-option formula option_breakout_levels replaced"""
+    buy_entry = option_day_high + 0.01
+    target = option_day_high * 1.05
+    stoploss = option_day_high * 0.95
+    risk = buy_entry - stoploss
+    reward = target - buy_entry
+    risk_reward_ratio = reward / risk if risk > 0 else 0
+    return {
+        'buy_entry': round(buy_entry, 2),
+        'target': round(target, 2),
+        'stoploss': round(stoploss, 2),
+        'risk_reward_ratio': round(risk_reward_ratio, 2),
+        'upside_potential': round(((target - current_ltp) / current_ltp) * 100, 2) if current_ltp else 0,
+        'downside_risk': round(((current_ltp - stoploss) / current_ltp) * 100, 2) if current_ltp else 0
+    }
+
+
+def _legs():
+    rng = np.random.default_rng(7)
+    day_highs = np.concatenate([rng.uniform(0.05, 5000, 5000).round(2), [2.745, 2.755, 2.665, 52.1, 0.05]])
+    ltps = np.concatenate([rng.uniform(0, 5000, 5000).round(2), [2.755, 0, 2.675, 49.35, 0.05]])
+    return day_highs, ltps
+
+
+def test_matches_scalar_formula_within_a_cent():
+    day_highs, ltps = _legs()
+
+    levels = option_breakout_levels(day_highs, ltps)
+
+    for i, (day_high, ltp) in enumerate(zip(day_highs.tolist(), ltps.tolist())):
+        expected = scalar_levels(day_high, ltp)
+        assert levels_row(levels, i) == pytest.approx(expected, abs=0.01 + 1e-9)
+
+
+def test_exact_rounding_matches_scalar_formula():
+    day_highs, ltps = _legs()
+
+    levels = option_breakout_levels(day_highs, ltps, exact_rounding=True)
+
+    for i, (day_high, ltp) in enumerate(zip(day_highs.tolist(), ltps.tolist())):
+        assert levels_row(levels, i) == scalar_levels(day_high, ltp)
+
+
+@pytest.mark.parametrize('day_high', [2.665, 2.745, 1.105, 0.115])
+def test_ties_round_like_np_round_by_default(day_high):
+    default = option_breakout_levels([day_high], [0])
+    exact = option_breakout_levels([day_high], [0], exact_rounding=True)
+
+    assert default['buy_entry'][0] == np.round(day_high + 0.01, 2)
+    assert exact['buy_entry'][0] == round(day_high + 0.01, 2)
+
+
+def test_missing_ltp_has_no_potential():
+    levels = option_breakout_levels([100.0, 100.0], [np.nan, 0])
+
+    assert set(levels) == set(OPTION_LEVEL_COLUMNS)
+    assert levels['upside_potential'].tolist() == [0.0, 0.0]
+    assert levels['downside_risk'].tolist() == [0.0, 0.0]
@@ -0,0 +1,52 @@
+import pytest
+
+pytest.importorskip('SmartApi')
+from src.utils.websocket_shards import partition_tokens  # noqa: E402
+
+TOKENS = [str(i) for i in range(10)]
+
+
+def test_tokens_are_chunked_per_connection_in_order():
+    shards, dropped = partition_tokens(TOKENS, per_connection=4, max_connections=3)
+
+    assert shards == [TOKENS[0:4], TOKENS[4:8], TOKENS[8:10]]
+    assert dropped == []
+
+
+def test_tokens_beyond_capacity_are_dropped():
+    shards, dropped = partition_tokens(TOKENS, per_connection=3, max_connections=2)
+
+    assert shards == [TOKENS[0:3], TOKENS[3:6]]
+    assert dropped == TOKENS[6:]
+
+
+def test_exact_capacity_fills_every_connection():
+    shards, dropped = partition_tokens(TOKENS, per_connection=5, max_connections=2)
+
+    assert [len(shard) for shard in shards] == [5, 5]
+    assert dropped == []
+
+
+def test_no_tokens_means_no_shards():
+    assert partition_tokens([], per_connection=5, max_connections=2) == ([], [])
+
+
+def test_limits_default_to_the_environment(monkeypatch):
+    monkeypatch.setenv('WS_TOKENS_PER_CONNECTION', '2')
+    monkeypatch.setenv('WS_MAX_CONNECTIONS', '4')
+
+    shards, dropped = partition_tokens(TOKENS)
+
+    assert len(shards) == 4 and all(len(shard) == 2 for shard in shards)
+    assert dropped == TOKENS[8:]
+
+
+def test_default_limits_match_the_broker(monkeypatch):
+    monkeypatch.delenv('WS_TOKENS_PER_CONNECTION', raising=False)
+    monkeypatch.delenv('WS_MAX_CONNECTIONS', raising=False)
+    tokens = [str(i) for i in range(3500)]
+
+    shards, dropped = partition_tokens(tokens)
+
+    assert [len(shard) for shard in shards] == [1000, 1000, 1000]
+    assert len(dropped) == 500